@@ -1,15 +1,18 @@
 import subprocess
 import os
 import glob
-import json
 import time
+from pinata.token_metadata import TokenMetadata
 
 
 class AddTokenMetadata:
-    def __init__(self, token_metadata_path, metadata_gateway_url, mint_amount):
+    def __init__(self, token_metadata, metadata_gateway_url, mint_amount, command_runner=None):
         self.root_directory = os.getcwd()
+        # Called like subprocess.run, eg. emulator.solana_cli.EmulatedSolanaCLI for offline runs
+        self.command_runner = command_runner
         self.to_file = None
-        self.token_metadata_path = token_metadata_path
+        # In-memory TokenMetadata, or a path to a metadata JSON file
+        self.token_metadata = token_metadata
         self.metadata_gateway_url = metadata_gateway_url
         self.mint_amount = mint_amount
         self.name = None
@@ -18,7 +21,7 @@ class AddTokenMetadata:
 
     def run_command(self, command):
         try:
-            result = subprocess.run(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            result = (self.command_runner or subprocess.run)(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
             print(result.stdout)
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
@@ -35,13 +38,14 @@ class AddTokenMetadata:
         print(f"Found file: {self.to_file}")
 
     def load_metadata(self):
-        print(f"Loading metadata from: {self.token_metadata_path}")
-        if not os.path.exists(self.token_metadata_path):
-            raise FileNotFoundError(f"Token metadata file not found at {self.token_metadata_path}")
-        with open(self.token_metadata_path, 'r') as file:
-            metadata = json.load(file)
-        self.name = metadata["name"]
-        self.symbol = metadata["symbol"]
+        metadata = self.token_metadata
+        if not isinstance(metadata, TokenMetadata):
+            print(f"Loading metadata from: {metadata}")
+            if not os.path.exists(metadata):
+                raise FileNotFoundError(f"Token metadata file not found at {metadata}")
+            metadata = TokenMetadata.load(metadata)
+        self.name = metadata.name
+        self.symbol = metadata.symbol
         print(f"Loaded metadata: name={self.name}, symbol={self.symbol}")
 
     def initialize_metadata(self):
@@ -141,13 +145,16 @@ class AddTokenMetadata:
 
 
 
-    def run(self):
+    def add_metadata(self):
         self.find_to_file()
         self.load_metadata()
         self.initialize_metadata()
         self.update_metadata_name()
         self.update_metadata_symbol()
         self.update_metadata_uri()
+
+    def run(self):
+        self.add_metadata()
         self.mint_tokens()
 
 
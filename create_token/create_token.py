@@ -1,18 +1,22 @@
 import subprocess
 import os
 import glob
+import json
 import time
+from create_token.keypair_stock import KeypairStock
 
 
 class SolanaMainnetScriptRunner:
-    def __init__(self):
+    def __init__(self, command_runner=None):
         self.root_directory = os.getcwd()
+        # Called like subprocess.run, eg. emulator.solana_cli.EmulatedSolanaCLI for offline runs
+        self.command_runner = command_runner
         self.wallet_address = None
         self.to_file = None
 
     def run_command(self, command):
         try:
-            result = subprocess.run(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            result = (self.command_runner or subprocess.run)(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
             print(result.stdout)
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
@@ -31,7 +35,29 @@ class SolanaMainnetScriptRunner:
             raise ValueError("Failed to retrieve wallet address.")
         print(f"Wallet address: {self.wallet_address}")
 
+    def claim_stocked_keypair(self, pattern="To"):
+        """
+        Take a pre-ground keypair from the keypair stock, when one is configured and not empty
+        """
+        stock = KeypairStock.open_default()
+        if stock is None:
+            return False
+        # The key only leaves the stock once its file is written
+        with stock.claim(pattern) as keypair:
+            if keypair is None:
+                print(f"Keypair stock {stock.db_path} has no {pattern} keypairs left, grinding one instead.")
+                return False
+
+            self.to_file = f"{keypair.pubkey()}.json"
+            with open(os.path.join(self.root_directory, self.to_file), 'w') as f:
+                json.dump(list(bytes(keypair)), f)
+        print(f"Claimed pre-ground keypair: {self.to_file} ({stock.count(pattern)} left in stock)")
+        return True
+
     def generate_to_keypair(self):
+        if self.claim_stocked_keypair():
+            return
+
         print("Generating keypair starting with To...")
         self.run_command("solana-keygen grind --starts-with To:1")
 
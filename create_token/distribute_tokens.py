@@ -0,0 +1,337 @@
+import os
+import csv
+import json
+import time
+from collections import deque
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ThreadPoolExecutor
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.message import MessageV0
+from solders.transaction import VersionedTransaction
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from utils.solana_rpc import SolanaRPCError, MAINNET_RPC_URL
+from utils.rpc_cache import shared_rpc_client
+from create_token.token_program import (
+    TOKEN_2022_PROGRAM_ID, SYSTEM_PROGRAM_ID, PACKET_DATA_SIZE, MAX_COMPUTE_UNITS,
+    load_keypair, get_associated_token_address, create_associated_token_account_idempotent,
+    transfer_checked, set_compute_unit_limit, set_compute_unit_price,
+    create_lookup_table, extend_lookup_table, parse_mint
+)
+
+# Compute budgeted per recipient: an idempotent Token-2022 ATA create plus a transfer_checked
+COMPUTE_UNITS_PER_RECIPIENT = 50_000
+# Blockhashes stay valid for ~60s; refresh well before that
+BLOCKHASH_MAX_AGE = 20
+
+
+class TokenDistributor:
+    def __init__(self, mint, recipients_path, keypair_path="solana_keypair.json", rpc_url=MAINNET_RPC_URL,
+                 ledger_path=None, max_in_flight=8, lookup_table="auto", priority_fee=0, poll_interval=2.0):
+        """
+        Distribute an existing token from our wallet to many recipients.
+
+        Args:
+            mint (str): Mint address of the token to distribute
+            recipients_path (str): CSV of recipient,amount rows (amounts in whole tokens)
+            keypair_path (str): Keypair that pays fees and owns the source token account
+            ledger_path (str): Resumable per-recipient ledger (JSON lines), next to the CSV by default
+            max_in_flight (int): Maximum number of unconfirmed transactions at any time
+            lookup_table (str): "auto", "always" or "never" use an address lookup table
+            priority_fee (int): Compute unit price in micro-lamports
+        """
+        self.mint = Pubkey.from_string(mint)
+        self.recipients_path = recipients_path
+        self.keypair = load_keypair(keypair_path)
+        self.owner = self.keypair.pubkey()
+        self.rpc = shared_rpc_client(rpc_url)
+        self.ledger_path = ledger_path or f"{recipients_path}.ledger.jsonl"
+        self.max_in_flight = max_in_flight
+        self.lookup_table = lookup_table
+        self.priority_fee = priority_fee
+        self.poll_interval = poll_interval
+        self.source = get_associated_token_address(self.owner, self.mint)
+        self.decimals = None
+        self.lookup_table_accounts = []
+        self._blockhash = None
+
+    def load_recipients(self):
+        """
+        Read recipient,amount rows, converting amounts to base units. A header row is allowed.
+        """
+        recipients = {}
+        with open(self.recipients_path, newline='') as f:
+            for line_number, row in enumerate(csv.reader(f), start=1):
+                if not row or not row[0].strip() or row[0].startswith("#"):
+                    continue
+                if len(row) < 2:
+                    raise ValueError(f"Line {line_number}: expected recipient,amount")
+                address, amount = row[0].strip(), row[1].strip()
+                try:
+                    ui_amount = Decimal(amount)
+                except InvalidOperation:
+                    if line_number == 1:
+                        continue
+                    raise ValueError(f"Line {line_number}: invalid amount {amount!r}")
+
+                raw_amount = ui_amount * (10 ** self.decimals)
+                if raw_amount != raw_amount.to_integral_value() or raw_amount <= 0:
+                    raise ValueError(f"Line {line_number}: amount {amount} is not a positive multiple of 10^-{self.decimals}")
+                Pubkey.from_string(address)
+                if address in recipients:
+                    raise ValueError(f"Line {line_number}: duplicate recipient {address}")
+                recipients[address] = int(raw_amount)
+        return recipients
+
+    def load_ledger(self):
+        """
+        Latest ledger entry per recipient
+        """
+        ledger = {}
+        if os.path.exists(self.ledger_path):
+            with open(self.ledger_path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        ledger[entry["recipient"]] = entry
+        return ledger
+
+    def record(self, batch, status, signature=None, last_valid_block_height=None, error=None):
+        with open(self.ledger_path, 'a') as f:
+            for recipient, amount in batch:
+                f.write(json.dumps({
+                    "recipient": recipient,
+                    "amount": amount,
+                    "status": status,
+                    "signature": signature,
+                    "last_valid_block_height": last_valid_block_height,
+                    "error": error,
+                    "time": time.time()
+                }) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def fetch_mint(self):
+        account = self.rpc.get_account_info(str(self.mint))
+        if account is None:
+            raise ValueError(f"Mint {self.mint} does not exist")
+        if account["owner"] != str(TOKEN_2022_PROGRAM_ID):
+            raise ValueError(f"Mint {self.mint} is not a Token-2022 mint")
+        self.decimals = parse_mint(account["data"])["decimals"]
+
+    def blockhash(self):
+        if self._blockhash is None or time.monotonic() - self._blockhash[2] > BLOCKHASH_MAX_AGE:
+            latest = self.rpc.get_latest_blockhash()
+            self._blockhash = (Hash.from_string(latest["blockhash"]), latest["lastValidBlockHeight"], time.monotonic())
+        return self._blockhash[0], self._blockhash[1]
+
+    def instructions(self, batch):
+        instructions = [set_compute_unit_limit(min(MAX_COMPUTE_UNITS, COMPUTE_UNITS_PER_RECIPIENT * len(batch)))]
+        if self.priority_fee:
+            instructions.append(set_compute_unit_price(self.priority_fee))
+        for recipient, amount in batch:
+            owner = Pubkey.from_string(recipient)
+            instructions.append(create_associated_token_account_idempotent(self.owner, owner, self.mint))
+            instructions.append(transfer_checked(
+                self.source, self.mint, get_associated_token_address(owner, self.mint),
+                self.owner, amount, self.decimals
+            ))
+        return instructions
+
+    def compile(self, batch, blockhash, lookup_table_accounts=None):
+        if lookup_table_accounts is None:
+            lookup_table_accounts = self.lookup_table_accounts
+        message = MessageV0.try_compile(self.owner, self.instructions(batch), lookup_table_accounts, blockhash)
+        return VersionedTransaction(message, [self.keypair])
+
+    def pack(self, recipients, lookup_table_accounts=None):
+        """
+        Greedily fill each transaction with as many recipients as fit in both the
+        packet size and the compute limit
+        """
+        max_per_transaction = MAX_COMPUTE_UNITS // COMPUTE_UNITS_PER_RECIPIENT
+        batches = []
+        batch = []
+        for recipient in recipients:
+            candidate = batch + [recipient]
+            too_big = len(bytes(self.compile(candidate, Hash.default(), lookup_table_accounts))) > PACKET_DATA_SIZE
+            if batch and (too_big or len(candidate) > max_per_transaction):
+                batches.append(batch)
+                batch = [recipient]
+            else:
+                batch = candidate
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def shared_addresses(self):
+        """
+        Accounts every transfer transaction references, which a lookup table can shorten to one byte each.
+        The token program is left out: a program a transaction invokes can't be loaded from a table.
+        """
+        return [self.mint, self.source, SYSTEM_PROGRAM_ID]
+
+    def setup_lookup_table(self, recipients):
+        """
+        Create a lookup table for the shared accounts when it saves more transactions than it costs
+        """
+        batches = self.pack(recipients)
+        if self.lookup_table == "never":
+            return batches
+
+        preview = [AddressLookupTableAccount(Pubkey.default(), self.shared_addresses())]
+        batches_with_table = self.pack(recipients, preview)
+        print(f"Packing: {len(batches)} transactions without a lookup table, {len(batches_with_table)} with one")
+        # Creating the table costs one transaction plus waiting for it to activate
+        if self.lookup_table == "auto" and len(batches) - len(batches_with_table) <= 2:
+            return batches
+
+        slot = self.rpc.get_slot("finalized")
+        create_instruction, table = create_lookup_table(self.owner, self.owner, slot)
+        extend_instruction = extend_lookup_table(table, self.owner, self.owner, self.shared_addresses())
+        blockhash, _ = self.blockhash()
+        message = MessageV0.try_compile(self.owner, [create_instruction, extend_instruction], [], blockhash)
+        signature = self.rpc.send_transaction(VersionedTransaction(message, [self.keypair]))
+        print(f"Creating address lookup table {table} ({signature})...")
+
+        while True:
+            status = self.rpc.get_signature_statuses([signature])[0]
+            if status and status.get("err"):
+                raise ValueError(f"Lookup table creation failed: {status['err']}")
+            if status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                break
+            time.sleep(self.poll_interval)
+        # Addresses added to a table can only be looked up from the next slot on
+        extended_slot = self.rpc.get_slot()
+        while self.rpc.get_slot() <= extended_slot:
+            time.sleep(0.4)
+
+        self.lookup_table_accounts = [AddressLookupTableAccount(table, self.shared_addresses())]
+        return self.pack(recipients)
+
+    def reconcile(self, ledger, recipients):
+        """
+        Sort recipients into done, pending and still in flight using the ledger and on-chain signature statuses
+        """
+        done = {address for address, entry in ledger.items() if entry["status"] == "confirmed"}
+        sent = {}
+        for address, entry in ledger.items():
+            if entry["status"] == "sent" and address in recipients:
+                sent.setdefault(entry["signature"], []).append((address, recipients[address], entry["last_valid_block_height"]))
+
+        in_flight = {}
+        if sent:
+            signatures = list(sent)
+            # The ledger can be older than the node's recent status cache
+            statuses = self.rpc.get_signature_statuses(signatures, search_history=True)
+            height = self.rpc.get_block_height()
+            for signature, status in zip(signatures, statuses):
+                batch = [(address, amount) for address, amount, _ in sent[signature]]
+                last_valid = sent[signature][0][2]
+                if status and status.get("err"):
+                    continue
+                if status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                    self.record(batch, "confirmed", signature)
+                    done.update(address for address, _ in batch)
+                elif status is not None or height <= last_valid:
+                    in_flight[signature] = (batch, last_valid)
+                # Failed transactions, and expired ones the history has no trace of, moved
+                # nothing, so those recipients are simply retried
+
+        waiting = {address for batch, _ in in_flight.values() for address, _ in batch}
+        pending = [(address, amount) for address, amount in recipients.items()
+                   if address not in done and address not in waiting]
+        return done, pending, in_flight
+
+    def send(self, batch):
+        """
+        Sign and send one batch, recording it as sent before it leaves so a crash can't lose it
+        """
+        blockhash, last_valid = self.blockhash()
+        transaction = self.compile(batch, blockhash)
+        signature = str(transaction.signatures[0])
+        self.record(batch, "sent", signature, last_valid)
+        try:
+            self.rpc.send_transaction(transaction)
+            return signature, last_valid, None
+        except SolanaRPCError as e:
+            return signature, last_valid, str(e)
+
+    def run(self):
+        self.fetch_mint()
+        recipients = self.load_recipients()
+        done, pending, in_flight = self.reconcile(self.load_ledger(), recipients)
+        print(f"{len(recipients)} recipients: {len(done)} already done, {len(in_flight)} transactions in flight, "
+              f"{len(pending)} to send")
+
+        remaining = sum(amount for _, amount in pending)
+        balance = int(self.rpc.get_token_account_balance(str(self.source))["amount"])
+        if remaining > balance:
+            raise ValueError(f"Source account {self.source} holds {balance} base units, {remaining} needed")
+
+        queue = deque(self.setup_lookup_table(pending) if pending else [])
+        print(f"Sending {len(queue)} transactions with at most {self.max_in_flight} in flight...")
+
+        start = time.perf_counter()
+        confirmed = len(done)
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            while queue or in_flight:
+                to_send = [queue.popleft() for _ in range(min(len(queue), self.max_in_flight - len(in_flight)))]
+                for batch, (signature, last_valid, error) in zip(to_send, executor.map(self.send, to_send)):
+                    if error is None:
+                        in_flight[signature] = (batch, last_valid)
+                    elif "Blockhash not found" in error:
+                        self._blockhash = None
+                        queue.append(batch)
+                    else:
+                        self.record(batch, "failed", signature, last_valid, error)
+                        failed += len(batch)
+
+                time.sleep(self.poll_interval)
+                if not in_flight:
+                    continue
+                signatures = list(in_flight)
+                statuses = self.rpc.get_signature_statuses(signatures)
+                height = self.rpc.get_block_height()
+                expired = [signature for signature, status in zip(signatures, statuses)
+                           if status is None and height > in_flight[signature][1]]
+                if expired:
+                    # Unknown to the recent status cache is not proof it never landed: only
+                    # resend what the transaction history has no trace of either
+                    history = dict(zip(expired, self.rpc.get_signature_statuses(expired, search_history=True)))
+                    statuses = [history.get(signature, status) for signature, status in zip(signatures, statuses)]
+                for signature, status in zip(signatures, statuses):
+                    batch, last_valid = in_flight[signature]
+                    if status and status.get("err"):
+                        self.record(batch, "failed", signature, last_valid, json.dumps(status["err"]))
+                        failed += len(batch)
+                        del in_flight[signature]
+                    elif status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                        self.record(batch, "confirmed", signature, last_valid)
+                        confirmed += len(batch)
+                        del in_flight[signature]
+                    elif status is None and height > last_valid:
+                        print(f"Transaction {signature} expired, resending {len(batch)} recipients")
+                        queue.append(batch)
+                        del in_flight[signature]
+
+                elapsed = time.perf_counter() - start
+                print(f"Confirmed {confirmed}/{len(recipients)} recipients, {failed} failed, "
+                      f"{len(in_flight)} in flight ({elapsed:.0f}s)")
+
+        print(f"\nDistribution finished: {confirmed} confirmed, {failed} failed. Ledger: {self.ledger_path}")
+        self.rpc.print_stats()
+        return {"confirmed": confirmed, "failed": failed, "ledger_path": self.ledger_path}
+
+
+if __name__ == "__main__":
+    # Define the mint and recipients CSV here
+    mint = "ToXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    recipients_path = "recipients.csv"
+
+    try:
+        distributor = TokenDistributor(mint, recipients_path)
+        distributor.run()
+    except Exception as e:
+        print(f"Error: {str(e)}")
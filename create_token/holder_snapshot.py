@@ -0,0 +1,175 @@
+import os
+import csv
+import time
+import base64
+import base58
+import numpy as np
+from solders.pubkey import Pubkey
+from utils.solana_rpc import MAINNET_RPC_URL
+from utils.rpc_cache import CachingSolanaRPCClient, rpc_cache_db
+from create_token.token_program import TOKEN_2022_PROGRAM_ID, parse_mint
+
+# Token account layout: mint (0..32), owner (32..64), amount (64..72), ..., account type at 165 when extended
+OWNER_OFFSET = 32
+BASE_ACCOUNT_LENGTH = 165
+ACCOUNT_TYPE_ACCOUNT = 2
+# Only the owner and amount are fetched
+ACCOUNT_SLICE = {"offset": OWNER_OFFSET, "length": 40}
+ACCOUNT_DTYPE = np.dtype([("owner", "V32"), ("amount", "<u8")])
+COLUMNS = ["token_account", "owner", "amount", "ui_amount"]
+
+
+class CSVSnapshotWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, columns):
+        self.writer.writerows(zip(*(columns[name] for name in COLUMNS)))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSnapshotWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            ("token_account", pyarrow.string()),
+            ("owner", pyarrow.string()),
+            ("amount", pyarrow.uint64()),
+            ("ui_amount", pyarrow.string())
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, columns):
+        # One row group per chunk, so nothing accumulates in memory
+        self.writer.write_table(self.pyarrow.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class HolderSnapshot:
+    def __init__(self, mint, output_path, rpc_url=MAINNET_RPC_URL, shard_by_owner=True, include_empty=False,
+                 chunk_size=10000, rpc=None):
+        """
+        Export every Token-2022 account of a mint with its owner and balance.
+
+        Accounts are fetched with getProgramAccounts, filtered by mint on the node and
+        sliced down to owner + amount, decoded in bulk with numpy and streamed to CSV
+        (or Parquet, by extension) `chunk_size` rows at a time.
+
+        Args:
+            shard_by_owner (bool): Split the query into 256 by the owner's first byte, so no
+                                   single RPC response (held whole in memory while it's decoded)
+                                   holds more than a slice of the holders. Turn off to save
+                                   requests on mints small enough for one response.
+            include_empty (bool): Also export token accounts with a zero balance
+        """
+        self.mint = Pubkey.from_string(mint)
+        self.output_path = output_path
+        # A long timeout for the large getProgramAccounts responses
+        self.rpc = rpc or CachingSolanaRPCClient(rpc_url, timeout=300, db_path=rpc_cache_db())
+        self.shard_by_owner = shard_by_owner
+        self.include_empty = include_empty
+        self.chunk_size = chunk_size
+        self.decimals = None
+        self.stats = {"accounts": 0, "holders": 0, "total_amount": 0, "requests": 0}
+
+    def load_decimals(self):
+        account = self.rpc.get_account_info(str(self.mint))
+        if account is None or account["owner"] != str(TOKEN_2022_PROGRAM_ID):
+            raise ValueError(f"{self.mint} is not a Token-2022 mint")
+        self.decimals = parse_mint(account["data"])["decimals"]
+
+    def queries(self):
+        """
+        Filter sets covering every token account of the mint exactly once: plain 165-byte
+        accounts, and extended ones (account type byte 2 after the base layout)
+        """
+        mint_filter = {"memcmp": {"offset": 0, "bytes": str(self.mint)}}
+        kinds = [
+            {"dataSize": BASE_ACCOUNT_LENGTH},
+            {"memcmp": {"offset": BASE_ACCOUNT_LENGTH, "bytes": base58.b58encode(bytes([ACCOUNT_TYPE_ACCOUNT])).decode()}}
+        ]
+        shards = [None]
+        if self.shard_by_owner:
+            shards = [
+                {"memcmp": {"offset": OWNER_OFFSET, "bytes": base58.b58encode(bytes([value])).decode()}}
+                for value in range(256)
+            ]
+        for kind in kinds:
+            for shard in shards:
+                yield [mint_filter, kind] + ([shard] if shard else [])
+
+    def decode(self, accounts):
+        """
+        Columns for a list of getProgramAccounts results: the sliced data of all
+        accounts is decoded into one structured array
+        """
+        data = b"".join(base64.b64decode(account["account"]["data"][0]) for account in accounts)
+        records = np.frombuffer(data, dtype=ACCOUNT_DTYPE)
+        keep = np.arange(len(records)) if self.include_empty else np.flatnonzero(records["amount"])
+
+        amounts = records["amount"][keep]
+        scale = 10 ** self.decimals
+        whole, fraction = np.divmod(amounts, np.uint64(scale))
+        if self.decimals:
+            ui_amounts = [f"{w}.{f:0{self.decimals}d}".rstrip("0").rstrip(".") for w, f in zip(whole.tolist(), fraction.tolist())]
+        else:
+            ui_amounts = [str(w) for w in whole.tolist()]
+        return {
+            "token_account": [accounts[i]["pubkey"] for i in keep.tolist()],
+            "owner": [str(Pubkey(bytes(owner))) for owner in records["owner"][keep]],
+            "amount": amounts.tolist(),
+            "ui_amount": ui_amounts
+        }
+
+    def open_writer(self):
+        if os.path.splitext(self.output_path)[1].lower() == ".parquet":
+            return ParquetSnapshotWriter(self.output_path)
+        return CSVSnapshotWriter(self.output_path)
+
+    def run(self):
+        start = time.perf_counter()
+        self.load_decimals()
+        print(f"Exporting token accounts of {self.mint} to {self.output_path}...")
+        writer = self.open_writer()
+        try:
+            for filters in self.queries():
+                accounts = self.rpc.get_program_accounts(TOKEN_2022_PROGRAM_ID, filters=filters, data_slice=ACCOUNT_SLICE)
+                self.stats["requests"] += 1
+                self.stats["accounts"] += len(accounts)
+                for offset in range(0, len(accounts), self.chunk_size):
+                    columns = self.decode(accounts[offset:offset + self.chunk_size])
+                    self.stats["holders"] += len(columns["amount"])
+                    self.stats["total_amount"] += sum(columns["amount"])
+                    writer.write(columns)
+                # Drop the response before fetching the next shard
+                del accounts
+        finally:
+            writer.close()
+
+        print(f"Exported {self.stats['holders']} token accounts ({self.stats['accounts']} fetched, "
+              f"{self.stats['total_amount'] / 10 ** self.decimals} tokens) with {self.stats['requests']} requests "
+              f"in {time.perf_counter() - start:.1f}s")
+        if hasattr(self.rpc, "print_stats"):
+            self.rpc.print_stats()
+        return self.stats
+
+
+if __name__ == "__main__":
+    # Define the mint and output file here
+    mint = "ToXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+
+    try:
+        HolderSnapshot(mint, f"{mint}_holders.csv").run()
+    except Exception as e:
+        print(f"Error: {str(e)}")
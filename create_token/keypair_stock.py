@@ -0,0 +1,212 @@
+import os
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from solders.keypair import Keypair
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+DEFAULT_STOCK_PATH = "keypair_stock.sqlite3"
+PASSPHRASE_CHECK = b"keypair-stock"
+
+
+class KeypairStock:
+    def __init__(self, db_path=None, passphrase=None):
+        """
+        Encrypted on-disk inventory of pre-ground vanity keypairs.
+
+        Secret keys are sealed with AES-256-GCM under a key derived with scrypt from the
+        KEYPAIR_STOCK_PASSPHRASE in the .env file, with the public key as associated data.
+        A value sealed by the first process to open the stock is checked on every open, so a
+        wrong or rotated passphrase fails here instead of on a claim.
+        The database path defaults to KEYPAIR_STOCK_DB, then keypair_stock.sqlite3.
+        """
+        load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
+        self.db_path = db_path or os.getenv("KEYPAIR_STOCK_DB") or DEFAULT_STOCK_PATH
+        passphrase = passphrase or os.getenv("KEYPAIR_STOCK_PASSPHRASE")
+        if not passphrase:
+            raise ValueError("KEYPAIR_STOCK_PASSPHRASE not found in the .env file.")
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS keypairs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pattern TEXT NOT NULL,
+                    public_key TEXT NOT NULL UNIQUE,
+                    nonce BLOB NOT NULL,
+                    ciphertext BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS keypairs_pattern ON keypairs (pattern, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value BLOB NOT NULL)")
+            # First writer wins, so every process derives the key from the same salt
+            conn.execute("INSERT OR IGNORE INTO settings VALUES ('salt', ?)", (os.urandom(16),))
+            salt = conn.execute("SELECT value FROM settings WHERE name = 'salt'").fetchone()[0]
+
+        self.cipher = AESGCM(hashlib.scrypt(passphrase.encode(), salt=salt, n=2 ** 15, r=8, p=1,
+                                            maxmem=64 * 1024 * 1024, dklen=32))
+
+        with self._connection() as conn:
+            nonce = os.urandom(12)
+            conn.execute("INSERT OR IGNORE INTO settings VALUES ('check', ?)",
+                         (nonce + self.cipher.encrypt(nonce, PASSPHRASE_CHECK, b"check"),))
+            check = conn.execute("SELECT value FROM settings WHERE name = 'check'").fetchone()[0]
+        try:
+            self.cipher.decrypt(check[:12], check[12:], b"check")
+        except InvalidTag:
+            raise ValueError(f"KEYPAIR_STOCK_PASSPHRASE does not open the keypair stock {self.db_path}")
+
+    @classmethod
+    def open_default(cls):
+        """
+        The configured stock, or None when there is no stock database or passphrase
+        """
+        load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
+        db_path = os.getenv("KEYPAIR_STOCK_DB") or DEFAULT_STOCK_PATH
+        if not os.path.exists(db_path) or not os.getenv("KEYPAIR_STOCK_PASSPHRASE"):
+            return None
+        return cls(db_path)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def add(self, pattern, keypairs):
+        """
+        Encrypt and store keypairs ground for the given prefix pattern
+        """
+        rows = []
+        for keypair in keypairs:
+            public_key = str(keypair.pubkey())
+            nonce = os.urandom(12)
+            rows.append((pattern, public_key, nonce,
+                         self.cipher.encrypt(nonce, bytes(keypair), public_key.encode()), time.time()))
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO keypairs (pattern, public_key, nonce, ciphertext, created_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+        return len(rows)
+
+    @contextmanager
+    def claim(self, pattern):
+        """
+        Take one keypair for the pattern out of the stock, yielding it (or None if it's empty).
+
+        The row is read, decrypted and only deleted once the caller's block has saved the key,
+        all in one write transaction: no two runs get the same key, and a key that can't be
+        decrypted or a caller failing before it saved the key leaves the stock untouched.
+        """
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, public_key, nonce, ciphertext FROM keypairs WHERE pattern = ? ORDER BY id LIMIT 1",
+                    (pattern,)
+                ).fetchone()
+                if row is None:
+                    yield None
+                else:
+                    row_id, public_key, nonce, ciphertext = row
+                    keypair = Keypair.from_bytes(self.cipher.decrypt(nonce, ciphertext, public_key.encode()))
+                    if str(keypair.pubkey()) != public_key:
+                        raise ValueError(f"Stocked keypair {public_key} does not match its secret key")
+                    yield keypair
+                    conn.execute("DELETE FROM keypairs WHERE id = ?", (row_id,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def count(self, pattern):
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM keypairs WHERE pattern = ?", (pattern,)).fetchone()[0]
+
+    def counts(self):
+        with self._connection() as conn:
+            return dict(conn.execute("SELECT pattern, COUNT(*) FROM keypairs GROUP BY pattern").fetchall())
+
+
+class KeypairStocker:
+    def __init__(self, stock, targets, low_watermark=0.5, batch_size=10, poll_interval=5.0, command_runner=None):
+        """
+        Background process keeping `targets[pattern]` keypairs in stock per prefix pattern.
+        A pattern is refilled to its target once it falls to `low_watermark` of it,
+        grinding `batch_size` keypairs per `solana-keygen grind` run.
+        """
+        self.stock = stock
+        self.targets = targets
+        self.low_watermark = low_watermark
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.command_runner = command_runner or subprocess.run
+
+    def grind(self, pattern, count):
+        """
+        Grind keypairs in a private temporary directory and load them into memory
+        """
+        with tempfile.TemporaryDirectory(prefix="keygen-stock-") as directory:
+            self.command_runner(
+                ["solana-keygen", "grind", "--starts-with", f"{pattern}:{count}"],
+                cwd=directory, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            keypairs = []
+            for path in glob.glob(os.path.join(directory, f"{pattern}*.json")):
+                with open(path, 'r') as f:
+                    keypairs.append(Keypair.from_bytes(bytes(json.load(f))))
+                os.remove(path)
+            return keypairs
+
+    def refill(self, pattern):
+        """
+        Top the pattern up to its target when it is at or below the low watermark
+        """
+        target = self.targets[pattern]
+        stocked = self.stock.count(pattern)
+        if stocked > target * self.low_watermark:
+            return 0
+
+        added = 0
+        while stocked < target:
+            start = time.perf_counter()
+            keypairs = self.grind(pattern, min(self.batch_size, target - stocked))
+            self.stock.add(pattern, keypairs)
+            stocked = self.stock.count(pattern)
+            added += len(keypairs)
+            print(f"Ground {len(keypairs)} {pattern} keypairs in {time.perf_counter() - start:.1f}s "
+                  f"({stocked}/{target} in stock)")
+        return added
+
+    def run(self, once=False):
+        print(f"Keeping keypair stock {self.stock.db_path} at "
+              + ", ".join(f"{target} x {pattern}" for pattern, target in self.targets.items()))
+        while True:
+            for pattern in self.targets:
+                self.refill(pattern)
+            if once:
+                return self.stock.counts()
+            time.sleep(self.poll_interval)
+
+
+if __name__ == "__main__":
+    try:
+        KeypairStocker(KeypairStock(), {"To": 20}).run(once=True)
+    except Exception as e:
+        print(f"Error: {str(e)}")
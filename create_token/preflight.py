@@ -0,0 +1,192 @@
+import os
+import re
+from PIL import Image, UnidentifiedImageError
+from utils.solana_rpc import MAINNET_RPC_URL
+from utils.rpc_cache import shared_rpc_client
+from utils.convert_base58 import SolanaKeyConverter
+from create_token.token_program import load_keypair
+from pinata.upload_image_to_pinata_ifps import PINATA_GATEWAY_URL
+
+# Metadata field limits wallets and explorers expect (the Metaplex limits, which Token-2022 metadata follows)
+MAX_NAME_LENGTH = 32
+MAX_SYMBOL_LENGTH = 10
+MAX_URI_LENGTH = 200
+
+# Token-2022 mint with the MetadataPointer extension, as `spl-token create-token --enable-metadata` allocates it
+MINT_WITH_METADATA_POINTER_SIZE = 234
+# Token-2022 associated token account with the ImmutableOwner extension
+TOKEN_ACCOUNT_SIZE = 170
+# A CIDv1 in base32, as Pinata reports it
+CID_LENGTH = 59
+MINT_DECIMALS = 9
+MAX_SUPPLY = 2 ** 64 - 1
+
+LAMPORTS_PER_SIGNATURE = 5000
+# create-token (payer + mint keypair), create-account, initialize-metadata, 3 update-metadata, mint
+SIGNATURES_PER_TOKEN = 8
+
+SUPPORTED_IMAGE_FORMATS = {"JPEG", "PNG", "GIF", "WEBP", "BMP"}
+# The CLI commands pass name and symbol unquoted through a shell
+SHELL_SAFE = re.compile(r"[A-Za-z0-9_.\-]+")
+
+
+class PreflightError(ValueError):
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__("Preflight failed:\n" + "\n".join(f"  - {problem}" for problem in problems))
+
+
+def token_metadata_size(name, symbol, uri):
+    """
+    Bytes the TokenMetadata extension (TLV header included) adds to the mint account
+    """
+    fields = sum(4 + len(value.encode("utf-8")) for value in (name, symbol, uri))
+    return 4 + 32 + 32 + fields + 4
+
+
+class PreflightCheck:
+    def __init__(self, tokens, rpc_url=MAINNET_RPC_URL, wallet_address=None, gateway_base=PINATA_GATEWAY_URL,
+                 rpc=None, wallet_pool=None):
+        """
+        Validate a whole launch before anything is spent, and check the wallet can pay for it.
+
+        Args:
+            tokens (list): Token dicts with name, symbol, image_path, mint_amount and description
+                           (one for a single run, the manifest entries for a batch)
+            wallet_address (str): Fee payer, from solana_keypair.json or the .env key when None
+            gateway_base (str): Gateway the metadata URI will point at, for the URI length check
+            wallet_pool (WalletPool): Fee payer pool paying instead, checked with its treasury as a whole
+        """
+        self.tokens = tokens
+        self.rpc = rpc or shared_rpc_client(rpc_url)
+        self.wallet_address = wallet_address
+        self.gateway_base = gateway_base
+        self.wallet_pool = wallet_pool
+
+    def fee_payer(self):
+        if self.wallet_address is None:
+            if os.path.exists("solana_keypair.json"):
+                self.wallet_address = str(load_keypair("solana_keypair.json").pubkey())
+            else:
+                self.wallet_address = SolanaKeyConverter().public_key()
+        return self.wallet_address
+
+    def metadata_uri_estimate(self, token):
+        """
+        Longest metadata URI the upload can produce: a file inside a batch directory
+        """
+        return f"{self.gateway_base}/ipfs/{'b' * CID_LENGTH}/{token['name'].lower()}.json"
+
+    def probe_image(self, image_path):
+        """
+        Check the image from its header only, without decoding the pixel data
+        """
+        if not isinstance(image_path, str) or not os.path.isfile(image_path):
+            return [f"image not found at {image_path}"]
+        try:
+            with Image.open(image_path) as image:
+                image_format, (width, height) = image.format, image.size
+        except (UnidentifiedImageError, OSError) as e:
+            return [f"image {image_path} can't be read: {str(e)}"]
+
+        problems = []
+        if image_format not in SUPPORTED_IMAGE_FORMATS:
+            problems.append(f"image {image_path} is {image_format}, expected one of {', '.join(sorted(SUPPORTED_IMAGE_FORMATS))}")
+        if width < 1 or height < 1 or width * height > Image.MAX_IMAGE_PIXELS:
+            problems.append(f"image {image_path} has unsupported dimensions {width}x{height}")
+        return problems
+
+    def validate_token(self, token):
+        problems = []
+        for field, field_type, label in (("name", str, "a string"), ("symbol", str, "a string"),
+                                         ("description", str, "a string"), ("image_path", str, "a string"),
+                                         ("mint_amount", int, "an integer")):
+            if not isinstance(token.get(field), field_type) or isinstance(token.get(field), bool):
+                problems.append(f"'{field}' is required and must be {label}")
+        if problems:
+            return problems
+
+        for field, limit in (("name", MAX_NAME_LENGTH), ("symbol", MAX_SYMBOL_LENGTH)):
+            value = token[field]
+            if not SHELL_SAFE.fullmatch(value):
+                problems.append(f"{field} {value!r} must be one word of letters, digits, '_', '.' or '-'")
+            elif len(value.encode("utf-8")) > limit:
+                problems.append(f"{field} {value!r} is longer than {limit} bytes")
+
+        uri = self.metadata_uri_estimate(token)
+        if len(uri.encode("utf-8")) > MAX_URI_LENGTH:
+            problems.append(f"metadata URI would be {len(uri)} bytes, over the {MAX_URI_LENGTH} byte limit")
+
+        if token["mint_amount"] <= 0 or token["mint_amount"] * 10 ** MINT_DECIMALS > MAX_SUPPLY:
+            problems.append(f"mint_amount {token['mint_amount']} must be between 1 and {MAX_SUPPLY // 10 ** MINT_DECIMALS}")
+
+        problems += self.probe_image(token["image_path"])
+        return problems
+
+    def estimate_cost(self, token):
+        """
+        Lamports one token launch locks up as rent and pays in fees
+        """
+        mint_size = MINT_WITH_METADATA_POINTER_SIZE + token_metadata_size(
+            token["name"], token["symbol"], self.metadata_uri_estimate(token)
+        )
+        # Rent-exemption minimums are cached by the RPC client, so each size is fetched once
+        rent = (self.rpc.get_minimum_balance_for_rent_exemption(mint_size)
+                + self.rpc.get_minimum_balance_for_rent_exemption(TOKEN_ACCOUNT_SIZE))
+        fees = SIGNATURES_PER_TOKEN * LAMPORTS_PER_SIGNATURE
+        return {"rent": rent, "fees": fees, "total": rent + fees}
+
+    def run(self):
+        """
+        Check every token and the wallet in one pass, raising PreflightError listing
+        every problem found. Returns the cost estimate when all checks pass.
+        """
+        print(f"Running preflight checks for {len(self.tokens)} token(s)...")
+        problems = []
+        seen = {}
+        for index, token in enumerate(self.tokens):
+            label = f"token {index + 1} ({token.get('name')})" if isinstance(token, dict) else f"token {index + 1}"
+            if not isinstance(token, dict):
+                problems.append(f"{label}: must be a JSON object")
+                continue
+            problems += [f"{label}: {problem}" for problem in self.validate_token(token)]
+            # Artifacts and batch metadata files are named after the lowercased name
+            if isinstance(token.get("name"), str):
+                key = token["name"].lower()
+                if key in seen:
+                    problems.append(f"{label}: name clashes with token {seen[key] + 1}")
+                seen.setdefault(key, index)
+        if problems:
+            raise PreflightError(problems)
+
+        costs = [self.estimate_cost(token) for token in self.tokens]
+        total = {key: sum(cost[key] for cost in costs) for key in ("rent", "fees", "total")}
+        if self.wallet_pool is not None:
+            balance = self.wallet_pool.total_balance()
+            payer = f"fee payer pool of {len(self.wallet_pool.wallets)}" + (" and treasury" if self.wallet_pool.treasury else "")
+        else:
+            balance = self.rpc.get_balance(self.fee_payer())
+            payer = f"wallet {self.wallet_address}"
+        print(f"Estimated cost: {total['rent'] / 1e9:.6f} SOL rent + {total['fees'] / 1e9:.6f} SOL fees "
+              f"= {total['total'] / 1e9:.6f} SOL; {payer} holds {balance / 1e9:.6f} SOL")
+        if hasattr(self.rpc, "print_stats"):
+            self.rpc.print_stats()
+        if balance < total["total"]:
+            raise PreflightError([
+                f"{payer} holds {balance / 1e9:.6f} SOL but the launch needs {total['total'] / 1e9:.6f} SOL"
+            ])
+        return {"tokens": costs, "total": total, "balance": balance}
+
+
+if __name__ == "__main__":
+    try:
+        report = PreflightCheck([{
+            "name": "SampleToken",
+            "symbol": "SPT",
+            "image_path": "token_metadata/sampletoken1_image.jpeg",
+            "mint_amount": 1000000,
+            "description": "This is a test token"
+        }]).run()
+        print(f"Preflight passed: {report['total']}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,254 @@
+import os
+import glob
+import json
+import asyncio
+import tempfile
+from dataclasses import dataclass
+from solders.pubkey import Pubkey
+from create_token.token_program import TOKEN_2022_PROGRAM_ID, load_keypair, get_associated_token_address
+from utils.solana_rpc import MAINNET_RPC_URL
+
+# What a failed command's stderr means, for the errors callers recover from
+REASON_ACCOUNT_IN_USE = "account_in_use"
+REASON_ACCOUNT_EXISTS = "account_exists"
+REASON_EXTENSION_INITIALIZED = "extension_initialized"
+REASON_TIMED_OUT = "timed_out"
+
+
+def classify_error(stderr):
+    """
+    Failures are only reported as text, even with --output json
+    """
+    if "account Address" in stderr and "already in use" in stderr:
+        return REASON_ACCOUNT_IN_USE
+    if "Error: Account already exists:" in stderr:
+        return REASON_ACCOUNT_EXISTS
+    if "Error: Extension already initialized on this account" in stderr:
+        return REASON_EXTENSION_INITIALIZED
+    if stderr.startswith("Error: timed out after"):
+        return REASON_TIMED_OUT
+    return None
+
+
+class SplTokenError(Exception):
+    def __init__(self, argv, returncode, stderr):
+        self.argv = argv
+        self.returncode = returncode
+        self.stderr = stderr
+        self.reason = classify_error(stderr)
+        super().__init__(f"{' '.join(argv[:2])} exited with {returncode}: {stderr.strip()}")
+
+
+@dataclass(frozen=True)
+class CreatedToken:
+    address: str
+    decimals: int
+    # None when the mint already existed
+    signature: str = None
+
+
+@dataclass(frozen=True)
+class CreatedAccount:
+    address: str
+    # None when the account already existed
+    signature: str = None
+
+
+@dataclass(frozen=True)
+class LaunchedToken:
+    mint: str
+    account: str
+    signatures: tuple
+
+
+def transaction_signature(output):
+    """
+    Signature of a command's --output json result, whichever shape the command prints it in
+    """
+    data = output.get("transactionData") or output
+    return data.get("signature")
+
+
+async def exec_subprocess(argv, cwd=None, timeout=None):
+    """
+    Run argv without a shell and return (returncode, stdout, stderr)
+    """
+    process = await asyncio.create_subprocess_exec(
+        *argv, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return -9, "", f"Error: timed out after {timeout}s"
+    return process.returncode, stdout.decode(), stderr.decode()
+
+
+class SplTokenCLI:
+    def __init__(self, rpc_url=MAINNET_RPC_URL, keypair_path="solana_keypair.json", program_id=TOKEN_2022_PROGRAM_ID,
+                 max_concurrency=8, retries=5, retry_delay=5.0, timeout=120.0, exec_command=None, fee_payer_path=None):
+        """
+        Asyncio backend for the solana / spl-token CLIs, for runs that must keep using them.
+
+        Commands are argv lists run without a shell, many at once (up to `max_concurrency`).
+        Each one gets --url, --fee-payer and a private --config naming this runner's keypair,
+        so concurrent runners never touch the global `solana config`, and is parsed from
+        --output json into typed results.
+
+        The keypair is the mint authority, owner and update authority of every token, and is
+        passed as such explicitly. Only the fees and rent come from fee_payer_path when set.
+
+        Args:
+            exec_command: Coroutine function called as exec_command(argv, cwd) returning
+                          (returncode, stdout, stderr), eg. EmulatedSolanaCLI.exec_async for offline runs
+            fee_payer_path: Keypair paying for the transactions instead of the keypair
+        """
+        self.rpc_url = rpc_url
+        self.keypair_path = os.path.abspath(keypair_path)
+        self.fee_payer_path = os.path.abspath(fee_payer_path or keypair_path)
+        self.program_id = str(program_id)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.exec_command = exec_command
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.owner = str(load_keypair(self.keypair_path).pubkey())
+        self.config_path = self.write_config()
+
+    def write_config(self):
+        """
+        Private CLI config, so defaults like the mint authority come from this runner's keypair
+        """
+        fd, path = tempfile.mkstemp(prefix="spl-token-", suffix=".yml")
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"---\njson_rpc_url: \"{self.rpc_url}\"\nwebsocket_url: \"\"\n"
+                    f"keypair_path: \"{self.keypair_path}\"\naddress_labels: {{}}\ncommitment: confirmed\n")
+        return path
+
+    def close(self):
+        if self.config_path and os.path.exists(self.config_path):
+            os.remove(self.config_path)
+        self.config_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def execute(self, argv, cwd=None):
+        async with self.semaphore:
+            if self.exec_command:
+                return await self.exec_command(argv, cwd)
+            return await exec_subprocess(argv, cwd, self.timeout)
+
+    async def spl_token(self, *args, retry=True):
+        """
+        Run one spl-token command and return its parsed JSON output. Failures that are
+        part of the normal flow (the account already exists, ...) are raised straight away;
+        anything else is retried unless `retry` is False.
+        """
+        argv = [
+            "spl-token", *args,
+            "--program-id", self.program_id,
+            "--url", self.rpc_url,
+            "--config", self.config_path,
+            "--fee-payer", self.fee_payer_path,
+            "--output", "json"
+        ]
+        attempts = self.retries if retry else 1
+        for attempt in range(1, attempts + 1):
+            returncode, stdout, stderr = await self.execute(argv)
+            if returncode == 0:
+                return json.loads(stdout) if stdout.strip() else {}
+
+            error = SplTokenError(argv, returncode, stderr)
+            if (error.reason and error.reason != REASON_TIMED_OUT) or attempt == attempts:
+                raise error
+            print(f"spl-token {args[0]} attempt {attempt} failed, retrying in {self.retry_delay}s: {stderr.strip()}")
+            await asyncio.sleep(self.retry_delay)
+
+    async def grind_keypairs(self, prefix, count, directory):
+        """
+        Grind `count` vanity keypairs starting with `prefix` into `directory`, returning their paths
+        """
+        argv = ["solana-keygen", "grind", "--starts-with", f"{prefix}:{count}"]
+        returncode, stdout, stderr = await self.execute(argv, cwd=directory)
+        if returncode != 0:
+            raise SplTokenError(argv, returncode, stderr)
+        return sorted(glob.glob(os.path.join(directory, f"{prefix}*.json")))
+
+    async def create_token(self, mint_keypair_path, decimals=9, enable_metadata=True):
+        mint = str(load_keypair(mint_keypair_path).pubkey())
+        args = ["create-token", "--decimals", str(decimals), "--mint-authority", self.owner]
+        if enable_metadata:
+            args.append("--enable-metadata")
+        try:
+            output = await self.spl_token(*args, mint_keypair_path)
+        except SplTokenError as e:
+            if e.reason != REASON_ACCOUNT_IN_USE:
+                raise
+            print(f"Mint {mint} already exists. Proceeding with the next steps.")
+            return CreatedToken(mint, decimals)
+        return CreatedToken(output.get("address", mint), output.get("decimals", decimals), transaction_signature(output))
+
+    def token_account(self, mint):
+        return str(get_associated_token_address(Pubkey.from_string(self.owner), Pubkey.from_string(mint)))
+
+    async def create_account(self, mint):
+        address = self.token_account(mint)
+        try:
+            output = await self.spl_token("create-account", mint, "--owner", self.owner)
+        except SplTokenError as e:
+            if e.reason != REASON_ACCOUNT_EXISTS:
+                raise
+            print(f"Token account {address} already exists. Proceeding with the next steps.")
+            return CreatedAccount(address)
+        return CreatedAccount(output.get("address", address), transaction_signature(output))
+
+    async def initialize_metadata(self, mint, name, symbol, uri):
+        """
+        Signature of the initialization, or None when the mint already has metadata
+        """
+        try:
+            output = await self.spl_token("initialize-metadata", mint, name, symbol, uri,
+                                          "--mint-authority", self.keypair_path, "--update-authority", self.owner)
+        except SplTokenError as e:
+            if e.reason != REASON_EXTENSION_INITIALIZED:
+                raise
+            return None
+        return transaction_signature(output)
+
+    async def update_metadata(self, mint, field, value):
+        return transaction_signature(await self.spl_token("update-metadata", mint, field, value,
+                                                          "--authority", self.keypair_path))
+
+    async def mint(self, mint, amount):
+        """
+        Never retried: a mint that failed after sending its transaction (timed out, blockhash
+        expired or RPC error while confirming) may still land, and a second one would double
+        the supply. Check the supply before minting again by hand.
+        """
+        return transaction_signature(await self.spl_token("mint", mint, str(amount), self.token_account(mint),
+                                                          "--mint-authority", self.keypair_path, retry=False))
+
+    async def launch(self, mint_keypair_path, name, symbol, uri, amount, decimals=9):
+        """
+        Create a token with metadata and mint its supply. When the metadata was already
+        initialized by an earlier attempt, its fields are updated instead.
+        """
+        token = await self.create_token(mint_keypair_path, decimals)
+        account = await self.create_account(token.address)
+        signatures = [token.signature, account.signature]
+
+        signature = await self.initialize_metadata(token.address, name, symbol, uri)
+        if signature is None:
+            print(f"Metadata of {token.address} already initialized, updating its fields.")
+            for field, value in (("name", name), ("symbol", symbol), ("uri", uri)):
+                signatures.append(await self.update_metadata(token.address, field, value))
+        else:
+            signatures.append(signature)
+
+        signatures.append(await self.mint(token.address, amount))
+        return LaunchedToken(token.address, account.address, tuple(s for s in signatures if s))
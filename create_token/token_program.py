@@ -0,0 +1,189 @@
+import json
+import struct
+import hashlib
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.instruction import Instruction, AccountMeta
+
+TOKEN_2022_PROGRAM_ID = Pubkey.from_string("TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb")
+ASSOCIATED_TOKEN_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+SYSTEM_PROGRAM_ID = Pubkey.from_string("11111111111111111111111111111111")
+COMPUTE_BUDGET_PROGRAM_ID = Pubkey.from_string("ComputeBudget111111111111111111111111111111")
+ADDRESS_LOOKUP_TABLE_PROGRAM_ID = Pubkey.from_string("AddressLookupTab1e1111111111111111111111111")
+
+# Largest serialized transaction the network accepts, and the per-transaction compute cap
+PACKET_DATA_SIZE = 1232
+MAX_COMPUTE_UNITS = 1_400_000
+
+# Token-2022 instruction indexes
+TRANSFER_CHECKED = 12
+
+# Token-2022 extension layout: base account, account type byte, then type/length/value entries
+BASE_ACCOUNT_LENGTH = 165
+EXTENSION_TOKEN_METADATA = 19
+# Token metadata interface instructions are identified by the first 8 bytes of a hashed name
+UPDATE_FIELD_DISCRIMINATOR = hashlib.sha256(b"spl_token_metadata_interface:updating_field").digest()[:8]
+METADATA_FIELDS = {"name": 0, "symbol": 1, "uri": 2}
+
+
+def load_keypair(path="solana_keypair.json"):
+    """
+    Load a keypair from a Solana CLI style JSON byte array, eg. solana_keypair.json
+    """
+    with open(path, 'r') as f:
+        return Keypair.from_bytes(bytes(json.load(f)))
+
+
+def get_associated_token_address(owner, mint, token_program=TOKEN_2022_PROGRAM_ID):
+    address, _ = Pubkey.find_program_address(
+        [bytes(owner), bytes(token_program), bytes(mint)],
+        ASSOCIATED_TOKEN_PROGRAM_ID
+    )
+    return address
+
+
+def create_associated_token_account_idempotent(payer, owner, mint, token_program=TOKEN_2022_PROGRAM_ID):
+    """
+    Create the owner's associated token account, succeeding if it already exists
+    """
+    return Instruction(
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+        bytes([1]),
+        [
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(get_associated_token_address(owner, mint, token_program), is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=False, is_writable=False),
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(token_program, is_signer=False, is_writable=False),
+        ]
+    )
+
+
+def transfer_checked(source, mint, destination, owner, amount, decimals, token_program=TOKEN_2022_PROGRAM_ID):
+    return Instruction(
+        token_program,
+        struct.pack("<BQB", TRANSFER_CHECKED, amount, decimals),
+        [
+            AccountMeta(source, is_signer=False, is_writable=True),
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(destination, is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=True, is_writable=False),
+        ]
+    )
+
+
+def set_compute_unit_limit(units):
+    return Instruction(COMPUTE_BUDGET_PROGRAM_ID, struct.pack("<BI", 2, units), [])
+
+
+def set_compute_unit_price(micro_lamports):
+    return Instruction(COMPUTE_BUDGET_PROGRAM_ID, struct.pack("<BQ", 3, micro_lamports), [])
+
+
+def create_lookup_table(authority, payer, recent_slot):
+    """
+    Returns (instruction, lookup table address)
+    """
+    table, bump = Pubkey.find_program_address(
+        [bytes(authority), struct.pack("<Q", recent_slot)],
+        ADDRESS_LOOKUP_TABLE_PROGRAM_ID
+    )
+    instruction = Instruction(
+        ADDRESS_LOOKUP_TABLE_PROGRAM_ID,
+        struct.pack("<IQB", 0, recent_slot, bump),
+        [
+            AccountMeta(table, is_signer=False, is_writable=True),
+            AccountMeta(authority, is_signer=True, is_writable=False),
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+        ]
+    )
+    return instruction, table
+
+
+def extend_lookup_table(table, authority, payer, addresses):
+    return Instruction(
+        ADDRESS_LOOKUP_TABLE_PROGRAM_ID,
+        struct.pack("<IQ", 2, len(addresses)) + b"".join(bytes(address) for address in addresses),
+        [
+            AccountMeta(table, is_signer=False, is_writable=True),
+            AccountMeta(authority, is_signer=True, is_writable=False),
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+        ]
+    )
+
+
+def parse_mint(data):
+    """
+    Decode the base Mint layout shared by Token and Token-2022
+    """
+    authority_option, authority, supply, decimals, initialized = struct.unpack_from("<I32sQBB", data, 0)
+    return {
+        "mint_authority": Pubkey(authority) if authority_option else None,
+        "supply": supply,
+        "decimals": decimals,
+        "is_initialized": bool(initialized)
+    }
+
+
+def _borsh_string(value):
+    encoded = value.encode("utf-8")
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+def update_metadata_field(mint, update_authority, field, value, token_program=TOKEN_2022_PROGRAM_ID):
+    """
+    Token metadata interface UpdateField for metadata stored in the mint itself. Fields other
+    than name, symbol and uri are additional metadata keys. The instruction reallocates the
+    mint but doesn't pay for it: the mint must already hold the rent for its new size.
+    """
+    if field in METADATA_FIELDS:
+        encoded_field = bytes([METADATA_FIELDS[field]])
+    else:
+        encoded_field = bytes([3]) + _borsh_string(field)
+    return Instruction(
+        token_program,
+        UPDATE_FIELD_DISCRIMINATOR + encoded_field + _borsh_string(value),
+        [
+            AccountMeta(mint, is_signer=False, is_writable=True),
+            AccountMeta(update_authority, is_signer=True, is_writable=False),
+        ]
+    )
+
+
+def parse_token_metadata(data):
+    """
+    Decode the TokenMetadata extension of a Token-2022 mint, or None when it has none
+    """
+    offset = BASE_ACCOUNT_LENGTH + 1
+    while offset + 4 <= len(data):
+        extension_type, length = struct.unpack_from("<HH", data, offset)
+        offset += 4
+        if extension_type == EXTENSION_TOKEN_METADATA:
+            value = data[offset:offset + length]
+            update_authority, mint = value[:32], value[32:64]
+            position = 64
+
+            def read_string():
+                nonlocal position
+                (size,) = struct.unpack_from("<I", value, position)
+                position += 4 + size
+                return value[position - size:position].decode("utf-8")
+
+            name, symbol, uri = read_string(), read_string(), read_string()
+            (count,) = struct.unpack_from("<I", value, position)
+            position += 4
+            additional = [(read_string(), read_string()) for _ in range(count)]
+            return {
+                "update_authority": Pubkey(update_authority) if any(update_authority) else None,
+                "mint": Pubkey(mint),
+                "name": name,
+                "symbol": symbol,
+                "uri": uri,
+                "additional_metadata": additional,
+                "length": length
+            }
+        offset += length
+    return None
@@ -0,0 +1,256 @@
+import os
+import csv
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.message import MessageV0
+from solders.transaction import VersionedTransaction
+from solders.system_program import transfer, TransferParams
+from utils.solana_rpc import SolanaRPCError, MAINNET_RPC_URL
+from utils.rpc_cache import shared_rpc_client
+from create_token.token_program import (
+    TOKEN_2022_PROGRAM_ID, PACKET_DATA_SIZE, load_keypair, update_metadata_field, parse_token_metadata,
+    set_compute_unit_price
+)
+from create_token.preflight import MAX_NAME_LENGTH, MAX_SYMBOL_LENGTH, MAX_URI_LENGTH
+
+FIELD_LIMITS = {"name": MAX_NAME_LENGTH, "symbol": MAX_SYMBOL_LENGTH, "uri": MAX_URI_LENGTH}
+# Times a token is re-diffed and resent after its transaction expired unconfirmed
+MAX_ATTEMPTS = 3
+
+
+def metadata_field_size(key, value):
+    return 4 + len(key.encode("utf-8")) + 4 + len(value.encode("utf-8"))
+
+
+class BulkMetadataUpdater:
+    def __init__(self, mapping_path, keypair_path="solana_keypair.json", rpc_url=MAINNET_RPC_URL, ledger_path=None,
+                 max_workers=8, priority_fee=0, poll_interval=2.0, dry_run=False):
+        """
+        Update the on-chain metadata of many existing tokens, eg. to rotate gateways or rebrand.
+
+        Each token's current metadata is diffed against the mapping and all of its changed
+        fields are sent as one transaction (topping up the mint's rent first when the
+        metadata grows). Tokens are updated in parallel and every outcome is appended to a
+        ledger, so an interrupted run resumes where it stopped.
+
+        Args:
+            mapping_path (str): JSON object of mint -> {field: value}, or a CSV with a mint column
+                                and one column per field (empty cells are left unchanged)
+            keypair_path (str): Fee payer and update authority of the tokens
+            ledger_path (str): Resumable per-mint ledger (JSON lines), next to the mapping by default
+            max_workers (int): Tokens updated at once
+            dry_run (bool): Only print the changes
+        """
+        self.mapping_path = mapping_path
+        self.keypair = load_keypair(keypair_path)
+        self.authority = self.keypair.pubkey()
+        self.rpc = shared_rpc_client(rpc_url)
+        self.ledger_path = ledger_path or f"{mapping_path}.ledger.jsonl"
+        self.max_workers = max_workers
+        self.priority_fee = priority_fee
+        self.poll_interval = poll_interval
+        self.dry_run = dry_run
+        self.ledger_lock = threading.Lock()
+
+    def load_mapping(self):
+        """
+        Read and validate the target fields per mint
+        """
+        if self.mapping_path.lower().endswith(".csv"):
+            with open(self.mapping_path, newline='') as f:
+                rows = list(csv.DictReader(f))
+            mapping = {}
+            for line_number, row in enumerate(rows, start=2):
+                mint = (row.pop("mint", None) or "").strip()
+                if not mint:
+                    raise ValueError(f"Line {line_number}: missing mint")
+                if mint in mapping:
+                    raise ValueError(f"Line {line_number}: duplicate mint {mint}")
+                mapping[mint] = {field: value.strip() for field, value in row.items() if field and value and value.strip()}
+        else:
+            with open(self.mapping_path, 'r') as f:
+                mapping = json.load(f)
+            if not isinstance(mapping, dict):
+                raise ValueError(f"Mapping at {self.mapping_path} must be a JSON object of mint -> fields")
+
+        for mint, fields in mapping.items():
+            Pubkey.from_string(mint)
+            if not isinstance(fields, dict) or not all(isinstance(value, str) for value in fields.values()):
+                raise ValueError(f"{mint}: fields must be an object of string values")
+            for field, limit in FIELD_LIMITS.items():
+                if field in fields and len(fields[field].encode("utf-8")) > limit:
+                    raise ValueError(f"{mint}: {field} is longer than {limit} bytes")
+        return mapping
+
+    def load_ledger(self):
+        """
+        Latest ledger entry per mint
+        """
+        ledger = {}
+        if os.path.exists(self.ledger_path):
+            with open(self.ledger_path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        ledger[entry["mint"]] = entry
+        return ledger
+
+    def record(self, mint, fields, status, signature=None, last_valid_block_height=None, error=None):
+        with self.ledger_lock, open(self.ledger_path, 'a') as f:
+            f.write(json.dumps({
+                "mint": mint,
+                "fields": fields,
+                "status": status,
+                "signature": signature,
+                "last_valid_block_height": last_valid_block_height,
+                "error": error,
+                "time": time.time()
+            }) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, mint, fields, entry):
+        """
+        Whether the ledger shows this exact update already landed
+        """
+        if entry is None or entry["fields"] != fields:
+            return False
+        if entry["status"] in ("confirmed", "unchanged"):
+            return True
+        if entry["status"] == "sent":
+            status = self.rpc.get_signature_statuses([entry["signature"]])[0]
+            if status and status.get("confirmationStatus") in ("confirmed", "finalized") and not status.get("err"):
+                self.record(mint, fields, "confirmed", entry["signature"])
+                return True
+        # Anything else is re-diffed against the chain, which makes resending safe
+        return False
+
+    def diff(self, mint, fields):
+        """
+        Current account and the (field, value) changes still needed
+        """
+        account = self.rpc.get_account_info(mint)
+        if account is None or account["owner"] != str(TOKEN_2022_PROGRAM_ID):
+            raise ValueError("not a Token-2022 mint")
+        metadata = parse_token_metadata(account["data"])
+        if metadata is None:
+            raise ValueError("the mint has no metadata to update")
+        if metadata["update_authority"] != self.authority:
+            raise ValueError(f"update authority is {metadata['update_authority']}, not {self.authority}")
+
+        additional = dict(metadata["additional_metadata"])
+        changes = []
+        for field, value in fields.items():
+            current = metadata[field] if field in FIELD_LIMITS else additional.get(field)
+            if current != value:
+                changes.append((field, current, value))
+        return account, changes
+
+    def rent_top_up(self, account, changes):
+        """
+        Lamports the mint needs for the metadata's new size
+        """
+        growth = 0
+        for field, current, value in changes:
+            if field in FIELD_LIMITS:
+                growth += len(value.encode("utf-8")) - len(current.encode("utf-8"))
+            else:
+                growth += metadata_field_size(field, value) - (metadata_field_size(field, current) if current is not None else 0)
+        if growth <= 0:
+            return 0
+        needed = self.rpc.get_minimum_balance_for_rent_exemption(len(account["data"]) + growth)
+        return max(0, needed - account["lamports"])
+
+    def build_transaction(self, mint, account, changes, blockhash):
+        mint_key = Pubkey.from_string(mint)
+        instructions = []
+        if self.priority_fee:
+            instructions.append(set_compute_unit_price(self.priority_fee))
+        top_up = self.rent_top_up(account, changes)
+        if top_up:
+            instructions.append(transfer(TransferParams(from_pubkey=self.authority, to_pubkey=mint_key, lamports=top_up)))
+        for field, _, value in changes:
+            instructions.append(update_metadata_field(mint_key, self.authority, field, value))
+        message = MessageV0.try_compile(self.authority, instructions, [], blockhash)
+        transaction = VersionedTransaction(message, [self.keypair])
+        if len(bytes(transaction)) > PACKET_DATA_SIZE:
+            raise ValueError(f"{len(changes)} field changes don't fit in one transaction")
+        return transaction
+
+    def wait_for(self, signature, last_valid):
+        """
+        Poll until the transaction is confirmed (True), failed (raises) or expired (False)
+        """
+        while True:
+            time.sleep(self.poll_interval)
+            status = self.rpc.get_signature_statuses([signature])[0]
+            if status and status.get("err"):
+                raise ValueError(f"transaction {signature} failed: {json.dumps(status['err'])}")
+            if status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                return True
+            if status is None and self.rpc.get_block_height() > last_valid:
+                return False
+
+    def update_token(self, mint, fields):
+        """
+        Diff, send and confirm one token's update, returning its final status
+        """
+        try:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                account, changes = self.diff(mint, fields)
+                if not changes:
+                    self.record(mint, fields, "unchanged")
+                    return "unchanged"
+                summary = ", ".join(f"{field}: {current!r} -> {value!r}" for field, current, value in changes)
+                if self.dry_run:
+                    print(f"{mint}: {summary}")
+                    return "planned"
+
+                latest = self.rpc.get_latest_blockhash()
+                transaction = self.build_transaction(mint, account, changes, Hash.from_string(latest["blockhash"]))
+                signature = str(transaction.signatures[0])
+                # Recorded before it leaves, so a crash can't lose track of it
+                self.record(mint, fields, "sent", signature, latest["lastValidBlockHeight"])
+                self.rpc.send_transaction(transaction)
+                if self.wait_for(signature, latest["lastValidBlockHeight"]):
+                    self.record(mint, fields, "confirmed", signature)
+                    print(f"{mint}: {summary} ({signature})")
+                    return "confirmed"
+                print(f"{mint}: transaction {signature} expired (attempt {attempt}/{MAX_ATTEMPTS})")
+            raise ValueError(f"not confirmed after {MAX_ATTEMPTS} attempts")
+        except (ValueError, SolanaRPCError) as e:
+            self.record(mint, fields, "failed", error=str(e))
+            print(f"{mint}: failed: {str(e)}")
+            return "failed"
+
+    def run(self):
+        mapping = self.load_mapping()
+        ledger = self.load_ledger()
+        todo = [(mint, fields) for mint, fields in mapping.items() if not self.is_done(mint, fields, ledger.get(mint))]
+        print(f"{len(mapping)} tokens: {len(mapping) - len(todo)} already done, {len(todo)} to check")
+
+        start = time.perf_counter()
+        counts = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for status in executor.map(lambda item: self.update_token(*item), todo):
+                counts[status] = counts.get(status, 0) + 1
+
+        print(f"\nMetadata update finished in {time.perf_counter() - start:.1f}s: "
+              + (", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "nothing to do")
+              + f". Ledger: {self.ledger_path}")
+        self.rpc.print_stats()
+        return counts
+
+
+if __name__ == "__main__":
+    # Define the mapping file here
+    mapping_path = "metadata_updates.json"
+
+    try:
+        BulkMetadataUpdater(mapping_path).run()
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,304 @@
+import os
+import glob
+import json
+import time
+import shutil
+import tempfile
+import threading
+import base58
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.transaction import VersionedTransaction
+from solders.system_program import transfer, TransferParams
+from utils.solana_rpc import SolanaRPCClient, SolanaRPCError, MAINNET_RPC_URL
+from create_token.token_program import load_keypair
+
+LAMPORTS_PER_SOL = 1_000_000_000
+STRATEGIES = ("least-in-flight", "balance")
+
+
+class WalletPoolError(Exception):
+    pass
+
+
+class PooledWallet:
+    """
+    One fee payer of a pool, with its last known balance and throughput counters
+    """
+    def __init__(self, keypair, keypair_path):
+        self.keypair = keypair
+        self.address = str(keypair.pubkey())
+        self.keypair_path = keypair_path
+        self.balance = 0
+        self.initial_balance = None
+        self.in_flight = 0
+        self.topping_up = False
+        self.jobs = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.topped_up = 0
+
+
+class WalletPool:
+    def __init__(self, keypairs, keypair_paths=None, rpc_url=MAINNET_RPC_URL, strategy="least-in-flight",
+                 treasury=None, job_cost=int(0.01 * LAMPORTS_PER_SOL), top_up_below=int(0.05 * LAMPORTS_PER_SOL),
+                 top_up_amount=int(0.25 * LAMPORTS_PER_SOL), poll_interval=2.0, rpc=None, key_directory=None):
+        """
+        Pool of fee-payer keypairs shared by parallel launches.
+
+        The keypairs are loaded once and held in memory. The CLIs only take a --fee-payer
+        signer as a keypair file (or a hardware wallet or prompt URI), never as a key on the
+        command line or in the environment, so keys that don't come from a file need one.
+        They are written to `key_directory` and reused from there by later runs, or, without
+        one, to a private temporary directory removed by close(). Each job acquires a wallet:
+        - "least-in-flight" picks the wallet running the fewest jobs
+        - "balance" picks the wallet with the most SOL left after its running jobs
+        Either way a wallet is only picked if it can cover `job_cost` lamports for every job
+        it runs. When no wallet can, acquire() waits for a running job or a top-up to finish.
+
+        With a treasury keypair, a wallet whose balance drops below `top_up_below` is sent
+        `top_up_amount` lamports in the background.
+
+        Args:
+            keypairs (list): Fee payer Keypairs
+            keypair_paths (list): Keypair file of each fee payer, or None to write one
+            key_directory (str): Persistent directory for the keypair files written
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown wallet selection strategy: {strategy}")
+        self.rpc = rpc or SolanaRPCClient(rpc_url)
+        self.strategy = strategy
+        self.treasury = treasury
+        self.job_cost = job_cost
+        self.top_up_below = top_up_below
+        self.top_up_amount = top_up_amount
+        self.poll_interval = poll_interval
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="wallet-top-up")
+        self.key_directory = key_directory
+        self.temporary_key_directory = False
+        self.loaded = False
+        # Throughput is measured from the first assignment, not from loading the keys
+        self.started_at = None
+
+        self.wallets = []
+        seen = set()
+        for keypair, path in zip(keypairs, keypair_paths or [None] * len(keypairs)):
+            address = str(keypair.pubkey())
+            if address in seen:
+                continue
+            if treasury is not None and address == str(treasury.pubkey()):
+                raise ValueError(f"Treasury {address} can't also be a fee payer of the pool")
+            seen.add(address)
+            self.wallets.append(PooledWallet(keypair, os.path.abspath(path) if path else self.write_keypair(keypair)))
+        if not self.wallets:
+            raise ValueError("The wallet pool needs at least one fee payer keypair")
+
+    @classmethod
+    def from_env(cls, treasury_path=None, **kwargs):
+        """
+        Pool of the comma-separated base58 keys in FEE_PAYER_PRIVATE_KEYS (WALLET_PRIVATE_KEY
+        alone when unset), topped up from treasury_path or else TREASURY_PRIVATE_KEY when set,
+        all from the .env file. Their keypair files are kept in FEE_PAYER_KEY_DIR when set.
+        """
+        load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
+        if kwargs.get("key_directory") is None and os.getenv("FEE_PAYER_KEY_DIR"):
+            kwargs["key_directory"] = os.getenv("FEE_PAYER_KEY_DIR")
+        keys = os.getenv("FEE_PAYER_PRIVATE_KEYS") or os.getenv("WALLET_PRIVATE_KEY")
+        if not keys:
+            raise ValueError("FEE_PAYER_PRIVATE_KEYS not found in the .env file.")
+        keypairs = [Keypair.from_bytes(base58.b58decode(key.strip())) for key in keys.split(",") if key.strip()]
+        if treasury_path:
+            kwargs["treasury"] = load_keypair(treasury_path)
+        elif os.getenv("TREASURY_PRIVATE_KEY"):
+            kwargs["treasury"] = Keypair.from_bytes(base58.b58decode(os.getenv("TREASURY_PRIVATE_KEY").strip()))
+        return cls(keypairs, **kwargs)
+
+    @classmethod
+    def from_paths(cls, paths, treasury_path=None, **kwargs):
+        """
+        Pool of keypair JSON files; directories contribute every *.json file in them
+        """
+        files = []
+        for path in paths:
+            files += sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+        if treasury_path:
+            kwargs["treasury"] = load_keypair(treasury_path)
+        return cls([load_keypair(path) for path in files], keypair_paths=files, **kwargs)
+
+    def write_keypair(self, keypair):
+        """
+        Owner-only keypair file for the CLIs, left as it is when a previous run already wrote it
+        """
+        if self.key_directory is None:
+            self.key_directory = tempfile.mkdtemp(prefix="fee-payers-")
+            self.temporary_key_directory = True
+        os.makedirs(self.key_directory, mode=0o700, exist_ok=True)
+        path = os.path.join(self.key_directory, f"{keypair.pubkey()}.json")
+        try:
+            if bytes(load_keypair(path)) == bytes(keypair) and os.stat(path).st_mode & 0o077 == 0:
+                return path
+        except (OSError, ValueError, TypeError):
+            pass
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            os.fchmod(f.fileno(), 0o600)
+            json.dump(list(bytes(keypair)), f)
+        return path
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.temporary_key_directory:
+            shutil.rmtree(self.key_directory, ignore_errors=True)
+            self.key_directory = None
+            self.temporary_key_directory = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- balances ---
+
+    def refresh_balances(self):
+        balances = [self.rpc.get_balance(wallet.address) for wallet in self.wallets]
+        with self.condition:
+            for wallet, balance in zip(self.wallets, balances):
+                wallet.balance = balance
+                if wallet.initial_balance is None:
+                    wallet.initial_balance = balance
+                self.schedule_top_up(wallet)
+            self.loaded = True
+            self.condition.notify_all()
+
+    def total_balance(self):
+        """
+        SOL the pool can spend, including what the treasury can still top up. Read-only, so
+        a preflight never sends top-ups: those start with the first acquire()
+        """
+        total = sum(self.rpc.get_balance(wallet.address) for wallet in self.wallets)
+        if self.treasury is not None:
+            total += self.rpc.get_balance(str(self.treasury.pubkey()))
+        return total
+
+    def schedule_top_up(self, wallet):
+        """
+        Start a background top-up of the wallet when it runs low. Called with the condition held.
+        """
+        if self.treasury is None or wallet.topping_up or wallet.balance >= self.top_up_below:
+            return
+        wallet.topping_up = True
+        self.executor.submit(self.top_up, wallet)
+
+    def top_up(self, wallet):
+        try:
+            latest = self.rpc.get_latest_blockhash()
+            message = MessageV0.try_compile(
+                self.treasury.pubkey(),
+                [transfer(TransferParams(from_pubkey=self.treasury.pubkey(), to_pubkey=wallet.keypair.pubkey(),
+                                         lamports=self.top_up_amount))],
+                [],
+                Hash.from_string(latest["blockhash"])
+            )
+            signature = str(self.rpc.send_transaction(VersionedTransaction(message, [self.treasury])))
+            while True:
+                status = self.rpc.get_signature_statuses([signature])[0]
+                if status and status.get("err"):
+                    raise WalletPoolError(f"transaction {signature} failed: {json.dumps(status['err'])}")
+                if status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                    break
+                if status is None and self.rpc.get_block_height() > latest["lastValidBlockHeight"]:
+                    raise WalletPoolError(f"transaction {signature} expired")
+                time.sleep(self.poll_interval)
+            balance = self.rpc.get_balance(wallet.address)
+            with self.condition:
+                wallet.topped_up += self.top_up_amount
+                wallet.balance = balance
+            print(f"Topped up fee payer {wallet.address} with {self.top_up_amount / LAMPORTS_PER_SOL} SOL ({signature})")
+        except (WalletPoolError, SolanaRPCError, ValueError) as e:
+            print(f"Warning: Could not top up fee payer {wallet.address}: {str(e)}")
+        finally:
+            with self.condition:
+                wallet.topping_up = False
+                self.condition.notify_all()
+
+    # --- assignment ---
+
+    def select(self):
+        """
+        Wallet for the next job under the strategy, or None when none can pay. Called with the condition held.
+        """
+        candidates = [wallet for wallet in self.wallets
+                      if wallet.balance - (wallet.in_flight + 1) * self.job_cost >= 0]
+        if not candidates:
+            return None
+        if self.strategy == "balance":
+            return max(candidates, key=lambda wallet: wallet.balance - wallet.in_flight * self.job_cost)
+        return min(candidates, key=lambda wallet: (wallet.in_flight, wallet.jobs, -wallet.balance))
+
+    def acquire(self):
+        """
+        Assign a fee payer to a job, waiting while every wallet is busy spending or being topped up
+        """
+        if not self.loaded:
+            self.refresh_balances()
+        with self.condition:
+            while True:
+                wallet = self.select()
+                if wallet is not None:
+                    break
+                if not any(wallet.in_flight or wallet.topping_up for wallet in self.wallets):
+                    raise WalletPoolError(
+                        f"No fee payer of the pool holds {self.job_cost / LAMPORTS_PER_SOL} SOL for another job"
+                        + ("" if self.treasury is not None else " (no treasury to top them up)")
+                    )
+                self.condition.wait()
+            wallet.in_flight += 1
+            wallet.jobs += 1
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            return wallet
+
+    def release(self, wallet, elapsed, success=True):
+        try:
+            balance = self.rpc.get_balance(wallet.address)
+        except Exception as e:
+            print(f"Warning: Could not fetch fee payer {wallet.address} balance: {str(e)}")
+            balance = wallet.balance - self.job_cost
+        with self.condition:
+            wallet.in_flight -= 1
+            wallet.busy_seconds += elapsed
+            if not success:
+                wallet.failures += 1
+            wallet.balance = balance
+            self.schedule_top_up(wallet)
+            self.condition.notify_all()
+
+    @contextmanager
+    def wallet(self):
+        """
+        Fee payer for the duration of one job
+        """
+        wallet = self.acquire()
+        start = time.perf_counter()
+        success = False
+        try:
+            yield wallet
+            success = True
+        finally:
+            self.release(wallet, time.perf_counter() - start, success)
+
+    def print_stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        print(f"\nFee payer pool ({self.strategy}, {len(self.wallets)} wallets, {elapsed:.1f}s):")
+        for wallet in self.wallets:
+            spent = (wallet.initial_balance or 0) + wallet.topped_up - wallet.balance
+            average = f"{wallet.busy_seconds / wallet.jobs:.1f}s" if wallet.jobs else "-"
+            print(f"  {wallet.address}: {wallet.jobs} jobs ({wallet.failures} failed), "
+                  f"{wallet.jobs / elapsed * 60 if elapsed else 0:.1f} jobs/min, avg {average}, spent {spent / LAMPORTS_PER_SOL:.6f} SOL, "
+                  f"topped up {wallet.topped_up / LAMPORTS_PER_SOL} SOL, balance {wallet.balance / LAMPORTS_PER_SOL:.6f} SOL")
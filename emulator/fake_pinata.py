@@ -0,0 +1,133 @@
+import json
+import threading
+from email import policy
+from email.parser import BytesParser
+from datetime import datetime, timezone
+from pinata.car_exporter import CARExporter
+from pinata.ipfs_cid import cid_to_string
+from emulator.http_server import BackgroundHTTPServer, EmulatorRequestHandler
+
+
+def parse_multipart(content_type, body):
+    """
+    Split a multipart/form-data body into (form fields, [(filename, content)])
+    """
+    message = BytesParser(policy=policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields, files = {}, []
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        filename = part.get_filename()
+        content = part.get_payload(decode=True) or b""
+        if filename is not None:
+            files.append((filename, content))
+        else:
+            fields[name] = content.decode("utf-8")
+    return fields, files
+
+
+class FakePinataRequestHandler(EmulatorRequestHandler):
+    def authorized(self):
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self.send_body(401, {"error": {"reason": "NO_CREDENTIALS_FOUND"}})
+            return False
+        return True
+
+    def handle_post(self):
+        if not self.authorized():
+            return self.read_body()
+        body = self.read_body()
+        if self.path == "/pinning/pinFileToIPFS":
+            fields, files = parse_multipart(self.headers.get("Content-Type", ""), body)
+            if not files:
+                return self.send_body(400, {"error": "Invalid request format."})
+            return self.send_body(200, self.service.pin_files(files, fields))
+        if self.path == "/pinning/pinJSONToIPFS":
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return self.send_body(400, {"error": "Invalid JSON"})
+            return self.send_body(200, self.service.pin_json(payload.get("pinataContent")))
+        self.send_body(404, {"error": "Not found"})
+
+    def handle_get(self):
+        if self.path == "/data/testAuthentication":
+            if self.authorized():
+                self.send_body(200, {"message": "Congratulations! You are communicating with the Pinata API!"})
+            return
+        if self.path.startswith("/ipfs/"):
+            content = self.service.get(self.path[len("/ipfs/"):])
+            if content is None:
+                return self.send_body(404, {"error": "Not found"}, "application/json")
+            return self.send_body(200, content, "application/octet-stream")
+        self.send_body(404, {"error": "Not found"})
+
+
+class FakePinataServer(BackgroundHTTPServer):
+    handler_class = FakePinataRequestHandler
+
+    def __init__(self, host="127.0.0.1", port=0, faults=None):
+        """
+        Local stand-in for the Pinata pinning API and its gateway.
+
+        Accepts the pinFileToIPFS (single files and `directory/file` uploads) and
+        pinJSONToIPFS requests our uploaders send, computes the real CIDv1 with the same
+        UnixFS layout as CARExporter, and serves pinned content under /ipfs/<cid>[/<name>]
+        so gateway warm-up and verification can run against it. Unlike Pinata it always
+        answers with CIDv1, whatever cidVersion was asked for.
+        """
+        super().__init__(host, port, faults)
+        self.lock = threading.Lock()
+        self.files = {}
+        self.directories = {}
+        self.pin_count = 0
+
+    def _result(self, cid, size):
+        with self.lock:
+            self.pin_count += 1
+        return {
+            "IpfsHash": cid,
+            "PinSize": size,
+            "Timestamp": datetime.now(timezone.utc).isoformat(),
+            "isDuplicate": False
+        }
+
+    def _add_file(self, content):
+        cid, _, size = CARExporter().add_bytes(content)
+        cid = cid_to_string(cid)
+        with self.lock:
+            self.files[cid] = content
+        return cid, size
+
+    def pin_files(self, files, fields):
+        # Every part of a directory upload shares the "<directory>/" filename prefix
+        if len(files) == 1 and "/" not in files[0][0]:
+            cid, size = self._add_file(files[0][1])
+            return self._result(cid, size)
+
+        contents = {filename.split("/", 1)[-1]: content for filename, content in files}
+        cid = CARExporter().add_files_as_directory(contents)
+        with self.lock:
+            self.directories[cid] = {}
+        for name, content in contents.items():
+            file_cid, _ = self._add_file(content)
+            with self.lock:
+                self.directories[cid][name] = file_cid
+        return self._result(cid, sum(len(content) for content in contents.values()))
+
+    def pin_json(self, content):
+        data = json.dumps(content).encode("utf-8")
+        cid, size = self._add_file(data)
+        return self._result(cid, size)
+
+    def get(self, path):
+        """
+        Content behind a gateway path, or None
+        """
+        cid, _, name = path.partition("/")
+        with self.lock:
+            if name:
+                file_cid = self.directories.get(cid, {}).get(name)
+                return self.files.get(file_cid) if file_cid else None
+            return self.files.get(cid)
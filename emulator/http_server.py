@@ -0,0 +1,155 @@
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FaultInjector:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, drop_rate=0.0, rate_limit_rate=0.0, retry_after=1, seed=None,
+                 max_rps=None):
+        """
+        Degrade an emulated service like a real one under load.
+
+        Args:
+            latency_ms (float): Mean added latency per request
+            jitter_ms (float): Standard deviation of the added latency
+            drop_rate (float): Fraction of requests whose connection is closed without a response
+            rate_limit_rate (float): Fraction of requests answered with 429 Too Many Requests
+            retry_after (int): Retry-After seconds sent with each 429
+            seed (int): Seed for reproducible fault sequences
+            max_rps (float): Enforced request rate limit; requests over it get a 429 like a real API's quota
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.drop_rate = drop_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.max_rps = max_rps
+        self.allowance = max_rps or 0.0
+        self.last_request = time.monotonic()
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "dropped": 0, "rate_limited": 0}
+
+    def decide(self):
+        """
+        Sleep for the injected latency, then return None, "drop" or "rate_limit"
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = max(0.0, self.random.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+            roll = self.random.random()
+            over_quota = False
+            if self.max_rps:
+                now = time.monotonic()
+                self.allowance = min(self.max_rps, self.allowance + (now - self.last_request) * self.max_rps)
+                self.last_request = now
+                over_quota = self.allowance < 1
+                if not over_quota:
+                    self.allowance -= 1
+            if roll < self.drop_rate:
+                fault = "drop"
+                self.stats["dropped"] += 1
+            elif over_quota or roll < self.drop_rate + self.rate_limit_rate:
+                fault = "rate_limit"
+                self.stats["rate_limited"] += 1
+            else:
+                fault = None
+        if delay:
+            time.sleep(delay / 1000)
+        return fault
+
+
+class EmulatorRequestHandler(BaseHTTPRequestHandler):
+    """
+    Base handler for the emulated services. Subclasses implement handle_get/handle_post.
+    """
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type="application/json", headers=None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def inject_fault(self):
+        """
+        Apply the service's faults. Returns True when the request was already answered (or dropped).
+        """
+        faults = self.service.faults
+        fault = faults.decide() if faults else None
+        if fault == "drop":
+            self.read_body()
+            self.close_connection = True
+            return True
+        if fault == "rate_limit":
+            self.read_body()
+            self.send_body(429, {"error": "Too Many Requests"}, headers={"Retry-After": faults.retry_after})
+            return True
+        return False
+
+    def do_GET(self):
+        if not self.inject_fault():
+            self.handle_get()
+
+    def do_POST(self):
+        if not self.inject_fault():
+            self.handle_post()
+
+    def handle_get(self):
+        self.send_body(404, {"error": "Not found"})
+
+    def handle_post(self):
+        self.send_body(404, {"error": "Not found"})
+
+
+class BackgroundHTTPServer:
+    handler_class = EmulatorRequestHandler
+
+    def __init__(self, host="127.0.0.1", port=0, faults=None):
+        """
+        Serve an emulated service from a background thread. Port 0 picks a free port.
+        """
+        self.host = host
+        self.port = port
+        self.faults = faults
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    def start(self):
+        handler = type(self.handler_class.__name__, (self.handler_class,), {"service": self})
+        self.server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import shutil
+import multiprocessing
+from contextlib import redirect_stdout, redirect_stderr
+import numpy as np
+import requests
+from PIL import Image
+from solders.keypair import Keypair
+from utils.solana_rpc import SolanaRPCClient
+from pinata.storage_backends import PinataStorageBackend
+from emulator.http_server import FaultInjector
+from emulator.solana_emulator import SolanaRPCEmulator, LAMPORTS_PER_SOL
+from emulator.fake_pinata import FakePinataServer
+from emulator.solana_cli import EmulatedSolanaCLI
+
+# State of the current worker process, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(workspace, image_path, rpc_url, pinata_url):
+    """
+    Give each worker process its own directory, fee payer and image copy, since the
+    CLI stages pick up To*.json and write the resized image next to the original
+    """
+    directory = os.path.join(workspace, f"worker-{os.getpid()}")
+    os.makedirs(os.path.join(directory, "logs"), exist_ok=True)
+    os.chdir(directory)
+
+    keypair = Keypair()
+    with open("solana_keypair.json", 'w') as f:
+        json.dump(list(bytes(keypair)), f)
+    rpc = SolanaRPCClient(rpc_url)
+    for attempt in range(10):
+        try:
+            rpc.call("requestAirdrop", [str(keypair.pubkey()), 1000 * LAMPORTS_PER_SOL])
+            break
+        except Exception:
+            time.sleep(0.5)
+
+    image_copy = os.path.abspath(f"image{os.path.splitext(image_path)[1]}")
+    shutil.copyfile(image_path, image_copy)
+
+    # The uploaders refuse to start without a JWT; any bearer token satisfies the fake server
+    os.environ.setdefault("YOUR_PINATA_JWT", "emulator")
+    _worker.update({
+        "image_path": image_copy,
+        "backend": PinataStorageBackend(requests.Session(), api_url=pinata_url, gateway_base=pinata_url),
+        "cli": EmulatedSolanaCLI(rpc_url),
+        "rpc_url": rpc_url
+    })
+
+
+def _run_single(index, warm_gateway):
+    from main import MainScript
+
+    return MainScript(
+        image_path=_worker["image_path"],
+        name=f"Load{index}",
+        symbol=f"LD{index}",
+        description=f"Load test token {index}",
+        mint_amount=1000000,
+        warm_gateway=warm_gateway,
+        storage_backend=_worker["backend"],
+        command_runner=_worker["cli"],
+        rpc_url=_worker["rpc_url"]
+    )
+
+
+def _run_batch(index, warm_gateway, batch_size, cli_backend):
+    from main import BatchMainScript
+
+    manifest_path = f"manifest-{index}.json"
+    with open(manifest_path, 'w') as f:
+        json.dump([
+            {
+                "name": f"Load{index}x{i}",
+                "symbol": f"LD{index}X{i}",
+                "image_path": _worker["image_path"],
+                "mint_amount": 1000000,
+                "description": f"Load test token {index}.{i}"
+            }
+            for i in range(batch_size)
+        ], f)
+    return BatchMainScript(
+        manifest_path,
+        warm_gateway=warm_gateway,
+        storage_backend=_worker["backend"],
+        command_runner=_worker["cli"],
+        rpc_url=_worker["rpc_url"],
+        cli_backend=cli_backend,
+        cli_exec=_worker["cli"].exec_async
+    )
+
+
+def _run(task):
+    index, mode, warm_gateway, batch_size, cli_backend = task
+    log_path = os.path.abspath(os.path.join("logs", f"run-{index}.log"))
+    start = time.perf_counter()
+    error = None
+    try:
+        with open(log_path, 'w') as log, redirect_stdout(log), redirect_stderr(log):
+            if mode == "batch":
+                _run_batch(index, warm_gateway, batch_size, cli_backend).run()
+            else:
+                _run_single(index, warm_gateway).run()
+    except Exception as e:
+        error = str(e)
+    return {"index": index, "duration": time.perf_counter() - start, "error": error, "log_path": log_path}
+
+
+class LoadTest:
+    def __init__(self, runs=20, concurrency=4, mode="single", batch_size=10, image_path=None,
+                 workspace="loadtest", warm_gateway=False, rpc_faults=None, pinata_faults=None,
+                 cli_backend="subprocess"):
+        """
+        Run MainScript (or BatchMainScript) end to end, fully offline, against a
+        SolanaRPCEmulator and a FakePinataServer, and report throughput and latency.
+
+        Args:
+            runs (int): Number of MainScript runs, or of batches in batch mode
+            concurrency (int): Worker processes running at once
+            mode (str): "single" or "batch"
+            batch_size (int): Tokens per batch in batch mode
+            cli_backend (str): BatchMainScript CLI backend in batch mode, "subprocess" or "async"
+            image_path (str): Token image to use, a generated one when None
+            workspace (str): Directory holding one working directory per worker
+            rpc_faults (FaultInjector): Latency, drops and 429s of the RPC emulator
+            pinata_faults (FaultInjector): Latency, drops and 429s of the fake Pinata server
+        """
+        if mode not in ("single", "batch"):
+            raise ValueError(f"Unknown load test mode: {mode}")
+        self.runs = runs
+        self.concurrency = concurrency
+        self.mode = mode
+        self.batch_size = batch_size
+        self.workspace = os.path.abspath(workspace)
+        self.image_path = image_path
+        self.warm_gateway = warm_gateway
+        self.cli_backend = cli_backend
+        self.rpc = SolanaRPCEmulator(faults=rpc_faults)
+        self.pinata = FakePinataServer(faults=pinata_faults)
+
+    def prepare_image(self):
+        if self.image_path:
+            return os.path.abspath(self.image_path)
+        # A large photo-like gradient, so resizing and uploads do representative work
+        path = os.path.join(self.workspace, "loadtest_image.png")
+        x = np.linspace(0, 255, 1024, dtype=np.uint8)
+        pixels = np.stack(np.broadcast_arrays(x[None, :], x[:, None], x[::-1][None, :]), axis=-1)
+        Image.fromarray(pixels).save(path)
+        return path
+
+    def report(self, results, wall_time):
+        durations = np.array([result["duration"] for result in results if result["error"] is None])
+        failures = [result for result in results if result["error"] is not None]
+        tokens = len(durations) * (self.batch_size if self.mode == "batch" else 1)
+        report = {
+            "mode": self.mode,
+            "runs": len(results),
+            "succeeded": len(durations),
+            "failed": len(failures),
+            "tokens": tokens,
+            "wall_time": wall_time,
+            "tokens_per_minute": tokens / wall_time * 60 if wall_time else 0.0,
+            "latency": {
+                f"p{q}": float(np.percentile(durations, q)) for q in (50, 95, 99)
+            } if len(durations) else {},
+            "rpc": dict(self.rpc.faults.stats) if self.rpc.faults else {},
+            "pinata": dict(self.pinata.faults.stats) if self.pinata.faults else {},
+            "rpc_methods": dict(self.rpc.method_counts),
+            "errors": [f"run {result['index']}: {result['error']} (log: {result['log_path']})" for result in failures]
+        }
+
+        print(f"\nLoad test ({self.mode}, {self.concurrency} workers): {report['succeeded']}/{report['runs']} runs "
+              f"succeeded, {tokens} tokens in {wall_time:.1f}s ({report['tokens_per_minute']:.1f} tokens/min)")
+        if report["latency"]:
+            print("Run latency: " + ", ".join(f"{name} {value:.2f}s" for name, value in report["latency"].items()))
+        for service in ("rpc", "pinata"):
+            if report[service]:
+                stats = report[service]
+                print(f"{service}: {stats['requests']} requests, {stats['dropped']} dropped, "
+                      f"{stats['rate_limited']} rate limited")
+        for error in report["errors"]:
+            print(f"Failed {error}")
+        return report
+
+    def run(self):
+        os.makedirs(self.workspace, exist_ok=True)
+        image_path = self.prepare_image()
+        with self.rpc, self.pinata:
+            print(f"RPC emulator at {self.rpc.url}, fake Pinata at {self.pinata.url}")
+            tasks = [(index, self.mode, self.warm_gateway, self.batch_size, self.cli_backend) for index in range(self.runs)]
+            start = time.perf_counter()
+            with multiprocessing.Pool(
+                self.concurrency, initializer=_init_worker,
+                initargs=(self.workspace, image_path, self.rpc.url, self.pinata.url)
+            ) as pool:
+                results = []
+                for result in pool.imap_unordered(_run, tasks):
+                    results.append(result)
+                    status = "ok" if result["error"] is None else "failed"
+                    print(f"[{len(results)}/{self.runs}] run {result['index']} {status} in {result['duration']:.2f}s")
+            wall_time = time.perf_counter() - start
+        return self.report(results, wall_time)
+
+
+if __name__ == "__main__":
+    LoadTest(
+        runs=20,
+        concurrency=4,
+        rpc_faults=FaultInjector(latency_ms=50, jitter_ms=20, drop_rate=0.01, rate_limit_rate=0.02),
+        pinata_faults=FaultInjector(latency_ms=200, jitter_ms=100, rate_limit_rate=0.05)
+    ).run()
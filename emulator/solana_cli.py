@@ -0,0 +1,200 @@
+import os
+import json
+import shlex
+import asyncio
+import subprocess
+from solders.keypair import Keypair
+from utils.solana_rpc import SolanaRPCClient, SolanaRPCError
+from create_token.token_program import TOKEN_2022_PROGRAM_ID, load_keypair
+from emulator.solana_emulator import REASON_ACCOUNT_IN_USE, REASON_ACCOUNT_EXISTS, REASON_EXTENSION_INITIALIZED
+
+
+class CLIError(Exception):
+    def __init__(self, message, reason=None, data=None):
+        self.reason = reason
+        self.data = data
+        super().__init__(message)
+
+
+class EmulatedSolanaCLI:
+    def __init__(self, rpc_url, keypair_path="solana_keypair.json"):
+        """
+        Drop-in replacement for subprocess.run that answers the `solana`, `solana-keygen`
+        and `spl-token` commands our scripts issue against a SolanaRPCEmulator instead of
+        a live cluster. Pass it as `command_runner` to SolanaMainnetScriptRunner,
+        AddTokenMetadata or MainScript.
+
+        Failures raise subprocess.CalledProcessError with the same stderr text the real
+        CLI prints, so the scripts' retry and "already exists" handling is exercised as is.
+        """
+        self.rpc_url = rpc_url
+        self.keypair_path = keypair_path
+        self._rpc = None
+
+    @property
+    def rpc(self):
+        # Created lazily so the runner can be handed to worker processes before first use
+        if self._rpc is None:
+            self._rpc = SolanaRPCClient(self.rpc_url)
+        return self._rpc
+
+    def payer(self, keypair_path=None):
+        return str(load_keypair(keypair_path or self.keypair_path).pubkey())
+
+    def __call__(self, command, shell=True, check=False, stdout=None, stderr=None, text=True, **kwargs):
+        argv = shlex.split(command) if isinstance(command, str) else list(command)
+        try:
+            output = self.execute(argv, kwargs.get("cwd"))
+            returncode, error = 0, ""
+        except CLIError as e:
+            output, returncode, error = "", 1, str(e)
+
+        if not text:
+            output, error = output.encode(), error.encode()
+        if returncode and check:
+            raise subprocess.CalledProcessError(returncode, command, output, error)
+        return subprocess.CompletedProcess(command, returncode, output, error)
+
+    async def exec_async(self, argv, cwd=None):
+        """
+        Counterpart of spl_token_cli.exec_subprocess, for SplTokenCLI(exec_command=...)
+        """
+        result = await asyncio.to_thread(self, list(argv), check=False, cwd=cwd)
+        return result.returncode, result.stdout, result.stderr
+
+    def execute(self, argv, cwd=None):
+        program, args = argv[0], argv[1:]
+        if program == "solana":
+            return self.solana(args)
+        if program == "solana-keygen":
+            return self.solana_keygen(args, cwd)
+        if program == "spl-token":
+            return self.spl_token(args)
+        raise CLIError(f"{program}: command not found")
+
+    def call(self, method, params):
+        """
+        Call the emulator, turning RPC and connection failures into CLI errors
+        """
+        try:
+            return self.rpc.call(method, params)
+        except SolanaRPCError as e:
+            raise CLIError(f"Error: Client(Error {{ request: Some({method}), kind: RpcError({e}) }})",
+                           e.data.get("reason") if e.data else None, e.data)
+        except Exception as e:
+            raise CLIError(f"Error: Client(Error {{ request: Some({method}), kind: Reqwest({str(e)}) }})")
+
+    def solana(self, args):
+        if args[:2] == ["config", "set"]:
+            for flag, value in zip(args, args[1:]):
+                if flag in ("-k", "--keypair"):
+                    self.keypair_path = value
+            return f"Config File: emulated\nRPC URL: {self.rpc_url}\nKeypair Path: {self.keypair_path}\nCommitment: confirmed"
+        if args == ["address"]:
+            return self.payer()
+        if args[:1] == ["balance"]:
+            lamports = self.call("getBalance", [args[1] if len(args) > 1 else self.payer()])["value"]
+            return f"{lamports / 1e9} SOL"
+        raise CLIError(f"error: unsupported emulated command: solana {' '.join(args)}")
+
+    def solana_keygen(self, args, cwd=None):
+        if args[:1] != ["grind"] or "--starts-with" not in args:
+            raise CLIError(f"error: unsupported emulated command: solana-keygen {' '.join(args)}")
+        prefix, count = args[args.index("--starts-with") + 1].split(":")
+        written = []
+        for _ in range(int(count)):
+            keypair = Keypair()
+            while not str(keypair.pubkey()).startswith(prefix):
+                keypair = Keypair()
+            path = f"{keypair.pubkey()}.json"
+            with open(os.path.join(cwd or ".", path), 'w') as f:
+                json.dump(list(bytes(keypair)), f)
+            written.append(f"Wrote keypair to {path}")
+        return "\n".join(written)
+
+    def signer(self, options, flag, default):
+        """
+        Address of the keypair file given for a signing authority, the fee payer when not given
+        """
+        return self.payer(options[flag]) if flag in options else default
+
+    def spl_token(self, args):
+        args = list(args)
+        # Global options, which the real CLI accepts anywhere on the command line
+        options = {}
+        for flag in ("--program-id", "--url", "--config", "--fee-payer", "--output", "--decimals",
+                     "--mint-authority", "--owner", "--update-authority", "--authority"):
+            if flag in args:
+                index = args.index(flag)
+                options[flag] = args[index + 1]
+                del args[index:index + 2]
+        args = [arg for arg in args if arg != "--enable-metadata"]
+        if options.get("--program-id", str(TOKEN_2022_PROGRAM_ID)) != str(TOKEN_2022_PROGRAM_ID):
+            raise CLIError("error: the emulator only models Token-2022")
+
+        payer = self.payer(options.get("--fee-payer"))
+        as_json = options.get("--output") in ("json", "json-compact")
+        subcommand, args = args[0], args[1:]
+        if subcommand == "create-token":
+            mint_keypair = args[0]
+            mint = str(load_keypair(mint_keypair).pubkey())
+            decimals = int(options.get("--decimals", 9))
+            # --mint-authority is an address here, and a keypair for the commands it signs
+            mint_authority = options.get("--mint-authority", payer)
+            try:
+                signature = self.call("emulator_createMint", [payer, mint, decimals, mint_authority])
+            except CLIError as e:
+                if e.reason == REASON_ACCOUNT_IN_USE:
+                    raise CLIError(f"Error: Client(Error {{ request: None, kind: TransactionError(InstructionError(0, "
+                                   f"Custom(0))) }}) Allocate: account Address {{ address: {mint}, base: None }} "
+                                   f"already in use")
+                raise
+            if as_json:
+                return json.dumps({"commandName": "CreateToken", "address": mint, "decimals": decimals,
+                                   "transactionData": {"signature": signature}})
+            return f"Creating token {mint} under program {TOKEN_2022_PROGRAM_ID}\n\nAddress:  {mint}\n" \
+                   f"Decimals:  {decimals}\n\nSignature: {signature}"
+
+        if subcommand == "create-account":
+            try:
+                result = self.call("emulator_createAccount", [payer, options.get("--owner", payer), args[0]])
+            except CLIError as e:
+                if e.reason == REASON_ACCOUNT_EXISTS:
+                    raise CLIError(f"Error: Account already exists: {e.data['address']}")
+                raise
+            if as_json:
+                return json.dumps({"commandName": "CreateAccount", "address": result["address"],
+                                   "transactionData": {"signature": result["signature"]}})
+            return f"Creating account {result['address']}\n\nSignature: {result['signature']}"
+
+        if subcommand == "initialize-metadata":
+            mint, name, symbol, uri = args[:4]
+            try:
+                signature = self.call("emulator_initializeMetadata", [
+                    payer, mint, name, symbol, uri, self.signer(options, "--mint-authority", payer),
+                    options.get("--update-authority")
+                ])
+            except CLIError as e:
+                if e.reason == REASON_EXTENSION_INITIALIZED:
+                    raise CLIError("Error: Extension already initialized on this account")
+                raise
+            return json.dumps({"signature": signature}) if as_json else f"Signature: {signature}"
+
+        if subcommand == "update-metadata":
+            mint, field, value = args[:3]
+            signature = self.call("emulator_updateMetadata", [
+                payer, mint, field, value, self.signer(options, "--authority", payer)
+            ])
+            return json.dumps({"signature": signature}) if as_json else f"Signature: {signature}"
+
+        if subcommand == "mint":
+            mint, amount = args[:2]
+            recipient = args[2] if len(args) > 2 else payer
+            signature = self.call("emulator_mintTo", [
+                payer, mint, recipient, amount, self.signer(options, "--mint-authority", payer)
+            ])
+            if as_json:
+                return json.dumps({"commandName": "Mint", "transactionData": {"signature": signature}})
+            return f"Minting {amount} tokens\n  Token: {mint}\n\nSignature: {signature}"
+
+        raise CLIError(f"error: unsupported emulated command: spl-token {subcommand}")
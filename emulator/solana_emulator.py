@@ -0,0 +1,679 @@
+import copy
+import json
+import time
+import base64
+import struct
+import hashlib
+import threading
+import base58
+from decimal import Decimal
+from contextlib import contextmanager
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+from create_token.token_program import (
+    TOKEN_2022_PROGRAM_ID, ASSOCIATED_TOKEN_PROGRAM_ID, SYSTEM_PROGRAM_ID, COMPUTE_BUDGET_PROGRAM_ID,
+    ADDRESS_LOOKUP_TABLE_PROGRAM_ID, TRANSFER_CHECKED, UPDATE_FIELD_DISCRIMINATOR, get_associated_token_address
+)
+from emulator.http_server import BackgroundHTTPServer, EmulatorRequestHandler
+
+LAMPORTS_PER_SOL = 1_000_000_000
+LAMPORTS_PER_SIGNATURE = 5000
+SLOT_TIME = 0.4
+# Blocks a blockhash stays usable for
+BLOCKHASH_VALIDITY = 150
+
+# Token-2022 account layout
+BASE_ACCOUNT_LENGTH = 165
+ACCOUNT_TYPE_MINT = 1
+ACCOUNT_TYPE_ACCOUNT = 2
+EXTENSION_IMMUTABLE_OWNER = 7
+EXTENSION_METADATA_POINTER = 18
+EXTENSION_TOKEN_METADATA = 19
+
+# Reasons attached to emulator errors so the emulated CLI can print the real CLI's messages
+REASON_ACCOUNT_IN_USE = "account_in_use"
+REASON_ACCOUNT_EXISTS = "account_exists"
+REASON_EXTENSION_INITIALIZED = "extension_initialized"
+
+RPC_METHODS = {
+    "getHealth", "getVersion", "getSlot", "getBlockHeight", "getLatestBlockhash",
+    "getMinimumBalanceForRentExemption", "getBalance", "getAccountInfo", "getTokenAccountBalance", "getProgramAccounts",
+    "getSignatureStatuses", "requestAirdrop", "sendTransaction",
+    "emulator_createMint", "emulator_createAccount", "emulator_initializeMetadata",
+    "emulator_updateMetadata", "emulator_mintTo",
+}
+
+_MISSING = object()
+
+
+class EmulatorError(Exception):
+    def __init__(self, code, message, data=None):
+        self.code = code
+        self.message = message
+        self.data = data
+        super().__init__(message)
+
+    def to_json(self):
+        error = {"code": self.code, "message": self.message}
+        if self.data is not None:
+            error["data"] = self.data
+        return error
+
+
+class InstructionError(Exception):
+    pass
+
+
+def rent_exempt_minimum(size):
+    """
+    Rent-exempt balance for an account of the given data size, as the runtime computes it
+    """
+    return (size + 128) * 3480 * 2
+
+
+def _pubkey_bytes(address):
+    return bytes(Pubkey.from_string(address)) if address else bytes(32)
+
+
+def _coption_pubkey(address):
+    return struct.pack("<I", 1) + bytes(Pubkey.from_string(address)) if address else bytes(36)
+
+
+def _borsh_string(value):
+    encoded = value.encode("utf-8")
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+def _tlv(extension_type, value):
+    return struct.pack("<HH", extension_type, len(value)) + value
+
+
+def encode_token_metadata(mint, metadata):
+    """
+    Borsh layout of the TokenMetadata extension
+    """
+    data = _pubkey_bytes(metadata["update_authority"]) + _pubkey_bytes(mint)
+    data += _borsh_string(metadata["name"]) + _borsh_string(metadata["symbol"]) + _borsh_string(metadata["uri"])
+    data += struct.pack("<I", len(metadata["additional_metadata"]))
+    for key, value in metadata["additional_metadata"]:
+        data += _borsh_string(key) + _borsh_string(value)
+    return data
+
+
+def encode_mint(address, mint):
+    """
+    Token-2022 mint with a metadata pointer to itself and, once initialized, its metadata
+    """
+    data = _coption_pubkey(mint["mint_authority"])
+    data += struct.pack("<QBB", mint["supply"], mint["decimals"], 1)
+    data += _coption_pubkey(mint["freeze_authority"])
+    data = data.ljust(BASE_ACCOUNT_LENGTH, b"\0") + bytes([ACCOUNT_TYPE_MINT])
+    data += _tlv(EXTENSION_METADATA_POINTER, _pubkey_bytes(mint["mint_authority"]) + _pubkey_bytes(address))
+    if mint["metadata"] is not None:
+        data += _tlv(EXTENSION_TOKEN_METADATA, encode_token_metadata(address, mint["metadata"]))
+    return data
+
+
+def encode_token_account(account):
+    """
+    Token-2022 account with the ImmutableOwner extension every associated token account gets
+    """
+    data = _pubkey_bytes(account["mint"]) + _pubkey_bytes(account["owner"])
+    data += struct.pack("<Q", account["amount"])
+    data += bytes(36)  # delegate
+    data += bytes([1])  # state: initialized
+    data += bytes(12)  # is_native
+    data += struct.pack("<Q", 0)  # delegated_amount
+    data += bytes(36)  # close_authority
+    return data + bytes([ACCOUNT_TYPE_ACCOUNT]) + _tlv(EXTENSION_IMMUTABLE_OWNER, b"")
+
+
+def encode_lookup_table(table):
+    data = struct.pack("<IQQBB", 1, 2 ** 64 - 1, table["last_extended_slot"], table["last_extended_start_index"], 1)
+    data += _pubkey_bytes(table["authority"]) + bytes(2)
+    return data + b"".join(_pubkey_bytes(address) for address in table["addresses"])
+
+
+class SolanaRPCRequestHandler(EmulatorRequestHandler):
+    def handle_post(self):
+        try:
+            request = json.loads(self.read_body())
+        except ValueError:
+            return self.send_body(200, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+        if isinstance(request, list):
+            return self.send_body(200, [self.service.dispatch(item) for item in request])
+        self.send_body(200, self.service.dispatch(request))
+
+
+class SolanaRPCEmulator(BackgroundHTTPServer):
+    handler_class = SolanaRPCRequestHandler
+
+    def __init__(self, host="127.0.0.1", port=0, faults=None, base_slot=300_000_000):
+        """
+        Offline stand-in for a Solana JSON-RPC node.
+
+        Models the state our flows touch: SOL balances, Token-2022 mints with the metadata
+        pointer and TokenMetadata extensions, associated token accounts and address lookup
+        tables. Serves the standard read methods and sendTransaction (compute budget, system
+        transfers, ATA creation, transfer_checked and lookup tables), plus `emulator_*`
+        methods that EmulatedSolanaCLI uses in place of the transactions the real CLI sends.
+        Signatures are verified but account writability is not enforced.
+        Use it over HTTP with start()/url, or call handle() directly in-process.
+        """
+        super().__init__(host, port, faults)
+        self.lock = threading.RLock()
+        self.genesis = time.monotonic()
+        self.base_slot = base_slot
+        self.lamports = {}
+        self.mints = {}
+        self.token_accounts = {}
+        self.lookup_tables = {}
+        self.signatures = {}
+        self.blockhashes = {}
+        self.method_counts = {}
+        self._journal = None
+
+    # --- clock ---
+
+    def slot(self):
+        return self.base_slot + int((time.monotonic() - self.genesis) / SLOT_TIME)
+
+    def block_height(self):
+        # Some slots are skipped, so block height trails the slot
+        return self.slot() - self.base_slot // 20
+
+    def latest_blockhash(self):
+        slot = self.slot()
+        blockhash = str(Hash(hashlib.sha256(f"emulator-blockhash-{slot}".encode()).digest()))
+        last_valid = self.block_height() + BLOCKHASH_VALIDITY
+        self.blockhashes.setdefault(blockhash, last_valid)
+        return blockhash, self.blockhashes[blockhash]
+
+    # --- state ---
+
+    @contextmanager
+    def _atomic(self):
+        """
+        Apply every change inside the block, or none of them
+        """
+        with self.lock:
+            self._journal = {}
+            try:
+                yield
+            except Exception:
+                for (_, key), (store, old) in self._journal.items():
+                    if old is _MISSING:
+                        store.pop(key, None)
+                    else:
+                        store[key] = old
+                raise
+            finally:
+                self._journal = None
+
+    def _touch(self, store, key):
+        if self._journal is not None and (id(store), key) not in self._journal:
+            self._journal[(id(store), key)] = (store, copy.deepcopy(store.get(key, _MISSING)))
+
+    def _debit(self, address, amount):
+        balance = self.lamports.get(address, 0)
+        if balance < amount:
+            raise InstructionError(f"insufficient lamports {balance}, need {amount}")
+        self._touch(self.lamports, address)
+        self.lamports[address] = balance - amount
+
+    def _credit(self, address, amount):
+        self._touch(self.lamports, address)
+        self.lamports[address] = self.lamports.get(address, 0) + amount
+
+    def _top_up_rent(self, payer, address, size):
+        """
+        Move enough lamports from the payer to keep the account rent-exempt at its new size
+        """
+        needed = rent_exempt_minimum(size) - self.lamports.get(address, 0)
+        if needed > 0:
+            self._debit(payer, needed)
+            self._credit(address, needed)
+
+    def _exists(self, address):
+        return address in self.mints or address in self.token_accounts or address in self.lookup_tables
+
+    def _account_data(self, address):
+        """
+        (owner program, data) of an account
+        """
+        if address in self.mints:
+            return str(TOKEN_2022_PROGRAM_ID), encode_mint(address, self.mints[address])
+        if address in self.token_accounts:
+            return str(TOKEN_2022_PROGRAM_ID), encode_token_account(self.token_accounts[address])
+        if address in self.lookup_tables:
+            return str(ADDRESS_LOOKUP_TABLE_PROGRAM_ID), encode_lookup_table(self.lookup_tables[address])
+        return str(SYSTEM_PROGRAM_ID), b""
+
+    def _context(self, value):
+        return {"context": {"slot": self.slot()}, "value": value}
+
+    def _record_signature(self, signature, err=None):
+        self.signatures[signature] = {
+            "slot": self.slot(),
+            "confirmations": None,
+            "err": err,
+            "status": {"Ok": None} if err is None else {"Err": err},
+            "confirmationStatus": "confirmed"
+        }
+        return signature
+
+    def _charge_fee(self, payer, signatures=1):
+        try:
+            self._debit(payer, LAMPORTS_PER_SIGNATURE * signatures)
+        except InstructionError:
+            raise EmulatorError(-32002, "Transaction simulation failed: Attempt to debit an account but "
+                                        "found no record of a prior credit.")
+
+    # --- token operations shared by transactions and the emulated CLI ---
+
+    def _create_token_account(self, payer, owner, mint):
+        if mint not in self.mints:
+            raise InstructionError(f"mint {mint} does not exist")
+        address = str(get_associated_token_address(Pubkey.from_string(owner), Pubkey.from_string(mint)))
+        self._top_up_rent(payer, address, len(encode_token_account({"mint": mint, "owner": owner, "amount": 0})))
+        self._touch(self.token_accounts, address)
+        self.token_accounts[address] = {"mint": mint, "owner": owner, "amount": 0}
+        return address
+
+    def _resize_mint(self, payer, mint):
+        self._top_up_rent(payer, mint, len(encode_mint(mint, self.mints[mint])))
+
+    def _mint(self, address):
+        if address not in self.mints:
+            raise InstructionError(f"mint {address} does not exist")
+        self._touch(self.mints, address)
+        return self.mints[address]
+
+    # --- transaction execution ---
+
+    def _system_instruction(self, accounts, data, signers):
+        (index,) = struct.unpack_from("<I", data)
+        if index != 2:
+            raise InstructionError(f"unsupported system instruction {index}")
+        (lamports,) = struct.unpack_from("<Q", data, 4)
+        if accounts[0] not in signers:
+            raise InstructionError("missing required signature for instruction")
+        self._debit(accounts[0], lamports)
+        self._credit(accounts[1], lamports)
+
+    def _associated_token_instruction(self, accounts, data, signers):
+        payer, address, owner, mint = accounts[:4]
+        idempotent = data == bytes([1])
+        if address != str(get_associated_token_address(Pubkey.from_string(owner), Pubkey.from_string(mint))):
+            raise InstructionError("Provided seeds do not result in a valid address")
+        if address in self.token_accounts:
+            if not idempotent:
+                raise InstructionError("Provided owner is not allowed")
+            return
+        if self._exists(address):
+            raise InstructionError("account already in use")
+        self._create_token_account(payer, owner, mint)
+
+    def _update_field_instruction(self, accounts, data, signers):
+        mint, update_authority = accounts[:2]
+        position = len(UPDATE_FIELD_DISCRIMINATOR) + 1
+
+        def read_string():
+            nonlocal position
+            (size,) = struct.unpack_from("<I", data, position)
+            position += 4 + size
+            return data[position - size:position].decode("utf-8")
+
+        field = {0: "name", 1: "symbol", 2: "uri"}.get(data[position - 1]) or read_string()
+        value = read_string()
+        metadata = self._mint(mint)["metadata"]
+        if metadata is None:
+            raise InstructionError("invalid account data for instruction")
+        if metadata["update_authority"] != update_authority or update_authority not in signers:
+            raise InstructionError("incorrect update authority")
+        if field in ("name", "symbol", "uri"):
+            metadata[field] = value
+        else:
+            metadata["additional_metadata"] = [
+                (key, old) for key, old in metadata["additional_metadata"] if key != field
+            ] + [(field, value)]
+        # The program reallocates but never pays for the new size itself
+        if self.lamports.get(mint, 0) < rent_exempt_minimum(len(encode_mint(mint, self._mint(mint)))):
+            raise InstructionError("insufficient funds for rent")
+
+    def _token_instruction(self, accounts, data, signers):
+        if data[:len(UPDATE_FIELD_DISCRIMINATOR)] == UPDATE_FIELD_DISCRIMINATOR:
+            return self._update_field_instruction(accounts, data, signers)
+        if data[0] != TRANSFER_CHECKED:
+            raise InstructionError("invalid instruction data")
+        _, amount, decimals = struct.unpack_from("<BQB", data)
+        source, mint, destination, owner = accounts[:4]
+        if source not in self.token_accounts or destination not in self.token_accounts:
+            raise InstructionError("invalid account data for instruction")
+        if self.mints[mint]["decimals"] != decimals:
+            raise InstructionError("custom program error: 0x12")
+        if self.token_accounts[source]["owner"] != owner or owner not in signers:
+            raise InstructionError("custom program error: 0x4")
+        if self.token_accounts[source]["amount"] < amount:
+            raise InstructionError("custom program error: 0x1")
+        self._touch(self.token_accounts, source)
+        self._touch(self.token_accounts, destination)
+        self.token_accounts[source]["amount"] -= amount
+        self.token_accounts[destination]["amount"] += amount
+
+    def _lookup_table_instruction(self, accounts, data, signers):
+        (index,) = struct.unpack_from("<I", data)
+        table, authority, payer = accounts[:3]
+        if authority not in signers:
+            raise InstructionError("missing required signature for instruction")
+        if index == 0:
+            recent_slot, bump = struct.unpack_from("<QB", data, 4)
+            expected, _ = Pubkey.find_program_address(
+                [_pubkey_bytes(authority), struct.pack("<Q", recent_slot)], ADDRESS_LOOKUP_TABLE_PROGRAM_ID
+            )
+            if str(expected) != table or self._exists(table):
+                raise InstructionError("invalid lookup table address")
+            self._touch(self.lookup_tables, table)
+            self.lookup_tables[table] = {
+                "authority": authority, "addresses": [], "last_extended_slot": 0, "last_extended_start_index": 0
+            }
+            self._top_up_rent(payer, table, len(encode_lookup_table(self.lookup_tables[table])))
+        elif index == 2:
+            (count,) = struct.unpack_from("<Q", data, 4)
+            addresses = [str(Pubkey(data[12 + 32 * i:44 + 32 * i])) for i in range(count)]
+            if table not in self.lookup_tables:
+                raise InstructionError("invalid account owner")
+            self._touch(self.lookup_tables, table)
+            entry = self.lookup_tables[table]
+            entry["last_extended_start_index"] = len(entry["addresses"])
+            entry["last_extended_slot"] = self.slot()
+            entry["addresses"] += addresses
+            self._top_up_rent(payer, table, len(encode_lookup_table(entry)))
+        else:
+            raise InstructionError(f"unsupported lookup table instruction {index}")
+
+    def _resolve_accounts(self, message):
+        keys = [str(key) for key in message.account_keys]
+        writable, readonly = [], []
+        for lookup in getattr(message, "address_table_lookups", []):
+            table = self.lookup_tables.get(str(lookup.account_key))
+            if table is None:
+                raise EmulatorError(-32002, "Transaction simulation failed: Transaction loads an address "
+                                            "table account that doesn't exist")
+            try:
+                writable += [table["addresses"][i] for i in lookup.writable_indexes]
+                readonly += [table["addresses"][i] for i in lookup.readonly_indexes]
+            except IndexError:
+                raise EmulatorError(-32002, "Transaction simulation failed: Transaction address table "
+                                            "lookup uses an invalid index")
+        return keys + writable + readonly
+
+    def _execute(self, transaction):
+        message = transaction.message
+        keys = self._resolve_accounts(message)
+        signers = set(keys[:message.header.num_required_signatures])
+        self._charge_fee(keys[0], len(transaction.signatures))
+
+        programs = {
+            str(COMPUTE_BUDGET_PROGRAM_ID): lambda accounts, data, signers: None,
+            str(SYSTEM_PROGRAM_ID): self._system_instruction,
+            str(ASSOCIATED_TOKEN_PROGRAM_ID): self._associated_token_instruction,
+            str(TOKEN_2022_PROGRAM_ID): self._token_instruction,
+            str(ADDRESS_LOOKUP_TABLE_PROGRAM_ID): self._lookup_table_instruction,
+        }
+        for i, instruction in enumerate(message.instructions):
+            program = keys[instruction.program_id_index]
+            accounts = [keys[index] for index in bytes(instruction.accounts)]
+            try:
+                if program not in programs:
+                    raise InstructionError("Unsupported program id")
+                programs[program](accounts, bytes(instruction.data), signers)
+            except (InstructionError, struct.error, IndexError, KeyError) as e:
+                raise InstructionError(f"Error processing Instruction {i}: {str(e)}") from e
+
+    # --- JSON-RPC methods ---
+
+    def getHealth(self):
+        return "ok"
+
+    def getVersion(self):
+        return {"solana-core": "emulator", "feature-set": 0}
+
+    def getSlot(self, config=None):
+        return self.slot()
+
+    def getBlockHeight(self, config=None):
+        return self.block_height()
+
+    def getLatestBlockhash(self, config=None):
+        blockhash, last_valid = self.latest_blockhash()
+        return self._context({"blockhash": blockhash, "lastValidBlockHeight": last_valid})
+
+    def getMinimumBalanceForRentExemption(self, size, config=None):
+        return rent_exempt_minimum(size)
+
+    def getBalance(self, address, config=None):
+        return self._context(self.lamports.get(address, 0))
+
+    def getAccountInfo(self, address, config=None):
+        if address not in self.lamports and not self._exists(address):
+            return self._context(None)
+        owner, data = self._account_data(address)
+        return self._context({
+            "data": [base64.b64encode(data).decode(), "base64"],
+            "executable": False,
+            "lamports": self.lamports.get(address, 0),
+            "owner": owner,
+            "rentEpoch": 18446744073709551615,
+            "space": len(data)
+        })
+
+    def getProgramAccounts(self, program_id, config=None):
+        """
+        Accounts owned by a program, with dataSize/memcmp filters and dataSlice
+        """
+        config = config or {}
+        if config.get("encoding", "base64") != "base64":
+            raise EmulatorError(-32602, "Invalid params: the emulator only returns base64 data")
+        if program_id == str(TOKEN_2022_PROGRAM_ID):
+            addresses = list(self.mints) + list(self.token_accounts)
+        elif program_id == str(ADDRESS_LOOKUP_TABLE_PROGRAM_ID):
+            addresses = list(self.lookup_tables)
+        else:
+            addresses = []
+
+        filters = []
+        for entry in config.get("filters", []):
+            if "dataSize" in entry:
+                filters.append(("size", entry["dataSize"], None))
+            elif "memcmp" in entry:
+                memcmp = entry["memcmp"]
+                if memcmp.get("encoding", "base58") == "base64":
+                    expected = base64.b64decode(memcmp["bytes"])
+                else:
+                    expected = base58.b58decode(memcmp["bytes"])
+                filters.append(("memcmp", memcmp["offset"], expected))
+            else:
+                raise EmulatorError(-32602, f"Invalid params: unknown filter {entry}")
+        data_slice = config.get("dataSlice")
+
+        accounts = []
+        for address in addresses:
+            owner, data = self._account_data(address)
+            if not all(len(data) == value if kind == "size" else data[value:value + len(expected)] == expected
+                       for kind, value, expected in filters):
+                continue
+            if data_slice:
+                data = data[data_slice["offset"]:data_slice["offset"] + data_slice["length"]]
+            accounts.append({"pubkey": address, "account": {
+                "data": [base64.b64encode(data).decode(), "base64"],
+                "executable": False,
+                "lamports": self.lamports.get(address, 0),
+                "owner": owner,
+                "rentEpoch": 18446744073709551615,
+                "space": len(data)
+            }})
+        return accounts
+
+    def getTokenAccountBalance(self, address, config=None):
+        account = self.token_accounts.get(address)
+        if account is None:
+            raise EmulatorError(-32602, "Invalid param: could not find account")
+        decimals = self.mints[account["mint"]]["decimals"]
+        ui_amount = Decimal(account["amount"]).scaleb(-decimals)
+        return self._context({
+            "amount": str(account["amount"]),
+            "decimals": decimals,
+            "uiAmount": float(ui_amount),
+            "uiAmountString": format(ui_amount.normalize(), "f")
+        })
+
+    def getSignatureStatuses(self, signatures, config=None):
+        if len(signatures) > 256:
+            raise EmulatorError(-32602, "Too many inputs provided; max 256")
+        return self._context([self.signatures.get(signature) for signature in signatures])
+
+    def requestAirdrop(self, address, lamports, config=None):
+        with self._atomic():
+            self._credit(address, lamports)
+            return self._record_signature(str(Signature.new_unique()))
+
+    def sendTransaction(self, encoded, config=None):
+        config = config or {}
+        try:
+            transaction = VersionedTransaction.from_bytes(base64.b64decode(encoded))
+        except Exception as e:
+            raise EmulatorError(-32602, f"failed to deserialize transaction: {str(e)}")
+        if not all(transaction.verify_with_results()):
+            raise EmulatorError(-32003, "Transaction signature verification failure")
+
+        signature = str(transaction.signatures[0])
+        blockhash = str(transaction.message.recent_blockhash)
+        with self.lock:
+            if signature in self.signatures:
+                return signature
+            if self.blockhashes.get(blockhash, -1) < self.block_height():
+                raise EmulatorError(-32002, "Transaction simulation failed: Blockhash not found",
+                                    {"err": "BlockhashNotFound", "logs": []})
+            try:
+                with self._atomic():
+                    self._execute(transaction)
+            except InstructionError as e:
+                if not config.get("skipPreflight"):
+                    raise EmulatorError(-32002, f"Transaction simulation failed: {str(e)}",
+                                        {"err": {"InstructionError": str(e)}, "logs": []})
+                # Without preflight a failing transaction still lands and pays its fee
+                with self._atomic():
+                    self._charge_fee(str(transaction.message.account_keys[0]), len(transaction.signatures))
+                return self._record_signature(signature, {"InstructionError": str(e)})
+            return self._record_signature(signature)
+
+    # --- emulator_* methods standing in for the transactions the spl-token CLI sends ---
+
+    def emulator_createMint(self, payer, mint, decimals=9, mint_authority=None):
+        with self._atomic():
+            if self._exists(mint):
+                raise EmulatorError(-32002, f"Transaction simulation failed: account Address {{ address: {mint}, "
+                                            f"base: None }} already in use", {"reason": REASON_ACCOUNT_IN_USE})
+            self._charge_fee(payer, 2)
+            self._touch(self.mints, mint)
+            self.mints[mint] = {
+                "mint_authority": mint_authority or payer, "supply": 0, "decimals": decimals,
+                "freeze_authority": None, "metadata": None
+            }
+            self._resize_mint(payer, mint)
+            return self._record_signature(str(Signature.new_unique()))
+
+    def emulator_createAccount(self, payer, owner, mint):
+        with self._atomic():
+            address = str(get_associated_token_address(Pubkey.from_string(owner), Pubkey.from_string(mint)))
+            if address in self.token_accounts:
+                raise EmulatorError(-32002, f"Account already exists: {address}",
+                                    {"reason": REASON_ACCOUNT_EXISTS, "address": address})
+            self._charge_fee(payer)
+            self._create_token_account(payer, owner, mint)
+            return {"address": address, "signature": self._record_signature(str(Signature.new_unique()))}
+
+    def emulator_initializeMetadata(self, payer, mint, name, symbol, uri, mint_authority=None, update_authority=None):
+        with self._atomic():
+            entry = self._mint(mint)
+            if entry["metadata"] is not None:
+                raise EmulatorError(-32002, "Extension already initialized on this account",
+                                    {"reason": REASON_EXTENSION_INITIALIZED})
+            mint_authority = mint_authority or payer
+            if entry["mint_authority"] != mint_authority:
+                raise EmulatorError(-32002, "Transaction simulation failed: owner does not match")
+            self._charge_fee(payer)
+            entry["metadata"] = {
+                "update_authority": update_authority or mint_authority, "name": name, "symbol": symbol, "uri": uri, "additional_metadata": []
+            }
+            self._resize_mint(payer, mint)
+            return self._record_signature(str(Signature.new_unique()))
+
+    def emulator_updateMetadata(self, payer, mint, field, value, authority=None):
+        with self._atomic():
+            entry = self._mint(mint)
+            metadata = entry["metadata"]
+            if metadata is None:
+                raise EmulatorError(-32002, "Transaction simulation failed: invalid account data for instruction")
+            if metadata["update_authority"] != (authority or payer):
+                raise EmulatorError(-32002, "Transaction simulation failed: incorrect update authority")
+            self._charge_fee(payer)
+            if field in ("name", "symbol", "uri"):
+                metadata[field] = value
+            else:
+                metadata["additional_metadata"] = [
+                    (key, old) for key, old in metadata["additional_metadata"] if key != field
+                ] + [(field, value)]
+            self._resize_mint(payer, mint)
+            return self._record_signature(str(Signature.new_unique()))
+
+    def emulator_mintTo(self, payer, mint, owner, ui_amount, mint_authority=None):
+        """
+        owner is the wallet whose associated token account receives the tokens, or that account itself
+        """
+        with self._atomic():
+            entry = self._mint(mint)
+            if entry["mint_authority"] != (mint_authority or payer):
+                raise EmulatorError(-32002, "Transaction simulation failed: owner does not match")
+            if owner in self.token_accounts:
+                address = owner
+            else:
+                address = str(get_associated_token_address(Pubkey.from_string(owner), Pubkey.from_string(mint)))
+            if address not in self.token_accounts:
+                raise EmulatorError(-32002, f"Account {address} not found")
+            amount = Decimal(str(ui_amount)).scaleb(entry["decimals"])
+            if amount != amount.to_integral_value() or amount <= 0:
+                raise EmulatorError(-32602, f"Invalid amount {ui_amount}")
+            self._charge_fee(payer)
+            self._touch(self.token_accounts, address)
+            entry["supply"] += int(amount)
+            self.token_accounts[address]["amount"] += int(amount)
+            return self._record_signature(str(Signature.new_unique()))
+
+    # --- dispatch ---
+
+    def handle(self, method, params=None):
+        """
+        Run one JSON-RPC method in-process and return its result
+        """
+        if method not in RPC_METHODS:
+            raise EmulatorError(-32601, "Method not found")
+        with self.lock:
+            self.method_counts[method] = self.method_counts.get(method, 0) + 1
+            try:
+                return getattr(self, method)(*(params or []))
+            except TypeError as e:
+                raise EmulatorError(-32602, f"Invalid params: {str(e)}")
+
+    def dispatch(self, request):
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            response["result"] = self.handle(request.get("method", ""), request.get("params"))
+        except EmulatorError as e:
+            response["error"] = e.to_json()
+        except InstructionError as e:
+            response["error"] = {"code": -32002, "message": f"Transaction simulation failed: {str(e)}"}
+        return response
@@ -1,26 +1,51 @@
 import os
 import json
+import sys
+import time
 import shutil
+import tempfile
+import asyncio
 import argparse
+import contextlib
 from pathlib import Path
 from datetime import datetime
 from utils.convert_base58 import SolanaKeyConverter
 from pinata.generate_metadata_uri import PinataUploader
+from pinata.generate_metadata_uri_batch import PinataBatchUploader
+from pinata.warm_gateway import GatewayWarmer
+from pinata.storage_backends import STORAGE_BACKENDS
+from pinata.token_metadata import TokenMetadata
 from create_token.create_token import SolanaMainnetScriptRunner
 from create_token.add_token_metadata import AddTokenMetadata
+from create_token.preflight import PreflightCheck
+from create_token.keypair_stock import KeypairStock
+from create_token.spl_token_cli import SplTokenCLI
+from utils.solana_rpc import MAINNET_RPC_URL
+from utils.stage_graph import StageGraph, DONE
+from utils.cassette import Cassette, RECORD, REPLAY
 
 
 class MainScript:
-    def __init__(self, image_path, name, symbol, description, mint_amount):
+    def __init__(self, image_path, name, symbol, description, mint_amount, warm_gateway=False,
+                 storage_backend=None, command_runner=None, rpc_url=MAINNET_RPC_URL, preflight=True,
+                 optimize_image=False, min_ssim=0.98):
         self.image_path = image_path
         self.name = name
         self.symbol = symbol
         self.description = description
         self.mint_amount = mint_amount
+        self.warm_gateway = warm_gateway
+        self.storage_backend = storage_backend
+        self.command_runner = command_runner
+        self.rpc_url = rpc_url
+        self.preflight = preflight
+        self.optimize_image = optimize_image
+        self.min_ssim = min_ssim
         self.metadata_gateway_url = None
-        self.json_path = self.create_metadata_json()
-        self.token_metadata_path = f"./{self.json_path}"
+        self.metadata = self.create_metadata()
         self.to_file_path = None
+        self.token_runner = None
+        self.stage_timings = None
         self.artifact_dir = self.setup_artifact_directory()
 
     def setup_artifact_directory(self):
@@ -33,27 +58,18 @@ class MainScript:
         print(f"Created artifact directory: {artifact_dir}")
         return artifact_dir
 
-    def create_metadata_json(self):
+    def create_metadata(self):
         """
-        Create a metadata JSON file in the tmp directory with the provided attributes
+        Create the in-memory token metadata with the provided attributes.
+        It is only written to disk when the run is archived.
         """
-        tmp_dir = "tmp"
-        os.makedirs(tmp_dir, exist_ok=True)
-
-        metadata = {
-            "name": self.name,
-            "symbol": self.symbol,
-            "description": self.description
-        }
-
-        json_filename = f"{self.name.lower()}_metadata.json"
-        json_path = os.path.join(tmp_dir, json_filename)
-
-        with open(json_path, 'w') as f:
-            json.dump(metadata, f, indent=4)
-
-        print(f"Created metadata JSON at: {json_path}")
-        return json_path
+        metadata = TokenMetadata(
+            name=self.name,
+            symbol=self.symbol,
+            description=self.description
+        )
+        print(f"Created metadata for: {self.name}")
+        return metadata
 
     def check_or_generate_keypair(self):
         if not os.path.exists("solana_keypair.json"):
@@ -76,47 +92,124 @@ class MainScript:
         else:
             print("Warning: No To*.json file found")
 
+    def token_spec(self):
+        return {
+            "name": self.name,
+            "symbol": self.symbol,
+            "image_path": self.image_path,
+            "mint_amount": self.mint_amount,
+            "description": self.description
+        }
+
+    def run_preflight(self):
+        """
+        Validate the token and check the wallet can pay for it before any stage spends time or SOL
+        """
+        PreflightCheck([self.token_spec()], rpc_url=self.rpc_url).run()
+
     def generate_metadata_uri(self):
-        uploader = PinataUploader(self.image_path, self.json_path)
+        uploader = PinataUploader(self.image_path, self.metadata, backend=self.storage_backend,
+                                  optimize_encoding=self.optimize_image, min_ssim=self.min_ssim)
         result = uploader.process()
         self.metadata_gateway_url = result['metadata_gateway_url']
         print(f"Generated Metadata Gateway URL: {self.metadata_gateway_url}")
+        if self.warm_gateway:
+            self.warm_gateway_cache(result)
+
+    def warm_gateway_cache(self, upload_result):
+        """
+        Fetch the freshly pinned image and metadata through the gateway so explorers
+        and wallets don't hit a cold cache, verifying the content on the way
+        """
+        print("\nWarming gateway cache...")
+        GatewayWarmer.from_upload_result(upload_result).process()
 
     def create_token_and_metadata(self):
         print("Running SolanaMainnetScriptRunner...")
-        token_runner = SolanaMainnetScriptRunner()
+        token_runner = SolanaMainnetScriptRunner(command_runner=self.command_runner)
         token_runner.run()
 
         self.find_to_file()
 
         print("Running AddTokenMetadata...")
         metadata_runner = AddTokenMetadata(
-            self.token_metadata_path, 
-            self.metadata_gateway_url, 
-            self.mint_amount
+            self.metadata,
+            self.metadata_gateway_url,
+            self.mint_amount,
+            command_runner=self.command_runner
         )
         metadata_runner.run()
 
+    def generate_mint_keypair(self):
+        self.token_runner = SolanaMainnetScriptRunner(command_runner=self.command_runner)
+        self.token_runner.set_solana_config()
+        self.token_runner.get_wallet_address()
+        self.token_runner.generate_to_keypair()
+
+    def create_mint(self):
+        self.token_runner.create_spl_token()
+        self.token_runner.create_token_account()
+        self.find_to_file()
+
+    def add_token_metadata(self):
+        AddTokenMetadata(
+            self.metadata,
+            self.metadata_gateway_url,
+            self.mint_amount,
+            command_runner=self.command_runner
+        ).add_metadata()
+
+    def mint_supply(self):
+        minter = AddTokenMetadata(
+            self.metadata,
+            self.metadata_gateway_url,
+            self.mint_amount,
+            command_runner=self.command_runner
+        )
+        minter.find_to_file()
+        minter.mint_tokens()
+
+    def build_stage_graph(self):
+        """
+        The off-chain uploads run alongside the keypair grind, the only overlap. The mint is
+        only created once they succeeded (overlapping it with the upload would save one
+        transaction's latency), and the supply only minted once the metadata is on chain,
+        so a failed upload leaves nothing on chain and a token never has supply without metadata
+        """
+        graph = StageGraph()
+        graph.add("wallet", self.check_or_generate_keypair)
+        graph.add("upload", self.generate_metadata_uri)
+        graph.add("grind", self.generate_mint_keypair, deps=["wallet"])
+        graph.add("mint", self.create_mint, deps=["grind", "upload"])
+        graph.add("metadata", self.add_token_metadata, deps=["mint", "upload"])
+        graph.add("supply", self.mint_supply, deps=["metadata"])
+        return graph
+
     def archive_and_cleanup(self):
         """
         Move files to artifact directory and clean up
         """
         try:
-            # Move contents of tmp directory
+            # Archive the metadata exactly as it was uploaded
+            json_path = os.path.join(self.artifact_dir, f"{self.name.lower()}_metadata.json")
+            self.metadata.save(json_path)
+            print(f"Saved metadata JSON to: {json_path}")
+
+            # Remove the tmp directory once no other run of a batch is still staging in it
             tmp_dir = "tmp"
-            if os.path.exists(tmp_dir):
-                for file_name in os.listdir(tmp_dir):
-                    src_path = os.path.join(tmp_dir, file_name)
-                    dst_path = os.path.join(self.artifact_dir, file_name)
-                    shutil.move(src_path, dst_path)
+            if os.path.exists(tmp_dir) and not os.listdir(tmp_dir):
                 os.rmdir(tmp_dir)
-                print(f"Moved tmp directory contents to: {self.artifact_dir}")
 
             # Move To*.json file if it exists
             if self.to_file_path and os.path.exists(self.to_file_path):
                 dst_path = os.path.join(self.artifact_dir, os.path.basename(self.to_file_path))
                 shutil.move(self.to_file_path, dst_path)
                 print(f"Moved {self.to_file_path} to: {self.artifact_dir}")
+            elif self.token_runner and self.token_runner.to_file and os.path.exists(self.token_runner.to_file):
+                # Ground but never minted, so it mustn't be picked up by the next run's To*.json lookup
+                dst_path = os.path.join(self.artifact_dir, f"unused_{self.token_runner.to_file}")
+                shutil.move(self.token_runner.to_file, dst_path)
+                print(f"Moved unused mint keypair {self.token_runner.to_file} to: {self.artifact_dir}")
 
         except Exception as e:
             print(f"Warning: Error during cleanup: {str(e)}")
@@ -135,26 +228,492 @@ class MainScript:
 
     def run(self):
         """
-        Orchestrate all the tasks.
+        Orchestrate all the tasks, running independent stages concurrently.
         """
+        if self.preflight:
+            self.run_preflight()
+        graph = self.build_stage_graph()
         try:
-            self.check_or_generate_keypair()
-            self.generate_metadata_uri()
-            self.create_token_and_metadata()
+            self.stage_timings = asyncio.run(graph.run())
+        except Exception:
+            if graph.status.get("mint") == DONE:
+                unfinished = [name for name in ("metadata", "supply") if graph.status.get(name) != DONE]
+                print(f"\nWarning: token {Path(self.to_file_path).stem if self.to_file_path else '(unknown address)'} "
+                      f"was created on chain, but its {' and '.join(unfinished)} stage did not finish")
+            raise
         finally:
+            graph.print_report()
             self.archive_and_cleanup()
             self.print_explorer_urls()
 
 
+class BatchMainScript:
+    def __init__(self, manifest_path, warm_gateway=False, storage_backend=None, car_path=None,
+                 upload_car=True, command_runner=None, rpc_url=MAINNET_RPC_URL, preflight=True,
+                 cli_backend="subprocess", cli_exec=None, max_concurrency=8, optimize_image=False, min_ssim=0.98,
+                 wallet_pool=None):
+        """
+        cli_backend "async" launches the tokens concurrently through SplTokenCLI (at most
+        max_concurrency CLI processes at once) instead of one after another. cli_exec
+        replaces its subprocess execution, eg. with EmulatedSolanaCLI.exec_async.
+        With a wallet_pool (async backend only) each token's fees and rent are paid by the
+        fee payer the pool assigns to it, and max_concurrency applies per fee payer. The main
+        wallet stays the mint authority, owner and update authority of every token.
+        """
+        if cli_backend not in ("subprocess", "async"):
+            raise ValueError(f"Unknown CLI backend: {cli_backend}")
+        if wallet_pool is not None and cli_backend != "async":
+            raise ValueError("A fee payer pool needs the async CLI backend")
+        self.manifest_path = manifest_path
+        self.warm_gateway = warm_gateway
+        self.storage_backend = storage_backend
+        self.car_path = car_path
+        self.upload_car = upload_car
+        self.command_runner = command_runner
+        self.rpc_url = rpc_url
+        self.preflight = preflight
+        self.cli_backend = cli_backend
+        self.cli_exec = cli_exec
+        self.max_concurrency = max_concurrency
+        self.optimize_image = optimize_image
+        self.min_ssim = min_ssim
+        self.wallet_pool = wallet_pool
+        self.manifest = self.load_manifest()
+        self.scripts = []
+
+    def create_scripts(self):
+        """
+        One MainScript per manifest entry. Only done after preflight, as each creates its artifact directory.
+        """
+        return [
+            MainScript(
+                image_path=entry["image_path"],
+                name=entry["name"],
+                symbol=entry["symbol"],
+                description=entry["description"],
+                mint_amount=entry["mint_amount"],
+                command_runner=self.command_runner,
+                rpc_url=self.rpc_url,
+                preflight=False
+            )
+            for entry in self.manifest
+        ]
+
+    def load_manifest(self):
+        """
+        Load the list of tokens to launch from a JSON manifest file
+        """
+        with open(self.manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if not isinstance(manifest, list) or not manifest:
+            raise ValueError(f"Manifest at {self.manifest_path} must be a non-empty JSON list")
+        print(f"Loaded {len(manifest)} tokens from manifest: {self.manifest_path}")
+        return manifest
+
+    def generate_metadata_uris(self):
+        """
+        Pin the images and metadata of the whole batch with one directory upload each
+        """
+        uploader = PinataBatchUploader([
+            {"name": script.name, "image_path": script.image_path, "metadata": script.metadata}
+            for script in self.scripts
+        ], backend=self.storage_backend, car_path=self.car_path, upload_car=self.upload_car,
+            optimize_encoding=self.optimize_image, min_ssim=self.min_ssim)
+        results = uploader.process()
+        if self.car_path and not self.upload_car:
+            print(f"\nNote: metadata URIs point at content in {self.car_path}, which must be "
+                  f"imported to IPFS before wallets can resolve them")
+        for script, result in zip(self.scripts, results):
+            script.metadata_gateway_url = result['metadata_gateway_url']
+            print(f"{script.name} Metadata Gateway URL: {script.metadata_gateway_url}")
+
+        if self.warm_gateway:
+            print("\nWarming gateway cache...")
+            targets = []
+            for result in results:
+                targets.append({'url': result['image_gateway_url'], 'sha256': result['image_sha256']})
+                targets.append({'url': result['metadata_gateway_url'], 'sha256': result['metadata_sha256']})
+            GatewayWarmer(targets).process()
+
+    def run(self):
+        """
+        Upload all off-chain data once, then create the tokens one after another.
+        The whole manifest and the total cost are checked first, so a bad entry or an
+        underfunded wallet stops the batch before anything is spent.
+        """
+        if self.preflight:
+            PreflightCheck(self.manifest, rpc_url=self.rpc_url, wallet_pool=self.wallet_pool).run()
+        self.scripts = self.create_scripts()
+        self.scripts[0].check_or_generate_keypair()
+        try:
+            self.generate_metadata_uris()
+        except Exception:
+            for script in self.scripts:
+                script.archive_and_cleanup()
+            raise
+
+        if self.cli_backend == "async":
+            asyncio.run(self.create_tokens_async())
+            return
+
+        for script in self.scripts:
+            try:
+                script.create_token_and_metadata()
+            finally:
+                script.archive_and_cleanup()
+                script.print_explorer_urls()
+
+    async def mint_keypairs(self, cli, prefix="To"):
+        """
+        One vanity mint keypair per token in the working directory: claimed from the
+        keypair stock while it lasts, the rest ground with a single solana-keygen run
+        """
+        paths = []
+        stock = KeypairStock.open_default()
+        while stock and len(paths) < len(self.scripts):
+            with stock.claim(prefix) as keypair:
+                if keypair is None:
+                    break
+                paths.append(os.path.abspath(f"{keypair.pubkey()}.json"))
+                with open(paths[-1], 'w') as f:
+                    json.dump(list(bytes(keypair)), f)
+
+        missing = len(self.scripts) - len(paths)
+        if missing:
+            print(f"Grinding {missing} mint keypairs starting with {prefix}...")
+            with tempfile.TemporaryDirectory(prefix="batch-grind-") as directory:
+                for path in await cli.grind_keypairs(prefix, missing, directory):
+                    paths.append(os.path.abspath(os.path.basename(path)))
+                    shutil.move(path, paths[-1])
+        return paths
+
+    async def launch_async(self, cli, script, keypair_path):
+        # Archived with the run whatever happens, so a later run never reuses the mint keypair
+        script.to_file_path = keypair_path
+        try:
+            launched = await cli.launch(keypair_path, script.name, script.symbol, script.metadata_gateway_url,
+                                        script.mint_amount)
+            print(f"{script.name}: created {launched.mint} with token account {launched.account} "
+                  f"in {len(launched.signatures)} transactions")
+        finally:
+            script.archive_and_cleanup()
+            script.print_explorer_urls()
+
+    async def launch_pooled(self, clis, script, keypair_path):
+        """
+        Launch one token with the fee payer the pool assigns, and its CLI runner
+        """
+        wallet = await asyncio.to_thread(self.wallet_pool.acquire)
+        start = time.perf_counter()
+        success = False
+        try:
+            print(f"{script.name}: fee payer {wallet.address}")
+            await self.launch_async(clis[wallet.address], script, keypair_path)
+            success = True
+        finally:
+            await asyncio.to_thread(self.wallet_pool.release, wallet, time.perf_counter() - start, success)
+
+    async def create_tokens_async(self):
+        """
+        Create every token of the batch concurrently. A failed token doesn't stop the
+        others; the first failure is raised once they have all finished.
+        """
+        with contextlib.ExitStack() as stack:
+            if self.wallet_pool is None:
+                cli = stack.enter_context(SplTokenCLI(rpc_url=self.rpc_url, max_concurrency=self.max_concurrency,
+                                                      exec_command=self.cli_exec))
+                keypair_paths = await self.mint_keypairs(cli)
+                launches = [self.launch_async(cli, script, path) for script, path in zip(self.scripts, keypair_paths)]
+            else:
+                # One runner (and private CLI config) per fee payer, all acting for the main wallet
+                clis = {
+                    wallet.address: stack.enter_context(SplTokenCLI(
+                        rpc_url=self.rpc_url, fee_payer_path=wallet.keypair_path, max_concurrency=self.max_concurrency,
+                        exec_command=self.cli_exec
+                    ))
+                    for wallet in self.wallet_pool.wallets
+                }
+                keypair_paths = await self.mint_keypairs(next(iter(clis.values())))
+                launches = [self.launch_pooled(clis, script, path) for script, path in zip(self.scripts, keypair_paths)]
+            results = await asyncio.gather(*launches, return_exceptions=True)
+        if self.wallet_pool is not None:
+            self.wallet_pool.print_stats()
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            print(f"{len(errors)} of {len(self.scripts)} tokens failed")
+            raise errors[0]
+
+
+def run_batch(argv):
+    parser = argparse.ArgumentParser(prog='main.py batch', description='Create several Solana tokens from a manifest')
+    parser.add_argument('manifest', type=str, help='Path to a JSON list of tokens, each with name, symbol, image_path, mint_amount and description')
+    parser.add_argument('--warm-gateway', action='store_true', help='Fetch the pinned images and metadata through the gateway after upload and verify them')
+    parser.add_argument('--storage', choices=sorted(STORAGE_BACKENDS), default='pinata', help='Where to pin images and metadata (default: pinata)')
+    parser.add_argument('--car', type=str, default=None, help='Pack the batch into this local CAR archive and import it with one request')
+    parser.add_argument('--car-offline', action='store_true', help='Only write the CAR archive, for importing it elsewhere')
+    parser.add_argument('--rpc-url', type=str, default='https://api.mainnet-beta.solana.com', help='Solana RPC endpoint used for the preflight checks')
+    parser.add_argument('--skip-preflight', action='store_true', help='Start without validating the manifest and wallet balance first')
+    parser.add_argument('--cli-backend', choices=['subprocess', 'async'], default='subprocess', help='Create the tokens one after another, or concurrently with isolated CLI configs (default: subprocess)')
+    parser.add_argument('--max-concurrency', type=int, default=8, help='Maximum CLI processes at once with --cli-backend async (default: 8)')
+    parser.add_argument('--optimize-image', action='store_true', help='Save each image in its smallest JPEG/WebP/PNG encoding that keeps the quality threshold')
+    parser.add_argument('--min-ssim', type=float, default=0.98, help='Quality threshold (SSIM against the resized image) for --optimize-image (default: 0.98)')
+    parser.add_argument('--fee-payers', nargs='*', metavar='KEYPAIR', default=None, help='Spread the fees over a pool of keypair files or directories, or the FEE_PAYER_PRIVATE_KEYS in .env when none are given (needs --cli-backend async)')
+    parser.add_argument('--fee-payer-key-dir', type=str, default=None, help='Keep the keypair files the CLIs need for the FEE_PAYER_PRIVATE_KEYS in this directory and reuse them across runs (default: FEE_PAYER_KEY_DIR in .env, else a temporary directory removed after the batch)')
+    parser.add_argument('--treasury', type=str, default=None, help='Keypair topping up low fee payers of the pool (default: TREASURY_PRIVATE_KEY in .env, if set)')
+    parser.add_argument('--wallet-strategy', choices=['least-in-flight', 'balance'], default='least-in-flight', help='How tokens are assigned to fee payers (default: least-in-flight)')
+    parser.add_argument('--top-up-below', type=float, default=0.05, help='Top up a fee payer from the treasury once it holds less SOL than this (default: 0.05)')
+    parser.add_argument('--top-up-amount', type=float, default=0.25, help='SOL sent per top-up (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    if args.car_offline and not args.car:
+        parser.error("--car-offline requires --car")
+    if args.car and not args.car_offline and not STORAGE_BACKENDS[args.storage].supports_car_import:
+        parser.error(f"--storage {args.storage} can't import CAR archives: use --storage local-ipfs, or add --car-offline")
+    if args.fee_payers is not None and args.cli_backend != 'async':
+        parser.error("--fee-payers requires --cli-backend async")
+    if not 0 < args.min_ssim <= 1:
+        parser.error("--min-ssim must be greater than 0 and at most 1")
+
+    wallet_pool = None
+    if args.fee_payers is not None:
+        from create_token.wallet_pool import WalletPool, LAMPORTS_PER_SOL
+
+        pool_options = dict(
+            rpc_url=args.rpc_url,
+            strategy=args.wallet_strategy,
+            top_up_below=int(args.top_up_below * LAMPORTS_PER_SOL),
+            top_up_amount=int(args.top_up_amount * LAMPORTS_PER_SOL),
+            key_directory=args.fee_payer_key_dir
+        )
+        if args.fee_payers:
+            wallet_pool = WalletPool.from_paths(args.fee_payers, treasury_path=args.treasury, **pool_options)
+        else:
+            wallet_pool = WalletPool.from_env(treasury_path=args.treasury, **pool_options)
+
+    with wallet_pool or contextlib.nullcontext():
+        BatchMainScript(
+            args.manifest,
+            warm_gateway=args.warm_gateway,
+            storage_backend=STORAGE_BACKENDS[args.storage](),
+            car_path=args.car,
+            upload_car=not args.car_offline,
+            rpc_url=args.rpc_url,
+            preflight=not args.skip_preflight,
+            cli_backend=args.cli_backend,
+            max_concurrency=args.max_concurrency,
+            optimize_image=args.optimize_image,
+            min_ssim=args.min_ssim,
+            wallet_pool=wallet_pool
+        ).run()
+
+
+def run_serve(argv):
+    parser = argparse.ArgumentParser(prog='main.py serve', description='Run the token job daemon with a local HTTP API')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8787, help='Port to listen on (default: 8787)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes (default: 1)')
+    parser.add_argument('--db', type=str, default='jobs.sqlite3', help='Path of the SQLite job queue (default: jobs.sqlite3)')
+    parser.add_argument('--workspace', type=str, default='daemon', help='Directory holding one working directory per worker (default: daemon)')
+    parser.add_argument('--rpc-url', type=str, default='https://api.mainnet-beta.solana.com', help='Solana RPC endpoint')
+    parser.add_argument('--max-restarts', type=int, default=8, help='Crashes in a row after which a worker is left stopped (default: 8)')
+    args = parser.parse_args(argv)
+
+    from service.job_server import TokenJobService
+
+    TokenJobService(
+        db_path=args.db,
+        workers=args.workers,
+        host=args.host,
+        port=args.port,
+        workspace=args.workspace,
+        rpc_url=args.rpc_url,
+        max_restarts=args.max_restarts
+    ).serve_forever()
+
+
+def run_distribute(argv):
+    parser = argparse.ArgumentParser(prog='main.py distribute', description='Distribute a token to many recipients from a CSV')
+    parser.add_argument('mint', type=str, help='Mint address of the token to distribute')
+    parser.add_argument('recipients', type=str, help='CSV file of recipient,amount rows (amounts in whole tokens)')
+    parser.add_argument('--keypair', type=str, default='solana_keypair.json', help='Fee payer and source token owner keypair (default: solana_keypair.json)')
+    parser.add_argument('--rpc-url', type=str, default='https://api.mainnet-beta.solana.com', help='Solana RPC endpoint')
+    parser.add_argument('--ledger', type=str, default=None, help='Progress ledger path, used to resume (default: <recipients>.ledger.jsonl)')
+    parser.add_argument('--max-in-flight', type=int, default=8, help='Maximum unconfirmed transactions at once (default: 8)')
+    parser.add_argument('--lookup-table', choices=['auto', 'always', 'never'], default='auto', help='Use an address lookup table for the shared accounts (default: auto)')
+    parser.add_argument('--priority-fee', type=int, default=0, help='Compute unit price in micro-lamports (default: 0)')
+    args = parser.parse_args(argv)
+
+    from create_token.distribute_tokens import TokenDistributor
+
+    TokenDistributor(
+        args.mint,
+        args.recipients,
+        keypair_path=args.keypair,
+        rpc_url=args.rpc_url,
+        ledger_path=args.ledger,
+        max_in_flight=args.max_in_flight,
+        lookup_table=args.lookup_table,
+        priority_fee=args.priority_fee
+    ).run()
+
+
+def run_snapshot(argv):
+    parser = argparse.ArgumentParser(prog='main.py snapshot', description='Export the holders and balances of a Token-2022 mint')
+    parser.add_argument('mint', type=str, help='Mint address of the token')
+    parser.add_argument('--output', type=str, default=None, help='CSV file, or .parquet (needs pyarrow) (default: <mint>_holders.csv)')
+    parser.add_argument('--rpc-url', type=str, default='https://api.mainnet-beta.solana.com', help='Solana RPC endpoint (must allow getProgramAccounts)')
+    parser.add_argument('--single-query', dest='shard_by_owner', action='store_false', help="Fetch all accounts in one RPC response instead of 256 by owner, for small mints")
+    parser.add_argument('--include-empty', action='store_true', help='Also export token accounts with a zero balance')
+    args = parser.parse_args(argv)
+
+    from create_token.holder_snapshot import HolderSnapshot
+
+    HolderSnapshot(
+        args.mint,
+        args.output or f"{args.mint}_holders.csv",
+        rpc_url=args.rpc_url,
+        shard_by_owner=args.shard_by_owner,
+        include_empty=args.include_empty
+    ).run()
+
+
+def run_update_metadata(argv):
+    parser = argparse.ArgumentParser(prog='main.py update-metadata', description='Update the on-chain metadata of many existing tokens')
+    parser.add_argument('mapping', type=str, help='JSON object of mint -> {field: value}, or a CSV with columns mint,name,symbol,uri (empty cells are left unchanged)')
+    parser.add_argument('--keypair', type=str, default='solana_keypair.json', help='Fee payer and update authority keypair (default: solana_keypair.json)')
+    parser.add_argument('--rpc-url', type=str, default='https://api.mainnet-beta.solana.com', help='Solana RPC endpoint')
+    parser.add_argument('--ledger', type=str, default=None, help='Resumable ledger file (default: <mapping>.ledger.jsonl)')
+    parser.add_argument('--max-workers', type=int, default=8, help='Tokens updated at once (default: 8)')
+    parser.add_argument('--priority-fee', type=int, default=0, help='Compute unit price in micro-lamports (default: 0)')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the changes each token needs')
+    args = parser.parse_args(argv)
+
+    from create_token.update_metadata import BulkMetadataUpdater
+
+    BulkMetadataUpdater(
+        args.mapping,
+        keypair_path=args.keypair,
+        rpc_url=args.rpc_url,
+        ledger_path=args.ledger,
+        max_workers=args.max_workers,
+        priority_fee=args.priority_fee,
+        dry_run=args.dry_run
+    ).run()
+
+
+def run_loadtest(argv):
+    parser = argparse.ArgumentParser(prog='main.py loadtest', description='Load test the token pipeline offline against an emulated Solana RPC and Pinata')
+    parser.add_argument('--runs', type=int, default=20, help='Number of runs, or of batches with --mode batch (default: 20)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Worker processes running at once (default: 4)')
+    parser.add_argument('--mode', choices=['single', 'batch'], default='single', help='Run MainScript per token or BatchMainScript per batch (default: single)')
+    parser.add_argument('--batch-size', type=int, default=10, help='Tokens per batch with --mode batch (default: 10)')
+    parser.add_argument('--image', type=str, default=None, help='Token image to use (default: a generated 1024x1024 image)')
+    parser.add_argument('--workspace', type=str, default='loadtest', help='Directory holding one working directory per worker (default: loadtest)')
+    parser.add_argument('--warm-gateway', action='store_true', help='Also fetch and verify the pinned content through the fake gateway')
+    parser.add_argument('--cli-backend', choices=['subprocess', 'async'], default='subprocess', help='CLI backend of the batches with --mode batch (default: subprocess)')
+    for service in ('rpc', 'pinata'):
+        parser.add_argument(f'--{service}-latency', type=float, default=0.0, help=f'Mean added {service} latency in ms')
+        parser.add_argument(f'--{service}-jitter', type=float, default=0.0, help=f'Standard deviation of the {service} latency in ms')
+        parser.add_argument(f'--{service}-drop-rate', type=float, default=0.0, help=f'Fraction of {service} requests dropped')
+        parser.add_argument(f'--{service}-429-rate', type=float, default=0.0, help=f'Fraction of {service} requests answered with 429')
+        parser.add_argument(f'--{service}-max-rps', type=float, default=None, help=f'Requests per second the {service} service allows before answering 429')
+    args = parser.parse_args(argv)
+
+    from emulator.http_server import FaultInjector
+    from emulator.load_runner import LoadTest
+
+    faults = {
+        service: FaultInjector(
+            latency_ms=getattr(args, f'{service}_latency'),
+            jitter_ms=getattr(args, f'{service}_jitter'),
+            drop_rate=getattr(args, f'{service}_drop_rate'),
+            rate_limit_rate=getattr(args, f'{service}_429_rate'),
+            max_rps=getattr(args, f'{service}_max_rps')
+        )
+        for service in ('rpc', 'pinata')
+    }
+    LoadTest(
+        runs=args.runs,
+        concurrency=args.concurrency,
+        mode=args.mode,
+        batch_size=args.batch_size,
+        image_path=args.image,
+        workspace=args.workspace,
+        warm_gateway=args.warm_gateway,
+        rpc_faults=faults['rpc'],
+        pinata_faults=faults['pinata'],
+        cli_backend=args.cli_backend
+    ).run()
+
+
+def run_keygen_stock(argv):
+    parser = argparse.ArgumentParser(prog='main.py keygen-stock', description='Keep an encrypted stock of pre-ground vanity mint keypairs')
+    parser.add_argument('patterns', nargs='*', default=['To:20'], help='PREFIX:TARGET pairs to keep in stock (default: To:20)')
+    parser.add_argument('--db', type=str, default=None, help='Stock database (default: KEYPAIR_STOCK_DB or keypair_stock.sqlite3)')
+    parser.add_argument('--low-watermark', type=float, default=0.5, help='Refill a pattern once it falls to this fraction of its target (default: 0.5)')
+    parser.add_argument('--batch-size', type=int, default=10, help='Keypairs ground per solana-keygen run (default: 10)')
+    parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds between stock checks (default: 5)')
+    parser.add_argument('--once', action='store_true', help='Fill the stock up once and exit')
+    args = parser.parse_args(argv)
+
+    from create_token.keypair_stock import KeypairStock, KeypairStocker
+
+    targets = {}
+    for pattern in args.patterns:
+        prefix, _, target = pattern.partition(':')
+        targets[prefix] = int(target or 20)
+    counts = KeypairStocker(
+        KeypairStock(args.db),
+        targets,
+        low_watermark=args.low_watermark,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval
+    ).run(once=args.once)
+    print(f"Keypairs in stock: {counts}")
+
+
+COMMANDS = {
+    "batch": run_batch,
+    "serve": run_serve,
+    "distribute": run_distribute,
+    "snapshot": run_snapshot,
+    "update-metadata": run_update_metadata,
+    "loadtest": run_loadtest,
+    "keygen-stock": run_keygen_stock,
+}
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description='Create a Solana token with metadata')
     parser.add_argument('name', type=str, help='Token name -- eg. "SPT" (in quotes, it has to be one word, no spaces)')
     parser.add_argument('symbol', type=str, help='Token symbol -- eg. "SampleToken" (in quotes, it has to be one word, no spaces)')
     parser.add_argument('image_path', type=str, help='Path to the token image -- eg. "/path/to/sampletoken_image.jpeg" (in quotes, no spaces)')
     parser.add_argument('mint_amount', type=int, help='Amount of tokens to mint -- eg. 1000000 (integer)')
     parser.add_argument('description', type=str, help='TToken description -- eg. "This is a test token" (in quotes)')
+    parser.add_argument('--warm-gateway', action='store_true', help='Fetch the pinned image and metadata through the gateway after upload and verify them')
+    parser.add_argument('--storage', choices=sorted(STORAGE_BACKENDS), default='pinata', help='Where to pin the image and metadata (default: pinata)')
+    parser.add_argument('--rpc-url', type=str, default='https://api.mainnet-beta.solana.com', help='Solana RPC endpoint used for the preflight checks')
+    parser.add_argument('--skip-preflight', action='store_true', help='Start without validating the token and wallet balance first')
+    parser.add_argument('--optimize-image', action='store_true', help='Save the image in its smallest JPEG/WebP/PNG encoding that keeps the quality threshold')
+    parser.add_argument('--min-ssim', type=float, default=0.98, help='Quality threshold (SSIM against the resized image) for --optimize-image (default: 0.98)')
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', type=str, metavar='CASSETTE', default=None, help='Record every command, HTTP request and RPC call of the run to a cassette file')
+    cassette_group.add_argument('--replay', type=str, metavar='CASSETTE', default=None, help='Replay a recorded cassette offline instead of calling out')
+    parser.add_argument('--realtime', action='store_true', help='With --replay, wait out each interaction\'s recorded duration')
 
     args = parser.parse_args()
+    if not 0 < args.min_ssim <= 1:
+        parser.error("--min-ssim must be greater than 0 and at most 1")
+
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.record, mode=RECORD)
+    elif args.replay:
+        cassette = Cassette(args.replay, mode=REPLAY, realtime=args.realtime)
 
     # Instantiate and run the script with command line arguments
     script = MainScript(
@@ -162,6 +721,14 @@ if __name__ == "__main__":
         name=args.name,
         symbol=args.symbol,
         description=args.description,
-        mint_amount=args.mint_amount
+        mint_amount=args.mint_amount,
+        warm_gateway=args.warm_gateway,
+        storage_backend=STORAGE_BACKENDS[args.storage](),
+        rpc_url=args.rpc_url,
+        preflight=not args.skip_preflight,
+        optimize_image=args.optimize_image,
+        min_ssim=args.min_ssim,
+        command_runner=cassette.command_runner() if cassette else None
     )
-    script.run()
\ No newline at end of file
+    with cassette or contextlib.nullcontext():
+        script.run()
\ No newline at end of file
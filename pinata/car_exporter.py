@@ -0,0 +1,181 @@
+import hashlib
+from pinata.ipfs_cid import (
+    CODEC_DAG_PB, CODEC_RAW, encode_varint, cid_v1_bytes, cid_to_string, cid_from_string
+)
+
+# UnixFS node types
+UNIXFS_DIRECTORY = 1
+UNIXFS_FILE = 2
+
+
+def _pb_key(field, wire_type):
+    return encode_varint((field << 3) | wire_type)
+
+
+def _pb_bytes(field, value):
+    return _pb_key(field, 2) + encode_varint(len(value)) + value
+
+
+def _pb_varint(field, value):
+    return _pb_key(field, 0) + encode_varint(value)
+
+
+def _cbor_head(major, length):
+    """
+    CBOR initial byte(s) for the given major type and length/value
+    """
+    if length < 24:
+        return bytes([(major << 5) | length])
+    if length < 0x100:
+        return bytes([(major << 5) | 24, length])
+    if length < 0x10000:
+        return bytes([(major << 5) | 25]) + length.to_bytes(2, "big")
+    return bytes([(major << 5) | 26]) + length.to_bytes(4, "big")
+
+
+class CARExporter:
+    def __init__(self, chunk_size=262144, max_links=174):
+        """
+        Build UnixFS DAGs in memory and export them as a CARv1 archive.
+        Uses the same layout as `ipfs add --cid-version=1` (256 KiB chunks, raw leaves,
+        balanced tree of at most 174 links per node), so the CIDs computed here are the
+        ones any IPFS node or pinning service will report after importing the archive.
+        """
+        self.chunk_size = chunk_size
+        self.max_links = max_links
+        self.blocks = {}
+
+    def _put(self, codec, data):
+        cid = cid_v1_bytes(codec, hashlib.sha256(data).digest())
+        self.blocks.setdefault(cid, data)
+        return cid
+
+    def _encode_node(self, links, unixfs_data):
+        """
+        Encode a dag-pb PBNode. Links are serialized before Data, as the dag-pb spec requires.
+        """
+        out = bytearray()
+        for cid, name, tsize in links:
+            link = _pb_bytes(1, cid) + _pb_bytes(2, name.encode("utf-8")) + _pb_varint(3, tsize)
+            out += _pb_bytes(2, link)
+        out += _pb_bytes(1, unixfs_data)
+        return bytes(out)
+
+    def add_bytes(self, data):
+        """
+        Add a file's content. Returns (cid, tsize, filesize) of the file root.
+        """
+        chunks = [data[i:i + self.chunk_size] for i in range(0, len(data), self.chunk_size)] or [b""]
+        nodes = [(self._put(CODEC_RAW, chunk), len(chunk), len(chunk)) for chunk in chunks]
+
+        while len(nodes) > 1:
+            parents = []
+            for i in range(0, len(nodes), self.max_links):
+                children = nodes[i:i + self.max_links]
+                filesize = sum(child[2] for child in children)
+                unixfs = _pb_varint(1, UNIXFS_FILE) + _pb_varint(3, filesize)
+                for child in children:
+                    unixfs += _pb_varint(4, child[2])
+                block = self._encode_node([(cid, "", tsize) for cid, tsize, _ in children], unixfs)
+                tsize = len(block) + sum(child[1] for child in children)
+                parents.append((self._put(CODEC_DAG_PB, block), tsize, filesize))
+            nodes = parents
+
+        return nodes[0]
+
+    def add_file(self, file_path):
+        """
+        Add a local file. Returns (cid, tsize, filesize) of the file root.
+        """
+        with open(file_path, 'rb') as f:
+            return self.add_bytes(f.read())
+
+    def add_directory(self, entries):
+        """
+        Add a directory node.
+
+        Args:
+            entries (dict): Mapping of entry name to the (cid, tsize, ...) tuple returned by add_*
+
+        Returns:
+            tuple: (cid, tsize) of the directory
+        """
+        links = sorted(
+            ((entry[0], name, entry[1]) for name, entry in entries.items()),
+            key=lambda link: link[1].encode("utf-8")
+        )
+        block = self._encode_node(links, _pb_varint(1, UNIXFS_DIRECTORY))
+        tsize = len(block) + sum(link[2] for link in links)
+        return self._put(CODEC_DAG_PB, block), tsize
+
+    def add_files_as_directory(self, files):
+        """
+        Add several files wrapped in one directory.
+
+        Args:
+            files (dict): Mapping of file name inside the directory to a local file path
+                          or to the file content as bytes
+
+        Returns:
+            str: CID of the directory
+        """
+        entries = {
+            name: self.add_bytes(content) if isinstance(content, bytes) else self.add_file(content)
+            for name, content in files.items()
+        }
+        cid, _ = self.add_directory(entries)
+        return cid_to_string(cid)
+
+    def _encode_header(self, roots):
+        """
+        DAG-CBOR encoding of {"roots": [...], "version": 1} with keys in canonical order
+        """
+        out = bytearray(_cbor_head(5, 2))
+        out += _cbor_head(3, 5) + b"roots"
+        out += _cbor_head(4, len(roots))
+        for root in roots:
+            # CIDs are tag 42 over a byte string with a leading multibase identity prefix
+            out += b"\xd8\x2a" + _cbor_head(2, len(root) + 1) + b"\x00" + root
+        out += _cbor_head(3, 7) + b"version"
+        out += _cbor_head(0, 1)
+        return bytes(out)
+
+    def write(self, output_path, roots):
+        """
+        Write every block added so far to a CARv1 file
+
+        Args:
+            output_path (str): Path of the .car file to write
+            roots (list): Root CID strings recorded in the archive header
+
+        Returns:
+            dict: Path, roots, block count and size of the archive
+        """
+        root_bytes = [cid_from_string(root) for root in roots]
+        header = self._encode_header(root_bytes)
+        size = 0
+        with open(output_path, 'wb') as f:
+            size += f.write(encode_varint(len(header)) + header)
+            for cid, block in self.blocks.items():
+                size += f.write(encode_varint(len(cid) + len(block)) + cid + block)
+        print(f"Wrote CAR archive with {len(self.blocks)} blocks ({size} bytes) to {output_path}")
+        return {
+            'car_path': output_path,
+            'roots': list(roots),
+            'blocks': len(self.blocks),
+            'bytes': size
+        }
+
+
+if __name__ == "__main__":
+    files = {
+        "sampletoken1.jpeg": "token_metadata/sampletoken1_image.jpeg"
+    }
+
+    try:
+        exporter = CARExporter()
+        root = exporter.add_files_as_directory(files)
+        print(f"Directory CID: {root}")
+        exporter.write("token_metadata/images.car", [root])
+    except Exception as e:
+        print(f"Error: {str(e)}")
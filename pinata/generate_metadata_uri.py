@@ -1,17 +1,24 @@
 import os
+import mimetypes
 from pathlib import Path
 from pinata.resize_image import ImageResizer
-from pinata.upload_image_to_pinata_ifps import PinataIPFSUploader
+from pinata.ipfs_cid import file_sha256, raw_cid
+from pinata.token_metadata import TokenMetadata
 from pinata.generate_metadata_json import MetadataJSONGenerator
-from pinata.upload_metadata_uri_to_pinata_ifps import PinataJSONUploader
+from pinata.storage_backends import PinataStorageBackend
 
 class PinataUploader:
-    def __init__(self, image_path, json_path):
+    def __init__(self, image_path, metadata, backend=None, optimize_encoding=False, min_ssim=0.98):
         """
-        Initialize the uploader with paths for image and JSON
+        Initialize the uploader with the image path, the in-memory TokenMetadata,
+        and the storage backend to pin them with (Pinata unless given).
+        optimize_encoding and min_ssim are passed on to the ImageResizer.
         """
         self.image_path = image_path
-        self.json_path = json_path
+        self.metadata = metadata
+        self.backend = backend or PinataStorageBackend()
+        self.optimize_encoding = optimize_encoding
+        self.min_ssim = min_ssim
         self.resized_image_path = self._get_resized_path(image_path)
 
     def _get_resized_path(self, original_path):
@@ -26,26 +33,35 @@ class PinataUploader:
         try:
             # 1. Resize the image
             print("\nResizing image...")
-            resizer = ImageResizer(self.image_path, self.resized_image_path)
+            resizer = ImageResizer(self.image_path, self.resized_image_path,
+                                   optimize_encoding=self.optimize_encoding, min_ssim=self.min_ssim)
             resizer.process()
+            # The optimized encoding may have changed the extension
+            self.resized_image_path = resizer.output_path
 
             # 2. Upload resized image to IPFS
             print("\nUploading image to IPFS...")
-            image_uploader = PinataIPFSUploader()
-            image_result = image_uploader.pin_file_to_ipfs(self.resized_image_path)
+            image_result = self.backend.pin_file(self.resized_image_path)
             print(f"Image Gateway URL: {image_result['gateway_url']}")
+            image_sha256 = file_sha256(self.resized_image_path)
 
-            # 3. Update JSON with image gateway URL
-            print("\nUpdating metadata JSON...")
-            json_generator = MetadataJSONGenerator(self.json_path, image_result['gateway_url'])
-            updated_json = json_generator.add_image_attribute()
-            print("Metadata JSON updated successfully")
+            # 3. Update metadata with image gateway URL
+            print("\nUpdating metadata...")
+            json_generator = MetadataJSONGenerator(
+                self.metadata,
+                image_result['gateway_url'],
+                mimetypes.guess_type(self.resized_image_path)[0]
+            )
+            json_generator.add_image_attribute()
+            print("Metadata updated successfully")
 
-            # 4. Upload updated JSON to IPFS
+            # 4. Upload metadata to IPFS
             print("\nUploading metadata to IPFS...")
-            json_uploader = PinataJSONUploader()
-            metadata_result = json_uploader.pin_json_to_ipfs(self.json_path)
-            
+            metadata_result = self.backend.pin_json(self.metadata)
+            expected_cid = raw_cid(self.metadata.to_json_bytes())
+            if metadata_result['IpfsHash'] != expected_cid:
+                print(f"Warning: metadata pinned as {metadata_result['IpfsHash']}, expected {expected_cid}")
+
             # 5. Clean up resized image
             if os.path.exists(self.resized_image_path):
                 os.remove(self.resized_image_path)
@@ -53,8 +69,10 @@ class PinataUploader:
             return {
                 'image_ipfs_hash': image_result['IpfsHash'],
                 'image_gateway_url': image_result['gateway_url'],
+                'image_sha256': image_sha256,
                 'metadata_ipfs_hash': metadata_result['IpfsHash'],
                 'metadata_gateway_url': metadata_result['gateway_url'],
+                'metadata_sha256': self.metadata.sha256(),
                 'metadata_ipfs_url': metadata_result['ipfs_url']
             }
 
@@ -71,7 +89,7 @@ if __name__ == "__main__":
     json_path = "token_metadata/sampletoken1.json"
 
     try:
-        uploader = PinataUploader(image_path, json_path)
+        uploader = PinataUploader(image_path, TokenMetadata.load(json_path))
         result = uploader.process()
         
         print("\nProcess completed successfully!")
@@ -0,0 +1,221 @@
+import os
+import hashlib
+import shutil
+from pathlib import Path
+from pinata.resize_image import ImageResizer
+from pinata.ipfs_cid import file_sha256
+from pinata.car_exporter import CARExporter
+from pinata.token_metadata import TokenMetadata
+from pinata.generate_metadata_json import MetadataJSONGenerator
+from pinata.storage_backends import PinataStorageBackend
+
+class PinataBatchUploader:
+    def __init__(self, tokens, staging_dir="tmp/batch", backend=None, car_path=None, upload_car=True,
+                 optimize_encoding=False, min_ssim=0.98):
+        """
+        Initialize the batch uploader with the tokens of one launch
+
+        Args:
+            tokens (list): Dicts with 'name', 'image_path' and 'metadata' (TokenMetadata) for each token
+            staging_dir (str): Directory used to stage resized images
+            backend (StorageBackend): Backend to pin with (Pinata unless given)
+            car_path (str): When set, build the batch locally into this CAR archive
+                            instead of uploading the directories one by one
+            upload_car (bool): Import the CAR archive through the backend once written.
+                               Disable for an offline handoff of the archive.
+            optimize_encoding (bool): Save each image in its smallest encoding with SSIM >= min_ssim
+        """
+        self.tokens = tokens
+        self.staging_dir = staging_dir
+        self.backend = backend or PinataStorageBackend()
+        self.car_path = car_path
+        self.upload_car = upload_car
+        if car_path and upload_car and not self.backend.supports_car_import:
+            # Fail before the batch is resized and packed, not after
+            raise ValueError(f"{type(self.backend).__name__} can't import CAR archives")
+        self.optimize_encoding = optimize_encoding
+        self.min_ssim = min_ssim
+        # Staged image file names, once the encoding has picked their extension
+        self.image_file_names = {}
+        self.images_dir = os.path.join(staging_dir, "images")
+        self._check_unique_names()
+
+    def _check_unique_names(self):
+        """Every token becomes a file in the same directory, so names must not collide"""
+        seen = set()
+        for token in self.tokens:
+            key = token['name'].lower()
+            if key in seen:
+                raise ValueError(f"Duplicate token name in batch: {token['name']}")
+            seen.add(key)
+
+    def _image_file_name(self, token):
+        if token['name'] in self.image_file_names:
+            return self.image_file_names[token['name']]
+        return f"{token['name'].lower()}{Path(token['image_path']).suffix.lower()}"
+
+    def _metadata_file_name(self, token):
+        return f"{token['name'].lower()}.json"
+
+    def resize_images(self):
+        """
+        Resize every token image into the staging images directory
+        """
+        os.makedirs(self.images_dir, exist_ok=True)
+        image_files = {}
+        saved_bytes = 0
+        for token in self.tokens:
+            output_path = os.path.join(self.images_dir, self._image_file_name(token))
+            resizer = ImageResizer(token['image_path'], output_path,
+                                   optimize_encoding=self.optimize_encoding, min_ssim=self.min_ssim)
+            resizer.process()
+            if resizer.encoding_report:
+                saved_bytes += resizer.encoding_report['saved_bytes']
+            file_name = os.path.basename(resizer.output_path)
+            self.image_file_names[token['name']] = file_name
+            image_files[file_name] = resizer.output_path
+        if self.optimize_encoding:
+            print(f"Encoding selection saved {saved_bytes:,} bytes across {len(self.tokens)} images")
+        return image_files
+
+    def stage_metadata(self, image_urls):
+        """
+        Add the image URL to every token's metadata and serialize it for the directory upload
+        """
+        metadata_files = {}
+        for token in self.tokens:
+            image_url = image_urls[self._image_file_name(token)]
+            MetadataJSONGenerator(token['metadata'], image_url).add_image_attribute()
+            metadata_files[self._metadata_file_name(token)] = token['metadata'].to_json_bytes()
+        return metadata_files
+
+    def build_results(self, image_root, image_urls, image_files, metadata_root, metadata_urls, metadata_files):
+        """
+        Per-token results, with the same keys as PinataUploader.process
+        """
+        results = []
+        for token in self.tokens:
+            image_name = self._image_file_name(token)
+            metadata_name = self._metadata_file_name(token)
+            results.append({
+                'name': token['name'],
+                'image_ipfs_hash': f"{image_root}/{image_name}",
+                'image_gateway_url': image_urls[image_name],
+                'image_sha256': file_sha256(image_files[image_name]),
+                'metadata_ipfs_hash': f"{metadata_root}/{metadata_name}",
+                'metadata_gateway_url': metadata_urls[metadata_name],
+                'metadata_sha256': hashlib.sha256(metadata_files[metadata_name]).hexdigest(),
+                'metadata_ipfs_url': f"ipfs://{metadata_root}/{metadata_name}"
+            })
+        return results
+
+    def upload_directories(self, image_files):
+        """
+        Pin all images of the batch as one directory, then all metadata JSONs as another.
+        Issues two requests in total instead of two per token.
+        """
+        # 2. Upload all resized images as one directory
+        print("\nUploading image directory to IPFS...")
+        image_result = self.backend.pin_directory(image_files, "images")
+        print(f"Image directory Gateway URL: {image_result['gateway_url']}")
+
+        # 3. Update every token's metadata with its image URL
+        print("\nUpdating metadata...")
+        metadata_files = self.stage_metadata(image_result['file_urls'])
+        print("Metadata updated successfully")
+
+        # 4. Upload all metadata JSONs as one directory
+        print("\nUploading metadata directory to IPFS...")
+        metadata_result = self.backend.pin_directory(metadata_files, "metadata")
+        print(f"Metadata directory Gateway URL: {metadata_result['gateway_url']}")
+
+        return self.build_results(
+            image_result['IpfsHash'], image_result['file_urls'], image_files,
+            metadata_result['IpfsHash'], metadata_result['file_urls'], metadata_files
+        )
+
+    def export_car(self, image_files):
+        """
+        Build the image and metadata directories locally into one CAR archive.
+        All CIDs are computed before any network I/O; the archive is then imported
+        with a single request, or left on disk for an offline handoff.
+        """
+        exporter = CARExporter()
+
+        # 2. Compute the image directory CID locally
+        print("\nPacking image directory...")
+        image_root = exporter.add_files_as_directory(image_files)
+        image_urls = {
+            name: f"{self.backend.gateway_url(image_root)}/{name}" for name in image_files
+        }
+        print(f"Image directory CID: {image_root}")
+
+        # 3. Update every token's metadata with its image URL
+        print("\nUpdating metadata...")
+        metadata_files = self.stage_metadata(image_urls)
+        print("Metadata updated successfully")
+
+        # 4. Compute the metadata directory CID and write the archive
+        print("\nPacking metadata directory...")
+        metadata_root = exporter.add_files_as_directory(metadata_files)
+        metadata_urls = {
+            name: f"{self.backend.gateway_url(metadata_root)}/{name}" for name in metadata_files
+        }
+        print(f"Metadata directory CID: {metadata_root}")
+        exporter.write(self.car_path, [image_root, metadata_root])
+
+        if self.upload_car:
+            print("\nImporting CAR archive...")
+            self.backend.import_car(self.car_path)
+            print("CAR archive imported and pinned")
+
+        return self.build_results(
+            image_root, image_urls, image_files, metadata_root, metadata_urls, metadata_files
+        )
+
+    def process(self):
+        """
+        Resize the whole batch, then pin it as directories or as one CAR archive
+        """
+        try:
+            # 1. Resize every image into the staging directory
+            print(f"\nResizing {len(self.tokens)} images...")
+            image_files = self.resize_images()
+
+            if self.car_path:
+                return self.export_car(image_files)
+            return self.upload_directories(image_files)
+
+        except Exception as e:
+            print(f"Error in batch upload process: {str(e)}")
+            raise
+        finally:
+            # 5. Clean up the staged files
+            if os.path.exists(self.staging_dir):
+                shutil.rmtree(self.staging_dir)
+
+if __name__ == "__main__":
+    # Define your tokens here
+    tokens = [
+        {
+            'name': "Sampletoken1",
+            'image_path': "token_metadata/sampletoken1_image.jpeg",
+            'metadata': TokenMetadata.load("token_metadata/sampletoken1.json")
+        },
+        {
+            'name': "Sampletoken2",
+            'image_path': "token_metadata/sampletoken2_image.jpeg",
+            'metadata': TokenMetadata.load("token_metadata/sampletoken2.json")
+        }
+    ]
+
+    try:
+        uploader = PinataBatchUploader(tokens)
+        results = uploader.process()
+
+        print("\nBatch completed successfully!")
+        for result in results:
+            print(f"{result['name']}: {result['metadata_gateway_url']}")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import base58
+
+# Multicodec and multihash codes used by the CIDs Pinata returns
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+MULTIHASH_SHA2_256 = 0x12
+
+
+def encode_varint(value):
+    """
+    Encode an unsigned integer as a protobuf/multiformats varint
+    """
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data, offset=0):
+    """
+    Decode a varint from data at offset, returning (value, next_offset)
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def file_sha256(file_path, chunk_size=65536):
+    """
+    Hex SHA-256 of a local file, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cid_v1_bytes(codec, digest):
+    """
+    Binary CIDv1 for a sha2-256 digest
+    """
+    return encode_varint(1) + encode_varint(codec) + bytes([MULTIHASH_SHA2_256, len(digest)]) + digest
+
+
+def cid_to_string(cid_bytes):
+    """
+    String form of a binary CID: base58btc for CIDv0, base32 multibase for CIDv1
+    """
+    if cid_bytes[0] == MULTIHASH_SHA2_256:
+        return base58.b58encode(cid_bytes).decode()
+    return "b" + base64.b32encode(cid_bytes).decode().lower().rstrip("=")
+
+
+def cid_from_string(cid):
+    """
+    Binary form of a CID string
+    """
+    if cid.startswith("Qm"):
+        return base58.b58decode(cid)
+    if not cid.startswith("b"):
+        raise ValueError(f"Unsupported CID multibase: {cid}")
+    body = cid[1:].upper()
+    return base64.b32decode(body + "=" * (-len(body) % 8))
+
+
+def parse_cid(cid):
+    """
+    Split a CID string into (version, codec, sha256 digest)
+    """
+    data = cid_from_string(cid)
+    if data[0] == MULTIHASH_SHA2_256:
+        return 0, CODEC_DAG_PB, data[2:]
+    version, offset = decode_varint(data)
+    codec, offset = decode_varint(data, offset)
+    hash_code, offset = decode_varint(data, offset)
+    if hash_code != MULTIHASH_SHA2_256:
+        raise ValueError(f"Unsupported multihash in CID: {cid}")
+    length, offset = decode_varint(data, offset)
+    return version, codec, data[offset:offset + length]
+
+
+def raw_cid(data):
+    """
+    CIDv1 (raw codec) of a single-block payload, as returned for small files with cidVersion 1
+    """
+    return cid_to_string(cid_v1_bytes(CODEC_RAW, hashlib.sha256(data).digest()))
@@ -0,0 +1,134 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+import requests
+
+# Responses that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUSES = {429, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header, given either as seconds or as an HTTP date
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=1.0, burst=3, concurrency=4, min_rate=0.1, max_rate=20.0, max_concurrency=16,
+                 rate_step=0.1, target_latency=10.0, max_retries=6):
+        """
+        Client-side limiter combining a token bucket (requests per second) with an AIMD
+        concurrency window, adapted from the responses it sees:
+          - every success adds `rate_step` to the rate and about one slot per window of requests
+          - a 429/5xx or connection error halves both, once per round of in-flight requests,
+            and a Retry-After pauses every caller until it has passed
+          - responses slower than `target_latency` shrink the concurrency window
+        so uploads settle at the highest rate the service sustains without tripping its limits.
+        """
+        self.condition = threading.Condition()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.concurrency = float(concurrency)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.rate_step = rate_step
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "slow": 0}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Block until a token and a concurrency slot are free. Returns the request's start time.
+        """
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1 and self.in_flight < int(self.concurrency):
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    self.stats["requests"] += 1
+                    return now
+
+                waits = []
+                if now < self.paused_until:
+                    waits.append(self.paused_until - now)
+                if self.tokens < 1:
+                    waits.append((1 - self.tokens) / self.rate)
+                # With only the concurrency window full, wait for a release to notify us
+                self.condition.wait(timeout=max(waits) if waits else None)
+
+    def release(self, started, throttled=False, retry_after=None):
+        now = time.monotonic()
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.stats["throttled"] += 1
+                # Requests that were already in flight when we backed off report the same congestion
+                if started >= self.last_decrease:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                    self.last_decrease = now
+                    print(f"Pinata is throttling, backing off to {self.rate:.2f} req/s "
+                          f"and {int(self.concurrency)} concurrent requests")
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            elif now - started > self.target_latency:
+                self.stats["slow"] += 1
+                self.concurrency = max(1.0, self.concurrency * 0.8)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.rate_step)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self.condition.notify_all()
+
+    def request(self, send):
+        """
+        Run `send()` (which performs one HTTP request and returns its response) under the
+        limiter, retrying throttled attempts. File handles must be rewound inside `send`.
+        """
+        for attempt in range(self.max_retries + 1):
+            started = self.acquire()
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.release(started, throttled=True)
+                if attempt == self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                time.sleep(min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+                continue
+
+            throttled = response.status_code in THROTTLE_STATUSES
+            retry_after = parse_retry_after(response.headers.get("Retry-After")) if throttled else None
+            self.release(started, throttled, retry_after)
+            if not throttled or attempt == self.max_retries:
+                return response
+
+            self.stats["retries"] += 1
+            if retry_after is None:
+                time.sleep(min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+
+# Shared by every Pinata upload in the process, so concurrent uploads back off together
+PINATA_RATE_LIMITER = AdaptiveRateLimiter()
@@ -1,13 +1,72 @@
+import io
+import os
 import cv2
 import numpy as np
+from PIL import Image
+
+# cv2.resize handles at most 512 channels per call
+MAX_RESIZE_CHANNELS = 512
+
+# Peak bytes per source pixel while load_frames composites the stack: the RGBA frames (4),
+# and the uint16 alpha (2), RGB (6) and background (2) working copies alongside them
+DECODED_BYTES_PER_PIXEL = 4 + 2 + 6 + 2
+
+# Candidate still-image encodings, tried from the highest quality down: (format, extension, cv2 parameters)
+ENCODING_CANDIDATES = {
+    "JPEG": (".jpg", [(quality, [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+                      for quality in (95, 90, 85, 80, 75, 65)]),
+    "WEBP": (".webp", [(quality, [cv2.IMWRITE_WEBP_QUALITY, quality]) for quality in (101, 95, 90, 85, 80, 75, 65)]),
+    "PNG": (".png", [(None, [cv2.IMWRITE_PNG_COMPRESSION, 9])]),
+}
+
+
+def ssim(reference, candidate, window_sigma=1.5):
+    """
+    Mean structural similarity of two same-sized uint8 images, computed for every pixel
+    and channel at once with Gaussian-weighted local statistics (Wang et al. 2004)
+    """
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    x = reference.astype(np.float32)
+    y = candidate.astype(np.float32)
+
+    def blur(values):
+        return cv2.GaussianBlur(values, (11, 11), window_sigma)
+
+    mu_x, mu_y = blur(x), blur(y)
+    mu_xx, mu_yy, mu_xy = mu_x * mu_x, mu_y * mu_y, mu_x * mu_y
+    sigma_xx = blur(x * x) - mu_xx
+    sigma_yy = blur(y * y) - mu_yy
+    sigma_xy = blur(x * y) - mu_xy
+    ssim_map = ((2 * mu_xy + c1) * (2 * sigma_xy + c2)) / ((mu_xx + mu_yy + c1) * (sigma_xx + sigma_yy + c2))
+    return float(ssim_map.mean())
+
 
 class ImageResizer:
-    def __init__(self, image_path, output_path):
+    def __init__(self, image_path, output_path, max_frames=240, max_decoded_bytes=256 * 1024 * 1024,
+                 max_output_bytes=4 * 1024 * 1024, optimize_encoding=False, min_ssim=0.98):
         """
         Initialize the resizer with the input and output paths.
+
+        Animated GIF/WebP input is kept animated. max_frames and max_decoded_bytes cap how
+        much of a huge animation is decoded (frames are sampled evenly beyond that), and
+        max_output_bytes bounds the size of the re-encoded animation. Animations other than
+        GIF are saved as animated WebP, and output_path gets the .webp extension.
+
+        With optimize_encoding, a still image is saved in the smallest of the candidate
+        JPEG/WebP/PNG encodings whose SSIM against the canvas is at least min_ssim.
+        output_path then gets that format's extension, and encoding_report the details.
         """
+        if not 0 < min_ssim <= 1:
+            # Lossless PNG scores 1.0, so any threshold in range has an encoding that meets it
+            raise ValueError(f"min_ssim must be in (0, 1], got {min_ssim}")
         self.image_path = image_path
         self.output_path = output_path
+        self.max_frames = max_frames
+        self.max_decoded_bytes = max_decoded_bytes
+        self.max_output_bytes = max_output_bytes
+        self.optimize_encoding = optimize_encoding
+        self.min_ssim = min_ssim
+        self.encoding_report = None
 
     def load_image(self):
         """
@@ -52,13 +111,197 @@ class ImageResizer:
         """
         cv2.imwrite(self.output_path, img)
 
+    def select_encoding(self, img):
+        """
+        Encode the canvas with every candidate and return the smallest one that keeps
+        SSIM >= min_ssim, as (format, quality, encoded bytes, ssim). Quality only goes down
+        within a format, so a format is abandoned at its first encoding below the threshold.
+        """
+        best = None
+        for image_format, (extension, levels) in ENCODING_CANDIDATES.items():
+            for quality, params in levels:
+                ok, encoded = cv2.imencode(extension, img, params)
+                if not ok:
+                    break
+                lossless = image_format == "PNG" or quality == 101
+                score = 1.0 if lossless else ssim(img, cv2.imdecode(encoded, cv2.IMREAD_COLOR))
+                if score < self.min_ssim:
+                    break
+                if best is None or len(encoded) < len(best[2]):
+                    best = (image_format, quality, encoded.tobytes(), score)
+        return best
+
+    def save_optimized_image(self, img):
+        """
+        Save the canvas in the smallest encoding above the quality threshold, and report
+        the bytes saved against the default encoding for the output extension
+        """
+        ok, baseline = cv2.imencode(os.path.splitext(self.output_path)[1] or ".png", img)
+        baseline_bytes = len(baseline) if ok else None
+        image_format, quality, data, score = self.select_encoding(img)
+
+        self.output_path = os.path.splitext(self.output_path)[0] + ENCODING_CANDIDATES[image_format][0]
+        with open(self.output_path, 'wb') as f:
+            f.write(data)
+
+        self.encoding_report = {
+            "format": image_format,
+            "quality": quality,
+            "ssim": score,
+            "bytes": len(data),
+            "baseline_bytes": baseline_bytes,
+            "saved_bytes": baseline_bytes - len(data) if baseline_bytes else 0
+        }
+        label = f"{image_format} q{quality}" if quality and quality <= 100 else f"lossless {image_format}"
+        print(f"Encoded as {label} (SSIM {score:.4f}): {len(data):,} bytes, "
+              f"{self.encoding_report['saved_bytes']:,} bytes saved over the default encoding")
+
+    def is_animated(self):
+        """
+        Check whether the input has more than one frame (only the header is read).
+        """
+        with Image.open(self.image_path) as img:
+            return getattr(img, "is_animated", False)
+
+    def _select_frames(self, n_frames, frame_bytes):
+        """
+        Indices of the frames to decode, sampled evenly when the animation exceeds the caps
+        """
+        limit = min(self.max_frames, max(1, self.max_decoded_bytes // frame_bytes))
+        if n_frames <= limit:
+            return list(range(n_frames))
+        print(f"Animation has {n_frames} frames, sampling {limit} to stay within limits")
+        return sorted(set(np.linspace(0, n_frames - 1, limit).round().astype(int).tolist()))
+
+    def load_frames(self):
+        """
+        Decode an animated image into one (frames, height, width, 3) RGB array composited
+        onto white, along with per-frame durations in milliseconds and the loop count
+        (None when the source plays once).
+        """
+        with Image.open(self.image_path) as img:
+            width, height = img.size
+            n_frames = getattr(img, "n_frames", 1)
+            # PIL only sets loop when the GIF has a NETSCAPE extension; without one it plays once
+            loop = img.info.get("loop")
+            indices = self._select_frames(n_frames, width * height * DECODED_BYTES_PER_PIXEL)
+
+            # Collect every source frame's duration so sampled frames keep the total timing
+            all_durations = []
+            for i in range(n_frames):
+                img.seek(i)
+                if img.format == "WEBP":
+                    # WebP only reports a frame's duration once the frame is decoded
+                    img.load()
+                all_durations.append(img.info.get("duration", 100) or 100)
+
+            frames = np.empty((len(indices), height, width, 4), dtype=np.uint8)
+            for slot, i in enumerate(indices):
+                img.seek(i)
+                frames[slot] = np.asarray(img.convert("RGBA"))
+
+        boundaries = indices[1:] + [n_frames]
+        durations = [sum(all_durations[start:end]) for start, end in zip(indices, boundaries)]
+
+        # Composite the whole stack onto white in one pass, in place so the uint16
+        # working copies stay within DECODED_BYTES_PER_PIXEL
+        alpha = frames[..., 3:].astype(np.uint16)
+        rgb = frames[..., :3].astype(np.uint16)
+        rgb *= alpha
+        np.subtract(255, alpha, out=alpha)
+        alpha *= 255
+        rgb += alpha
+        del alpha
+        rgb //= 255
+        return rgb.astype(np.uint8), durations, loop
+
+    def resize_frames_to_canvas(self, frames, canvas_size=512):
+        """
+        Resize and pad a whole (frames, height, width, channels) stack at once.
+        The frames are folded into the channel axis so each cv2.resize call scales
+        many frames together instead of looping over them in Python.
+        """
+        n_frames, original_height, original_width, channels = frames.shape
+        scale = min(canvas_size / original_width, canvas_size / original_height)
+        new_width = int(original_width * scale)
+        new_height = int(original_height * scale)
+
+        stacked = frames.transpose(1, 2, 0, 3).reshape(original_height, original_width, n_frames * channels)
+        step = (MAX_RESIZE_CHANNELS // channels) * channels
+        resized = np.concatenate([
+            cv2.resize(stacked[..., start:start + step], (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
+            .reshape(new_height, new_width, -1)
+            for start in range(0, stacked.shape[2], step)
+        ], axis=2)
+        resized = resized.reshape(new_height, new_width, n_frames, channels).transpose(2, 0, 1, 3)
+
+        final_frames = np.full((n_frames, canvas_size, canvas_size, channels), 255, dtype=np.uint8)
+        x_offset = (canvas_size - new_width) // 2
+        y_offset = (canvas_size - new_height) // 2
+        final_frames[:, y_offset:y_offset + new_height, x_offset:x_offset + new_width] = resized
+
+        return final_frames
+
+    def _encode_animation(self, frames, durations, loop, image_format, quality):
+        images = [Image.fromarray(frame) for frame in frames]
+        buffer = io.BytesIO()
+        options = {"save_all": True, "append_images": images[1:], "duration": durations}
+        if loop is not None:
+            options["loop"] = loop
+        elif image_format == "WEBP":
+            # WebP has no "no loop" setting, and GIF plays once when the extension is left out
+            options["loop"] = 1
+        if image_format == "WEBP":
+            options["quality"] = quality
+        else:
+            options["optimize"] = True
+        images[0].save(buffer, format=image_format, **options)
+        return buffer.getvalue()
+
+    def save_animation(self, frames, durations, loop):
+        """
+        Encode the frames as an animated GIF or WebP (by output extension, WebP otherwise),
+        lowering the quality and then the frame rate until it fits max_output_bytes.
+        """
+        image_format = "GIF" if self.output_path.lower().endswith(".gif") else "WEBP"
+        qualities = [80, 65, 50] if image_format == "WEBP" else [None]
+        if image_format == "WEBP":
+            # eg. an APNG input: keep the extension (and so the gateway's content type) truthful
+            self.output_path = os.path.splitext(self.output_path)[0] + ".webp"
+
+        while True:
+            for quality in qualities:
+                data = self._encode_animation(frames, durations, loop, image_format, quality)
+                if len(data) <= self.max_output_bytes:
+                    break
+            if len(data) <= self.max_output_bytes or len(frames) == 1:
+                break
+            # Drop every other frame, folding its duration into the frame before it
+            durations = [sum(durations[i:i + 2]) for i in range(0, len(durations), 2)]
+            frames = frames[::2]
+            print(f"Animation too large ({len(data)} bytes), reducing to {len(frames)} frames")
+
+        with open(self.output_path, 'wb') as f:
+            f.write(data)
+        return len(frames)
+
     def process(self):
         """
         Main method to load, resize, and save the image.
         """
+        if self.is_animated():
+            frames, durations, loop = self.load_frames()
+            resized_frames = self.resize_frames_to_canvas(frames)
+            n_frames = self.save_animation(resized_frames, durations, loop)
+            print(f"Animation ({n_frames} frames) successfully resized and saved to {self.output_path}")
+            return
+
         img = self.load_image()
         resized_img = self.resize_to_canvas(img)
-        self.save_image(resized_img)
+        if self.optimize_encoding:
+            self.save_optimized_image(resized_img)
+        else:
+            self.save_image(resized_img)
         print(f"Image successfully resized and saved to {self.output_path}")
 
 
@@ -0,0 +1,167 @@
+import os
+import json
+from abc import ABC, abstractmethod
+import requests
+from pathlib import Path
+from pinata.upload_image_to_pinata_ifps import PinataIPFSUploader, PINATA_API_URL, PINATA_GATEWAY_URL
+from pinata.upload_metadata_uri_to_pinata_ifps import PinataJSONUploader
+
+
+class StorageBackend(ABC):
+    """
+    Interface the upload pipeline calls through to pin content.
+    Every pin method returns a dict with at least 'IpfsHash', 'gateway_url' and 'ipfs_url'.
+    """
+    gateway_base = None
+    # Whether import_car can take a CARExporter archive
+    supports_car_import = False
+
+    def gateway_url(self, cid):
+        return f"{self.gateway_base}/ipfs/{cid}"
+
+    @abstractmethod
+    def pin_file(self, file_path):
+        pass
+
+    @abstractmethod
+    def pin_json(self, metadata):
+        """
+        Pin the canonical serialization of a TokenMetadata
+        """
+
+    @abstractmethod
+    def pin_directory(self, files, directory_name):
+        """
+        Pin several files (local paths or bytes) as one directory. The result also holds
+        a 'file_urls' mapping of file name to its gateway URL inside the directory.
+        """
+
+    @abstractmethod
+    def import_car(self, car_path):
+        """
+        Import and pin the roots of a CARv1 archive built with CARExporter
+        """
+
+
+class PinataStorageBackend(StorageBackend):
+    def __init__(self, session=None, api_url=PINATA_API_URL, gateway_base=PINATA_GATEWAY_URL):
+        self.session = session or requests.Session()
+        self.api_url = api_url
+        self.gateway_base = gateway_base
+        self._file_uploader = None
+        self._json_uploader = None
+
+    @property
+    def file_uploader(self):
+        if self._file_uploader is None:
+            self._file_uploader = PinataIPFSUploader(session=self.session, api_url=self.api_url,
+                                                     gateway_url=self.gateway_base)
+        return self._file_uploader
+
+    @property
+    def json_uploader(self):
+        if self._json_uploader is None:
+            self._json_uploader = PinataJSONUploader(session=self.session, api_url=self.api_url,
+                                                     gateway_url=self.gateway_base)
+        return self._json_uploader
+
+    def pin_file(self, file_path):
+        return self.file_uploader.pin_file_to_ipfs(file_path)
+
+    def pin_json(self, metadata):
+        return self.json_uploader.pin_metadata_to_ipfs(metadata)
+
+    def pin_directory(self, files, directory_name):
+        return self.file_uploader.pin_directory_to_ipfs(files, directory_name)
+
+    def import_car(self, car_path):
+        raise ValueError("Pinata uploads can't import CAR archives: use --storage local-ipfs, "
+                         "or --car-offline and import the archive elsewhere")
+
+
+class LocalIPFSStorageBackend(StorageBackend):
+    supports_car_import = True
+
+    def __init__(self, api_url="http://127.0.0.1:5001", gateway_base="http://127.0.0.1:8080"):
+        """
+        Pin content through the HTTP RPC API of a local IPFS (Kubo-compatible) node
+        """
+        self.api_url = api_url.rstrip("/")
+        self.gateway_base = gateway_base.rstrip("/")
+        self.session = requests.Session()
+
+    def _result(self, cid):
+        return {
+            'IpfsHash': cid,
+            'gateway_url': self.gateway_url(cid),
+            'ipfs_url': f"ipfs://{cid}"
+        }
+
+    def _post(self, path, files, params):
+        try:
+            response = self.session.post(f"{self.api_url}{path}", files=files, params=params)
+            response.raise_for_status()
+            # The RPC API streams one JSON object per line
+            return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+        except requests.exceptions.RequestException as e:
+            print(f"Error talking to local IPFS node: {str(e)}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Response: {e.response.text}")
+            raise
+
+    def _add(self, files, wrap=False):
+        handles = [
+            content if isinstance(content, bytes) else open(content, 'rb')
+            for content in files.values()
+        ]
+        try:
+            multipart = [
+                ('file', (name, handle)) for name, handle in zip(files, handles)
+            ]
+            params = {"cid-version": 1, "pin": "true", "wrap-with-directory": str(wrap).lower()}
+            return self._post("/api/v0/add", multipart, params)
+        finally:
+            for handle in handles:
+                if not isinstance(handle, bytes):
+                    handle.close()
+
+    def pin_file(self, file_path):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found at {file_path}")
+        entries = self._add({Path(file_path).name: file_path})
+        return self._result(entries[-1]['Hash'])
+
+    def pin_json(self, metadata):
+        entries = self._add({f"{metadata.name.lower()}.json": metadata.to_json_bytes()})
+        return self._result(entries[-1]['Hash'])
+
+    def pin_directory(self, files, directory_name):
+        if not files:
+            raise ValueError("No files given for directory upload")
+        # With wrap-with-directory the wrapping directory is reported last
+        entries = self._add(files, wrap=True)
+        result = self._result(entries[-1]['Hash'])
+        result['file_urls'] = {
+            file_name: f"{result['gateway_url']}/{file_name}" for file_name in files
+        }
+        return result
+
+    def import_car(self, car_path):
+        with open(car_path, 'rb') as f:
+            entries = self._post(
+                "/api/v0/dag/import",
+                [('file', (Path(car_path).name, f))],
+                {"pin-roots": "true"}
+            )
+        roots = [entry['Root']['Cid']['/'] for entry in entries if 'Root' in entry]
+        errors = [entry['Root']['PinErrorMsg'] for entry in entries
+                  if 'Root' in entry and entry['Root'].get('PinErrorMsg')]
+        if errors:
+            raise ValueError(f"Failed to pin CAR roots: {'; '.join(errors)}")
+        return {'roots': roots}
+
+
+STORAGE_BACKENDS = {
+    "pinata": PinataStorageBackend,
+    "local-ipfs": LocalIPFSStorageBackend,
+}
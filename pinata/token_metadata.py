@@ -0,0 +1,77 @@
+import json
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TokenMetadata:
+    """
+    Off-chain token metadata, passed between the pipeline stages in memory.
+
+    to_json_bytes() is the single serialization used for uploading, hashing and archiving.
+    It is canonical (sorted keys, compact separators, UTF-8), so identical metadata always
+    produces identical bytes and therefore an identical CID.
+    """
+    name: str
+    symbol: str
+    description: str
+    image: str = None
+    attributes: list = field(default_factory=list)
+    files: list = field(default_factory=list)
+
+    def set_image(self, uri, mime_type=None):
+        """
+        Point the metadata at its image and list it under properties.files
+        """
+        if mime_type is None:
+            mime_type = mimetypes.guess_type(uri)[0] or "image/png"
+        self.image = uri
+        self.files = [entry for entry in self.files if entry.get("uri") != uri]
+        self.files.insert(0, {"uri": uri, "type": mime_type})
+
+    def to_dict(self):
+        data = {
+            "name": self.name,
+            "symbol": self.symbol,
+            "description": self.description
+        }
+        if self.image is not None:
+            data["image"] = self.image
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.files:
+            data["properties"] = {"files": self.files}
+        return data
+
+    def to_json_bytes(self):
+        return json.dumps(
+            self.to_dict(), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+    def sha256(self):
+        return hashlib.sha256(self.to_json_bytes()).hexdigest()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data["name"],
+            symbol=data["symbol"],
+            description=data.get("description", ""),
+            image=data.get("image"),
+            attributes=list(data.get("attributes", [])),
+            files=list(data.get("properties", {}).get("files", []))
+        )
+
+    @classmethod
+    def load(cls, json_path):
+        with open(json_path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, json_path):
+        """
+        Write the canonical serialization to disk, for archiving
+        """
+        with open(json_path, 'wb') as f:
+            f.write(self.to_json_bytes())
+        return json_path
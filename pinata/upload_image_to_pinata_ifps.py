@@ -1,15 +1,26 @@
 import os
+import json
 import requests
 from dotenv import load_dotenv
 from pathlib import Path
+from pinata.rate_limiter import PINATA_RATE_LIMITER
+
+PINATA_API_URL = "https://api.pinata.cloud"
+PINATA_GATEWAY_URL = "https://gateway.pinata.cloud"
 
 class PinataIPFSUploader:
-    def __init__(self):
+    def __init__(self, session=None, api_url=PINATA_API_URL, gateway_url=PINATA_GATEWAY_URL, rate_limiter=None):
         """
-        Initialize the uploader with the JWT from parent directory's .env file
+        Initialize the uploader with the JWT from parent directory's .env file.
+        Pass a shared requests.Session to reuse its keep-alive connections across uploads,
+        and other API/gateway URLs to talk to a stand-in such as emulator.fake_pinata.
+        Requests go through the process-wide Pinata rate limiter unless another is given.
         """
         self.load_environment()
-        self.api_endpoint = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+        self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter or PINATA_RATE_LIMITER
+        self.api_endpoint = f"{api_url}/pinning/pinFileToIPFS"
+        self.gateway_base = gateway_url
 
     def load_environment(self):
         """
@@ -44,18 +55,22 @@ class PinataIPFSUploader:
             "Authorization": f"Bearer {self.JWT}"
         }
 
-        try:
-            response = requests.post(
+        def send():
+            files['file'][1].seek(0)
+            return self.session.post(
                 self.api_endpoint,
                 files=files,
                 headers=headers
             )
+
+        try:
+            response = self.rate_limiter.request(send)
             
             response.raise_for_status()
             result = response.json()
             
             # Add gateway URLs to the response
-            result['gateway_url'] = f"https://gateway.pinata.cloud/ipfs/{result['IpfsHash']}"
+            result['gateway_url'] = f"{self.gateway_base}/ipfs/{result['IpfsHash']}"
             result['ipfs_url'] = f"ipfs://{result['IpfsHash']}"
             
             return result
@@ -68,6 +83,75 @@ class PinataIPFSUploader:
         finally:
             files['file'][1].close()
 
+    def pin_directory_to_ipfs(self, files, directory_name):
+        """
+        Upload and pin several files to IPFS as a single directory via Pinata
+
+        Args:
+            files (dict): Mapping of file name inside the directory to a local file path
+                          or to the file content as bytes
+            directory_name (str): Name of the directory wrapping the files
+
+        Returns:
+            dict: Response from Pinata API, with the root IpfsHash of the directory
+                  and a 'file_urls' mapping of file name to its gateway URL
+        """
+        if not files:
+            raise ValueError("No files given for directory upload")
+
+        for content in files.values():
+            if not isinstance(content, bytes) and not os.path.exists(content):
+                raise FileNotFoundError(f"File not found at {content}")
+
+        # Every part shares the directory prefix so Pinata wraps them in one root CID
+        multipart = [
+            ('file', (f"{directory_name}/{file_name}", content if isinstance(content, bytes) else open(content, 'rb')))
+            for file_name, content in files.items()
+        ]
+        data = {
+            'pinataMetadata': json.dumps({"name": directory_name})
+        }
+
+        headers = {
+            "Authorization": f"Bearer {self.JWT}"
+        }
+
+        def send():
+            for _, (_, file_handle) in multipart:
+                if not isinstance(file_handle, bytes):
+                    file_handle.seek(0)
+            return self.session.post(
+                self.api_endpoint,
+                files=multipart,
+                data=data,
+                headers=headers
+            )
+
+        try:
+            response = self.rate_limiter.request(send)
+
+            response.raise_for_status()
+            result = response.json()
+
+            root_url = f"{self.gateway_base}/ipfs/{result['IpfsHash']}"
+            result['gateway_url'] = root_url
+            result['ipfs_url'] = f"ipfs://{result['IpfsHash']}"
+            result['file_urls'] = {
+                file_name: f"{root_url}/{file_name}" for file_name in files
+            }
+
+            return result
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error uploading directory to Pinata: {str(e)}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Response: {e.response.text}")
+            raise
+        finally:
+            for _, (_, file_handle) in multipart:
+                if not isinstance(file_handle, bytes):
+                    file_handle.close()
+
 if __name__ == "__main__":
     try:
         uploader = PinataIPFSUploader()
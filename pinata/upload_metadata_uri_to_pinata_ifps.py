@@ -3,14 +3,23 @@ import json
 import requests
 from dotenv import load_dotenv
 from pathlib import Path
+from pinata.upload_image_to_pinata_ifps import PINATA_API_URL, PINATA_GATEWAY_URL
+from pinata.rate_limiter import PINATA_RATE_LIMITER
 
 class PinataJSONUploader:
-    def __init__(self):
+    def __init__(self, session=None, api_url=PINATA_API_URL, gateway_url=PINATA_GATEWAY_URL, rate_limiter=None):
         """
-        Initialize the uploader with the JWT from parent directory's .env file
+        Initialize the uploader with the JWT from parent directory's .env file.
+        Pass a shared requests.Session to reuse its keep-alive connections across uploads,
+        and other API/gateway URLs to talk to a stand-in such as emulator.fake_pinata.
+        Requests go through the process-wide Pinata rate limiter unless another is given.
         """
         self.load_environment()
-        self.api_endpoint = "https://api.pinata.cloud/pinning/pinJSONToIPFS"
+        self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter or PINATA_RATE_LIMITER
+        self.api_endpoint = f"{api_url}/pinning/pinJSONToIPFS"
+        self.file_api_endpoint = f"{api_url}/pinning/pinFileToIPFS"
+        self.gateway_base = gateway_url
 
     def load_environment(self):
         """
@@ -61,17 +70,17 @@ class PinataJSONUploader:
         }
 
         try:
-            response = requests.post(
+            response = self.rate_limiter.request(lambda: self.session.post(
                 self.api_endpoint,
                 json=payload,
                 headers=headers
-            )
+            ))
             
             response.raise_for_status()
             result = response.json()
             
             # Add gateway URLs to the response
-            result['gateway_url'] = f"https://gateway.pinata.cloud/ipfs/{result['IpfsHash']}"
+            result['gateway_url'] = f"{self.gateway_base}/ipfs/{result['IpfsHash']}"
             result['ipfs_url'] = f"ipfs://{result['IpfsHash']}"
             
             return result
@@ -82,6 +91,57 @@ class PinataJSONUploader:
                 print(f"Response: {e.response.text}")
             raise
 
+    def pin_metadata_to_ipfs(self, metadata):
+        """
+        Upload and pin in-memory TokenMetadata to IPFS via Pinata
+
+        The canonical bytes are uploaded as a file rather than through pinJSONToIPFS,
+        which would re-serialize the content and make the CID depend on Pinata's encoding.
+
+        Args:
+            metadata (TokenMetadata): Metadata to upload
+
+        Returns:
+            dict: Response from Pinata API containing IPFS details
+        """
+        content = metadata.to_json_bytes()
+        file_name = f"{metadata.name.lower()}.json"
+
+        files = {
+            'file': (file_name, content, "application/json")
+        }
+        data = {
+            'pinataOptions': json.dumps({"cidVersion": 1}),
+            'pinataMetadata': json.dumps({"name": file_name})
+        }
+
+        headers = {
+            "Authorization": f"Bearer {self.JWT}"
+        }
+
+        try:
+            response = self.rate_limiter.request(lambda: self.session.post(
+                self.file_api_endpoint,
+                files=files,
+                data=data,
+                headers=headers
+            ))
+
+            response.raise_for_status()
+            result = response.json()
+
+            # Add gateway URLs to the response
+            result['gateway_url'] = f"{self.gateway_base}/ipfs/{result['IpfsHash']}"
+            result['ipfs_url'] = f"ipfs://{result['IpfsHash']}"
+
+            return result
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error uploading to Pinata: {str(e)}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Response: {e.response.text}")
+            raise
+
 if __name__ == "__main__":
     try:
         # Define your JSON path directly here
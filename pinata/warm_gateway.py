@@ -0,0 +1,159 @@
+import time
+import hashlib
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from pinata.ipfs_cid import CODEC_RAW, parse_cid
+
+PINATA_GATEWAY = "https://gateway.pinata.cloud"
+
+
+class GatewayWarmer:
+    def __init__(self, targets, max_workers=4, timeout=60, retries=3, gateway_base=None):
+        """
+        Initialize the warmer with the gateway URLs to fetch
+
+        Args:
+            targets (list): Dicts with 'url' and optionally 'sha256' (hex digest of the local
+                            bytes) and/or 'cid' (the pinned CID) to verify the response against
+            max_workers (int): Maximum number of concurrent fetches
+            timeout (int): Per-request timeout in seconds
+            retries (int): Attempts per URL while the gateway is still resolving the content
+            gateway_base (str): Replaces the Pinata gateway host, eg. a local stand-in gateway
+        """
+        self.targets = targets
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.gateway_base = gateway_base
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_upload_result(cls, result, **kwargs):
+        """
+        Build a warmer for the image and metadata URLs returned by an uploader's process()
+        """
+        targets = [
+            {
+                'url': result['image_gateway_url'],
+                'sha256': result.get('image_sha256'),
+                'cid': result.get('image_ipfs_hash')
+            },
+            {
+                'url': result['metadata_gateway_url'],
+                'sha256': result.get('metadata_sha256'),
+                'cid': result.get('metadata_ipfs_hash')
+            }
+        ]
+        return cls(targets, **kwargs)
+
+    def _resolve_url(self, url):
+        if self.gateway_base and url.startswith(PINATA_GATEWAY):
+            return self.gateway_base.rstrip("/") + url[len(PINATA_GATEWAY):]
+        return url
+
+    def _verify(self, target, digest):
+        """
+        Check the streamed digest against the expected local hash or the pinned raw CID.
+        Returns None when there is nothing to verify against.
+        """
+        if target.get('sha256'):
+            return digest.hexdigest() == target['sha256']
+        cid = target.get('cid')
+        if cid and "/" not in cid:
+            _, codec, cid_digest = parse_cid(cid)
+            # Only raw-codec CIDs hash the bytes directly; dag-pb CIDs hash the UnixFS node
+            if codec == CODEC_RAW:
+                return digest.digest() == cid_digest
+        return None
+
+    def fetch(self, target):
+        """
+        Stream one gateway URL, hashing the body as it arrives
+        """
+        url = self._resolve_url(target['url'])
+        start = time.perf_counter()
+        for attempt in range(1, self.retries + 1):
+            try:
+                with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                    ttfb = time.perf_counter() - start
+                    response.raise_for_status()
+                    digest = hashlib.sha256()
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=65536):
+                        digest.update(chunk)
+                        size += len(chunk)
+                    return {
+                        'url': url,
+                        'status': response.status_code,
+                        'bytes': size,
+                        'attempts': attempt,
+                        'ttfb': ttfb,
+                        'elapsed': time.perf_counter() - start,
+                        'sha256': digest.hexdigest(),
+                        'verified': self._verify(target, digest)
+                    }
+            except requests.exceptions.RequestException as e:
+                print(f"Gateway fetch attempt {attempt} for {url} failed: {str(e)}")
+                if attempt < self.retries:
+                    time.sleep(2 ** attempt)
+                else:
+                    return {
+                        'url': url,
+                        'status': getattr(e.response, 'status_code', None),
+                        'bytes': 0,
+                        'attempts': attempt,
+                        'ttfb': None,
+                        'elapsed': time.perf_counter() - start,
+                        'sha256': None,
+                        'verified': False
+                    }
+
+    def warm(self):
+        """
+        Fetch all targets concurrently and print per-URL timings
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self.fetch, self.targets))
+
+        for result in results:
+            if result['sha256'] is None:
+                verified = "UNREACHABLE"
+            else:
+                verified = {True: "verified", False: "MISMATCH", None: "unverified"}[result['verified']]
+            ttfb = f"{result['ttfb']:.2f}s" if result['ttfb'] is not None else "-"
+            print(f"Warmed {result['url']}: {result['bytes']} bytes, ttfb {ttfb}, "
+                  f"total {result['elapsed']:.2f}s, {verified}")
+        print(f"Gateway warm-up finished in {time.perf_counter() - start:.2f}s")
+        return results
+
+    def process(self):
+        """
+        Warm the gateway and fail if any response does not match the local content.
+        A URL the gateway didn't serve in time is only a warning: the content is pinned,
+        and the gateway will still resolve it on a later request.
+        """
+        results = self.warm()
+        unreachable = [result['url'] for result in results if result['sha256'] is None]
+        if unreachable:
+            print(f"Warning: Gateway did not serve (still cold or unreachable): {', '.join(unreachable)}")
+        mismatched = [result['url'] for result in results if result['sha256'] is not None and result['verified'] is False]
+        if mismatched:
+            raise ValueError(f"Gateway content does not match the uploaded content for: {', '.join(mismatched)}")
+        return results
+
+
+if __name__ == "__main__":
+    targets = [
+        {'url': "https://gateway.pinata.cloud/ipfs/bafkreicbaacs5bal2zhtv7t4t73mbyw2bevq4evb55fxtcepftj7pv7asi",
+         'cid': "bafkreicbaacs5bal2zhtv7t4t73mbyw2bevq4evb55fxtcepftj7pv7asi"}
+    ]
+
+    try:
+        GatewayWarmer(targets).process()
+    except Exception as e:
+        print(f"Error: {str(e)}")
@@ -0,0 +1,147 @@
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+
+class JobQueue:
+    def __init__(self, db_path="jobs.sqlite3"):
+        """
+        SQLite-backed job queue shared by the daemon's HTTP server and worker processes.
+        Every state change is committed immediately, so queued jobs survive a crash.
+        """
+        self.db_path = db_path
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, payload):
+        """
+        Queue a job and return its id
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (status, payload, created_at) VALUES (?, ?, ?)",
+                (QUEUED, json.dumps(payload), time.time())
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker):
+        """
+        Atomically take the oldest queued job for a worker, or return None
+        """
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers can never claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                (RUNNING, worker, time.time(), row["id"])
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+            return self._row_to_job(job)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id, result):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id)
+            )
+
+    def interrupt_running(self, worker=None):
+        """
+        Mark jobs whose worker died as interrupted. They are not re-run automatically,
+        since a half-finished launch may already have spent SOL; use retry() once checked.
+        """
+        query = "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ?"
+        params = [INTERRUPTED, "Worker stopped while the job was running", time.time(), RUNNING]
+        if worker is not None:
+            query += " AND worker = ?"
+            params.append(worker)
+        with self._connection() as conn:
+            return conn.execute(query, params).rowcount
+
+    def retry(self, job_id):
+        """
+        Put a failed or interrupted job back in the queue
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, error = NULL, worker = NULL WHERE id = ? AND status IN (?, ?)",
+                (QUEUED, job_id, FAILED, INTERRUPTED)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id):
+        with self._connection() as conn:
+            return self._row_to_job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def depth(self):
+        """
+        Number of jobs per status
+        """
+        with self._connection() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED, INTERRUPTED)}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import time
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from service.job_queue import JobQueue
+from service.job_worker import run_worker
+from utils.solana_rpc import SolanaRPCClient
+from pinata.storage_backends import STORAGE_BACKENDS
+
+REQUIRED_FIELDS = {
+    "name": str,
+    "symbol": str,
+    "image_path": str,
+    "mint_amount": int,
+    "description": str
+}
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Local HTTP API of the daemon:
+        POST /jobs               submit a token job, returns its id
+        GET  /jobs/<id>          job status and result
+        POST /jobs/<id>/retry    requeue a failed or interrupted job
+        GET  /queue              number of jobs per status
+        GET  /health             worker and RPC health
+    """
+    service = None
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        match = re.fullmatch(r"/jobs/(\d+)", self.path)
+        if match:
+            job = self.service.queue.get(int(match.group(1)))
+            if job is None:
+                return self._send(404, {"error": "Job not found"})
+            return self._send(200, job)
+        if self.path == "/queue":
+            return self._send(200, self.service.queue.depth())
+        if self.path == "/health":
+            return self._send(200, self.service.health())
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path == "/jobs":
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = self.service.validate(json.loads(self.rfile.read(length) or b"{}"))
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+            job_id = self.service.queue.submit(payload)
+            return self._send(202, {"id": job_id, "status": "queued"})
+
+        match = re.fullmatch(r"/jobs/(\d+)/retry", self.path)
+        if match:
+            if self.service.queue.retry(int(match.group(1))):
+                return self._send(202, {"id": int(match.group(1)), "status": "queued"})
+            return self._send(409, {"error": "Only failed or interrupted jobs can be retried"})
+        self._send(404, {"error": "Not found"})
+
+
+class TokenJobService:
+    def __init__(self, db_path="jobs.sqlite3", workers=1, host="127.0.0.1", port=8787,
+                 workspace="daemon", rpc_url="https://api.mainnet-beta.solana.com",
+                 restart_delay=1.0, max_restart_delay=300.0, max_restarts=8, stable_after=60.0):
+        """
+        Daemon accepting token jobs over a local HTTP API and running them on a pool
+        of long-lived worker processes fed from a persistent SQLite queue.
+
+        A worker that dies is restarted after `restart_delay` seconds, doubling up to
+        `max_restart_delay` for each crash in a row. After `max_restarts` crashes in a row
+        (eg. warm_up failing on a missing .env or CLI) it is left stopped, as /health reports.
+        A worker that stayed up `stable_after` seconds starts the count over.
+        """
+        self.db_path = os.path.abspath(db_path)
+        self.queue = JobQueue(self.db_path)
+        self.worker_count = workers
+        self.host = host
+        self.port = port
+        self.workspace = os.path.abspath(workspace)
+        self.rpc_url = rpc_url
+        self.rpc = SolanaRPCClient(rpc_url)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.max_restarts = max_restarts
+        self.stable_after = stable_after
+        self.workers = {}
+        # Per worker: "running", "backoff" or "stopped", with its crash and restart counts
+        self.worker_states = {}
+
+    def validate(self, payload):
+        """
+        Check a submitted job and resolve its image path against the daemon's directory
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("Job must be a JSON object")
+        for field, field_type in REQUIRED_FIELDS.items():
+            if not isinstance(payload.get(field), field_type):
+                raise ValueError(f"Field '{field}' is required and must be a {field_type.__name__}")
+        if payload.get("storage", "pinata") not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {payload['storage']}")
+
+        payload["image_path"] = os.path.abspath(payload["image_path"])
+        if not os.path.exists(payload["image_path"]):
+            raise ValueError(f"Image not found at {payload['image_path']}")
+        return payload
+
+    def health(self):
+        try:
+            rpc_status = self.rpc.get_health()
+        except Exception as e:
+            rpc_status = f"error: {str(e)}"
+        return {
+            "workers": self.worker_count,
+            "workers_alive": sum(1 for process in self.workers.values() if process.is_alive()),
+            "worker_states": {
+                worker_id: {key: state[key] for key in ("status", "crashes", "restarts", "exitcode")}
+                for worker_id, state in self.worker_states.items()
+            },
+            "rpc": rpc_status,
+            "queue": self.queue.depth()
+        }
+
+    def start_worker(self, worker_id, now=None):
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(worker_id, self.db_path, os.path.join(self.workspace, worker_id), self.rpc_url),
+            name=worker_id,
+            daemon=True
+        )
+        process.start()
+        self.workers[worker_id] = process
+        state = self.worker_states.setdefault(worker_id, {"crashes": 0, "restarts": 0, "exitcode": None})
+        state.update(status="running", started_at=time.monotonic() if now is None else now, restart_at=None)
+
+    def supervise(self, now=None):
+        """
+        Mark the job a dead worker was running as interrupted, and restart the worker
+        once its backoff is over
+        """
+        now = time.monotonic() if now is None else now
+        for worker_id, process in list(self.workers.items()):
+            state = self.worker_states[worker_id]
+            if process.is_alive() or state["status"] == "stopped":
+                continue
+
+            if state["status"] == "running":
+                interrupted = self.queue.interrupt_running(worker_id)
+                if now - state["started_at"] >= self.stable_after:
+                    state["crashes"] = 0
+                state["crashes"] += 1
+                state["exitcode"] = process.exitcode
+                if state["crashes"] > self.max_restarts:
+                    state["status"] = "stopped"
+                    print(f"Worker {worker_id} exited ({process.exitcode}), {interrupted} job(s) interrupted. "
+                          f"It crashed {state['crashes']} times in a row, not restarting it")
+                    continue
+                delay = min(self.restart_delay * 2 ** (state["crashes"] - 1), self.max_restart_delay)
+                state.update(status="backoff", restart_at=now + delay)
+                print(f"Worker {worker_id} exited ({process.exitcode}), "
+                      f"{interrupted} job(s) interrupted. Restarting in {delay:.0f}s...")
+            elif now >= state["restart_at"]:
+                state["restarts"] += 1
+                self.start_worker(worker_id, now)
+
+    def serve_forever(self):
+        # Jobs still marked running belong to workers of a previous daemon that crashed
+        interrupted = self.queue.interrupt_running()
+        if interrupted:
+            print(f"Marked {interrupted} job(s) from a previous run as interrupted")
+
+        for i in range(self.worker_count):
+            self.start_worker(f"worker-{i}")
+
+        JobRequestHandler.service = self
+        server = ThreadingHTTPServer((self.host, self.port), JobRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Job service listening on http://{self.host}:{self.port} with {self.worker_count} worker(s)")
+
+        try:
+            while True:
+                time.sleep(1)
+                self.supervise()
+        except KeyboardInterrupt:
+            print("\nShutting down job service...")
+        finally:
+            server.shutdown()
+            for process in self.workers.values():
+                process.terminate()
+                process.join()
+            self.queue.interrupt_running()
@@ -0,0 +1,107 @@
+import os
+import time
+import traceback
+import requests
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+from main import MainScript
+from service.job_queue import JobQueue
+from utils.convert_base58 import SolanaKeyConverter
+from utils.rpc_cache import shared_rpc_client
+from pinata.storage_backends import STORAGE_BACKENDS, PinataStorageBackend
+
+
+class TokenJobWorker:
+    def __init__(self, worker_id, db_path, workspace, rpc_url, poll_interval=1.0):
+        """
+        Long-lived worker process running MainScript jobs from the queue.
+
+        Everything that a cold `python main.py` pays for on every launch is set up once
+        in warm_up() and reused across jobs: the converted keypair file, OpenCV and the
+        other heavy imports, the pooled HTTP session for storage uploads and the RPC client.
+        Each worker runs in its own workspace directory, since the CLI stages find the
+        generated To*.json mint keypair in the current directory.
+        """
+        self.worker_id = worker_id
+        self.queue = JobQueue(db_path)
+        self.workspace = os.path.abspath(workspace)
+        self.rpc_url = rpc_url
+        self.poll_interval = poll_interval
+        self.session = None
+        self.storage_backends = {}
+        self.rpc = None
+        self.wallet_address = None
+
+    def warm_up(self):
+        os.makedirs(os.path.join(self.workspace, "logs"), exist_ok=True)
+        os.chdir(self.workspace)
+
+        converter = SolanaKeyConverter()
+        converter.process_and_save()
+        self.wallet_address = converter.public_key()
+
+        self.session = requests.Session()
+        self.storage_backends["pinata"] = PinataStorageBackend(session=self.session)
+        # Shared with the jobs' preflight checks, so rent minimums are fetched once per worker
+        self.rpc = shared_rpc_client(self.rpc_url)
+        print(f"[{self.worker_id}] Ready in {self.workspace} with wallet {self.wallet_address}")
+
+    def storage_backend(self, name):
+        if name not in self.storage_backends:
+            self.storage_backends[name] = STORAGE_BACKENDS[name]()
+        return self.storage_backends[name]
+
+    def run_job(self, job):
+        payload = job["payload"]
+        try:
+            balance = self.rpc.get_balance(self.wallet_address)
+            print(f"Fee payer {self.wallet_address} balance: {balance / 1e9} SOL")
+        except Exception as e:
+            print(f"Warning: Could not fetch fee payer balance: {str(e)}")
+
+        script = MainScript(
+            image_path=payload["image_path"],
+            name=payload["name"],
+            symbol=payload["symbol"],
+            description=payload["description"],
+            mint_amount=payload["mint_amount"],
+            warm_gateway=payload.get("warm_gateway", False),
+            storage_backend=self.storage_backend(payload.get("storage", "pinata")),
+            rpc_url=self.rpc_url
+        )
+        script.run()
+
+        return {
+            "mint_address": Path(script.to_file_path).stem if script.to_file_path else None,
+            "metadata_gateway_url": script.metadata_gateway_url,
+            "artifact_dir": os.path.abspath(script.artifact_dir)
+        }
+
+    def run(self):
+        self.warm_up()
+        while True:
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                time.sleep(self.poll_interval)
+                continue
+
+            print(f"[{self.worker_id}] Running job {job['id']}")
+            start = time.perf_counter()
+            log_path = os.path.join(self.workspace, "logs", f"job-{job['id']}.log")
+            try:
+                with open(log_path, 'w') as log, redirect_stdout(log), redirect_stderr(log):
+                    result = self.run_job(job)
+                result["log_path"] = log_path
+                result["duration"] = time.perf_counter() - start
+                self.queue.complete(job["id"], result)
+                print(f"[{self.worker_id}] Job {job['id']} succeeded in {result['duration']:.1f}s")
+            except Exception as e:
+                self.queue.fail(job["id"], f"{str(e)}\n{traceback.format_exc()}")
+                print(f"[{self.worker_id}] Job {job['id']} failed: {str(e)} (log: {log_path})")
+
+
+def run_worker(worker_id, db_path, workspace, rpc_url):
+    """
+    Process entry point for a worker
+    """
+    TokenJobWorker(worker_id, db_path, workspace, rpc_url).run()
@@ -0,0 +1,122 @@
+import hashlib
+from pinata.car_exporter import CARExporter
+from pinata.ipfs_cid import CODEC_DAG_PB, CODEC_RAW, decode_varint, cid_from_string, cid_to_string, raw_cid
+
+# Header of the CARv1 specification's example archive (carv1-basic.car)
+SPEC_ROOTS = [
+    "bafyreihyrpefhacm6kkp4ql6j6udakdit7g3dmkzfriqfykhjw6cad5lrm",
+    "bafyreidj5idub6mapiupjwjsyyxhyhedxycv4vihfsicm2vt46o7morwlm",
+]
+SPEC_HEADER = bytes.fromhex(
+    "a265726f6f747382d82a58250001711220f88bc853804cf294fe417e4fa83028689fcdb1b1592c5102e1474dbc200fab8b"
+    "d82a5825000171122069ea0740f9807a28f4d932c62e7c1c83be055e55072c90266ab3e79df63a365b6776657273696f6e01"
+)
+
+
+def decode_fields(data):
+    """
+    (field, value) pairs of a protobuf message, with varint and length-delimited values only
+    """
+    fields = []
+    offset = 0
+    while offset < len(data):
+        key, offset = decode_varint(data, offset)
+        if key & 7 == 0:
+            value, offset = decode_varint(data, offset)
+        else:
+            length, offset = decode_varint(data, offset)
+            value, offset = data[offset:offset + length], offset + length
+        fields.append((key >> 3, value))
+    return fields
+
+
+def decode_node(block):
+    """
+    Links [(cid, name, tsize)] and UnixFS fields of a dag-pb block
+    """
+    links = []
+    unixfs = None
+    for field, value in decode_fields(block):
+        if field == 2:
+            link = dict(decode_fields(value))
+            links.append((link[1], link[2].decode(), link[3]))
+        else:
+            unixfs = decode_fields(value)
+    return links, unixfs
+
+
+def read_car(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    length, offset = decode_varint(data)
+    header, offset = data[offset:offset + length], offset + length
+    blocks = {}
+    while offset < len(data):
+        length, offset = decode_varint(data, offset)
+        section, offset = data[offset:offset + length], offset + length
+        # Every CID this exporter writes is a 36-byte sha2-256 CIDv1
+        blocks[section[:36]] = section[36:]
+    return header, blocks
+
+
+def test_header_matches_spec():
+    roots = [cid_from_string(root) for root in SPEC_ROOTS]
+    assert CARExporter()._encode_header(roots) == SPEC_HEADER
+
+
+def test_single_chunk_file_is_a_raw_leaf():
+    cid, tsize, filesize = CARExporter().add_bytes(b"hello world\n")
+    assert cid_to_string(cid) == "bafkreifjjcie6lypi6ny7amxnfftagclbuxndqonfipmb64f2km2devei4"
+    assert (tsize, filesize) == (12, 12)
+
+
+def test_empty_directory_matches_reference():
+    cid, tsize = CARExporter().add_directory({})
+    assert cid_to_string(cid) == "bafybeiczsscdsbs7ffqz55asqdf3smv6klcw3gofszvwlyarci47bgf354"
+    assert tsize == 4
+
+
+def test_multi_chunk_file_layout():
+    data = bytes(range(256)) * 10
+    exporter = CARExporter(chunk_size=1000, max_links=2)
+    cid, tsize, filesize = exporter.add_bytes(data)
+    assert filesize == len(data)
+    assert cid[1] == CODEC_DAG_PB
+
+    # 3 leaves under max_links=2 make a two-level tree: [[leaf, leaf], [leaf]]
+    links, unixfs = decode_node(exporter.blocks[cid])
+    assert unixfs == [(1, 2), (3, len(data)), (4, 2000), (4, 560)]
+    assert [name for _, name, _ in links] == ["", ""]
+    leaves = []
+    for child, _, child_tsize in links:
+        child_links, child_unixfs = decode_node(exporter.blocks[child])
+        chunks = [exporter.blocks[leaf] for leaf, _, _ in child_links]
+        assert [value for field, value in child_unixfs if field == 4] == [len(chunk) for chunk in chunks]
+        assert child_tsize == len(exporter.blocks[child]) + sum(len(chunk) for chunk in chunks)
+        leaves += chunks
+    assert b"".join(leaves) == data
+    assert tsize == len(exporter.blocks[cid]) + sum(link[2] for link in links)
+
+
+def test_directory_links_are_sorted_by_name():
+    exporter = CARExporter()
+    root = exporter.add_files_as_directory({"b.json": b"{}", "a.json": b"[]", "B.json": b"null"})
+    links, unixfs = decode_node(exporter.blocks[cid_from_string(root)])
+    assert [name for _, name, _ in links] == ["B.json", "a.json", "b.json"]
+    assert [cid_to_string(cid) for cid, _, _ in links] == [raw_cid(b"null"), raw_cid(b"[]"), raw_cid(b"{}")]
+    assert unixfs == [(1, 1)]
+
+
+def test_write_round_trip(tmp_path):
+    exporter = CARExporter(chunk_size=100)
+    root = exporter.add_files_as_directory({"image.bin": bytes(1000), "metadata.json": b'{"name": "Token"}'})
+    result = exporter.write(str(tmp_path / "batch.car"), [root])
+
+    header, blocks = read_car(result['car_path'])
+    assert header == exporter._encode_header([cid_from_string(root)])
+    assert blocks == exporter.blocks
+    assert result['blocks'] == len(blocks)
+    assert result['bytes'] == (tmp_path / "batch.car").stat().st_size
+    for cid, block in blocks.items():
+        assert cid[1] in (CODEC_RAW, CODEC_DAG_PB)
+        assert cid[4:] == hashlib.sha256(block).digest()
@@ -0,0 +1,105 @@
+import os
+import json
+import pytest
+import requests
+from PIL import Image
+from solders.keypair import Keypair
+from main import MainScript
+from utils import rpc_cache
+from utils.cassette import Cassette, CassetteError, RECORD, REPLAY
+from pinata.storage_backends import PinataStorageBackend
+from create_token.keypair_stock import KeypairStock
+from emulator.solana_emulator import SolanaRPCEmulator, LAMPORTS_PER_SOL
+from emulator.fake_pinata import FakePinataServer
+from emulator.solana_cli import EmulatedSolanaCLI
+
+PASSPHRASE = "correct horse battery staple"
+
+
+def vanity_keypair(prefix="To"):
+    while True:
+        keypair = Keypair()
+        if str(keypair.pubkey()).startswith(prefix):
+            return keypair
+
+
+def launch(cassette, image_path, rpc_url, pinata_url, runner=None):
+    return MainScript(
+        image_path=image_path,
+        name="Replay",
+        symbol="RPL",
+        description="Recorded and replayed",
+        mint_amount=1000,
+        storage_backend=PinataStorageBackend(requests.Session(), api_url=pinata_url, gateway_base=pinata_url),
+        command_runner=cassette.command_runner(runner),
+        rpc_url=rpc_url
+    )
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    # Each run gets a fresh RPC cache, so cached replies can't hide calls from the cassette
+    monkeypatch.setattr(rpc_cache, "_shared_clients", {})
+    monkeypatch.delenv("RPC_CACHE_DB", raising=False)
+    Image.new("RGB", (64, 64), (200, 30, 90)).save(tmp_path / "image.png")
+    return tmp_path
+
+
+def test_record_and_replay_offline(workspace, monkeypatch):
+    stock = KeypairStock(str(workspace / "stock.sqlite3"), passphrase=PASSPHRASE)
+    stocked = vanity_keypair()
+    stock.add("To", [stocked, vanity_keypair()])
+    monkeypatch.setenv("KEYPAIR_STOCK_DB", stock.db_path)
+    monkeypatch.setenv("KEYPAIR_STOCK_PASSPHRASE", PASSPHRASE)
+    cassette_path = str(workspace / "launch.cassette.gz")
+
+    record_dir = workspace / "record"
+    record_dir.mkdir()
+    monkeypatch.chdir(record_dir)
+    wallet = Keypair()
+    (record_dir / "solana_keypair.json").write_text(json.dumps(list(bytes(wallet))))
+    monkeypatch.setenv("YOUR_PINATA_JWT", "emulator")
+    emulator, pinata = SolanaRPCEmulator(), FakePinataServer()
+    emulator.start()
+    pinata.start()
+    rpc_url, pinata_url = emulator.url, pinata.url
+    try:
+        emulator.handle("requestAirdrop", [str(wallet.pubkey()), 10 * LAMPORTS_PER_SOL])
+        with Cassette(cassette_path, mode=RECORD) as cassette:
+            recorded = launch(cassette, str(workspace / "image.png"), rpc_url, pinata_url, EmulatedSolanaCLI(rpc_url))
+            recorded.run()
+    finally:
+        emulator.stop()
+        pinata.stop()
+    assert recorded.to_file_path == f"{stocked.pubkey()}.json"
+    assert stock.count("To") == 1
+    kinds = {entry["kind"] for entry in cassette.entries}
+    assert kinds == {"subprocess", "http", "rpc", "wallet", "keypair_stock"}
+    assert not any(str(list(bytes(stocked))) in json.dumps(entry) for entry in cassette.entries)
+
+    # Servers down, no JWT, no wallet key file: everything comes from the cassette
+    replay_dir = workspace / "replay"
+    replay_dir.mkdir()
+    monkeypatch.chdir(replay_dir)
+    monkeypatch.delenv("YOUR_PINATA_JWT")
+    monkeypatch.delenv("WALLET_PRIVATE_KEY", raising=False)
+    monkeypatch.setattr(rpc_cache, "_shared_clients", {})
+    with Cassette(cassette_path, mode=REPLAY) as cassette:
+        replayed = launch(cassette, str(workspace / "image.png"), rpc_url, pinata_url)
+        replayed.run()
+
+    assert replayed.to_file_path == recorded.to_file_path
+    assert replayed.metadata_gateway_url == recorded.metadata_gateway_url
+    assert cassette.played == set(range(len(cassette.entries)))
+    # The stock was never opened and no keypair file was written
+    assert stock.count("To") == 1
+    assert not os.path.exists(replay_dir / "solana_keypair.json")
+
+
+def test_replay_without_a_recording_fails(workspace, monkeypatch):
+    monkeypatch.chdir(workspace)
+    with Cassette(str(workspace / "empty.cassette.gz"), mode=RECORD):
+        pass
+    with Cassette(str(workspace / "empty.cassette.gz"), mode=REPLAY) as cassette:
+        with pytest.raises(CassetteError, match="No recorded subprocess interaction"):
+            cassette.command_runner()("solana address", shell=True)
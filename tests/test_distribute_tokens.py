@@ -0,0 +1,211 @@
+import json
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from create_token.distribute_tokens import TokenDistributor, COMPUTE_UNITS_PER_RECIPIENT
+from create_token.token_program import PACKET_DATA_SIZE, get_associated_token_address
+from emulator.solana_emulator import SolanaRPCEmulator, LAMPORTS_PER_SOL
+
+DECIMALS = 6
+
+
+@pytest.fixture
+def emulator():
+    emulator = SolanaRPCEmulator()
+    emulator.start()
+    yield emulator
+    emulator.stop()
+
+
+class Launch:
+    """
+    A token in the emulator held by our wallet, and a recipients CSV for it
+    """
+    def __init__(self, emulator, tmp_path, count):
+        self.emulator = emulator
+        self.owner = Keypair()
+        self.keypair_path = tmp_path / "keypair.json"
+        self.keypair_path.write_text(json.dumps(list(bytes(self.owner))))
+        self.mint = str(Keypair().pubkey())
+        owner = str(self.owner.pubkey())
+        emulator.handle("requestAirdrop", [owner, 10 * LAMPORTS_PER_SOL])
+        emulator.handle("emulator_createMint", [owner, self.mint, DECIMALS])
+        emulator.handle("emulator_createAccount", [owner, owner, self.mint])
+        emulator.handle("emulator_mintTo", [owner, self.mint, owner, "1000000"])
+
+        self.recipients = {str(Keypair().pubkey()): (i + 1) * 10 ** DECIMALS + 5 for i in range(count)}
+        self.csv_path = tmp_path / "recipients.csv"
+        self.csv_path.write_text("recipient,amount\n" + "".join(
+            f"{recipient},{amount / 10 ** DECIMALS}\n" for recipient, amount in self.recipients.items()
+        ))
+
+    def distributor(self, **kwargs):
+        distributor = TokenDistributor(self.mint, str(self.csv_path), keypair_path=str(self.keypair_path),
+                                       rpc_url=self.emulator.url, poll_interval=0.01, **kwargs)
+        distributor.decimals = DECIMALS
+        return distributor
+
+    def balance(self, recipient):
+        address = get_associated_token_address(Pubkey.from_string(recipient), Pubkey.from_string(self.mint))
+        account = self.emulator.token_accounts.get(str(address))
+        return account["amount"] if account else 0
+
+    def ledger(self, distributor):
+        with open(distributor.ledger_path) as f:
+            return [json.loads(line) for line in f]
+
+
+class FlakyRPC:
+    """
+    Wraps the distributor's RPC client: drops the first `drop` sends, can hide every status
+    from the recent status cache (but not the history), and can move the block height on
+    """
+    def __init__(self, rpc, drop=0, forget_recent=False, height_offset=0):
+        self.rpc = rpc
+        self.drop = drop
+        self.forget_recent = forget_recent
+        self.height_offset = height_offset
+        self.sent = []
+
+    def __getattr__(self, name):
+        return getattr(self.rpc, name)
+
+    def send_transaction(self, transaction, skip_preflight=False):
+        self.sent.append(str(transaction.signatures[0]))
+        if self.drop:
+            self.drop -= 1
+            return str(transaction.signatures[0])
+        return self.rpc.send_transaction(transaction, skip_preflight)
+
+    def get_signature_statuses(self, signatures, search_history=False):
+        if self.forget_recent and not search_history:
+            return [None] * len(signatures)
+        return self.rpc.get_signature_statuses(signatures, search_history)
+
+    def get_block_height(self, commitment="confirmed"):
+        return self.rpc.get_block_height(commitment) + self.height_offset
+
+
+def test_load_recipients(emulator, tmp_path):
+    launch = Launch(emulator, tmp_path, 3)
+    assert launch.distributor().load_recipients() == launch.recipients
+
+    recipient = list(launch.recipients)[0]
+    for rows, error in ((f"recipient,amount\n{recipient},lots\n", "Line 2: invalid amount"),
+                        (f"{recipient},0.0000001\n", "multiple of 10\\^-6"),
+                        (f"{recipient},1\n" * 2, "duplicate recipient")):
+        launch.csv_path.write_text(rows)
+        with pytest.raises(ValueError, match=error):
+            launch.distributor().load_recipients()
+
+
+def test_pack_fills_packets_within_the_compute_limit(emulator, tmp_path):
+    launch = Launch(emulator, tmp_path, 60)
+    distributor = launch.distributor()
+    recipients = list(launch.recipients.items())
+    table = [AddressLookupTableAccount(Pubkey.default(), distributor.shared_addresses())]
+
+    plain, with_table = distributor.pack(recipients), distributor.pack(recipients, table)
+    for batches, lookup in ((plain, None), (with_table, table)):
+        assert [recipient for batch in batches for recipient in batch] == recipients
+        for batch in batches:
+            assert len(bytes(distributor.compile(batch, Hash.default(), lookup))) <= PACKET_DATA_SIZE
+        # Each batch is full: one more recipient would not fit the packet
+        for batch, following in zip(batches, batches[1:]):
+            bigger = batch + following[:1]
+            assert len(bytes(distributor.compile(bigger, Hash.default(), lookup))) > PACKET_DATA_SIZE
+    assert len(with_table) < len(plain)
+
+    limit = distributor.instructions(plain[0])[0]
+    assert int.from_bytes(bytes(limit.data)[1:5], "little") == COMPUTE_UNITS_PER_RECIPIENT * len(plain[0])
+
+
+@pytest.mark.parametrize("mode,count,creates_table", [
+    ("never", 300, False),
+    ("auto", 30, False),
+    ("auto", 300, True),
+    ("always", 5, True),
+])
+def test_lookup_table_mode(emulator, tmp_path, mode, count, creates_table):
+    launch = Launch(emulator, tmp_path, count)
+    distributor = launch.distributor(lookup_table=mode)
+    batches = distributor.setup_lookup_table(list(launch.recipients.items()))
+    assert bool(emulator.lookup_tables) == creates_table
+    if creates_table:
+        (table, entry), = emulator.lookup_tables.items()
+        assert entry["addresses"] == [str(address) for address in distributor.shared_addresses()]
+        assert [str(account.key) for account in distributor.lookup_table_accounts] == [table]
+        assert len(batches) == len(distributor.pack(list(launch.recipients.items())))
+
+
+def test_run_distributes_and_resumes(emulator, tmp_path):
+    launch = Launch(emulator, tmp_path, 25)
+    distributor = launch.distributor(max_in_flight=2)
+    rpc = FlakyRPC(distributor.rpc)
+    # The ledger must already name a transaction when it's sent, so a crash can't lose it
+    send = rpc.send_transaction
+
+    def send_after_recording(transaction, skip_preflight=False):
+        sent = {entry["signature"] for entry in launch.ledger(distributor) if entry["status"] == "sent"}
+        assert str(transaction.signatures[0]) in sent
+        return send(transaction, skip_preflight)
+
+    rpc.send_transaction = send_after_recording
+    distributor.rpc = rpc
+    assert distributor.run()["confirmed"] == 25
+    assert {recipient: launch.balance(recipient) for recipient in launch.recipients} == launch.recipients
+
+    statuses = {}
+    for entry in launch.ledger(distributor):
+        statuses.setdefault(entry["recipient"], []).append(entry["status"])
+    assert all(history == ["sent", "confirmed"] for history in statuses.values())
+
+    # A second run finds everything confirmed in the ledger and sends nothing
+    again = launch.distributor()
+    again.rpc = FlakyRPC(again.rpc)
+    assert again.run()["confirmed"] == 25
+    assert again.rpc.sent == []
+
+
+def test_dropped_transactions_are_resent_after_expiry(emulator, tmp_path):
+    launch = Launch(emulator, tmp_path, 12)
+    distributor = launch.distributor()
+    distributor.rpc = FlakyRPC(distributor.rpc, drop=1, height_offset=1000)
+    assert distributor.run()["confirmed"] == 12
+    assert {recipient: launch.balance(recipient) for recipient in launch.recipients} == launch.recipients
+    # The dropped batch went out twice, the others once
+    assert len(distributor.rpc.sent) == len(set(distributor.rpc.sent)) + 1
+
+
+def test_landed_transactions_missing_from_the_status_cache_are_not_resent(emulator, tmp_path):
+    launch = Launch(emulator, tmp_path, 12)
+    distributor = launch.distributor()
+    distributor.rpc = FlakyRPC(distributor.rpc, forget_recent=True, height_offset=1000)
+    assert distributor.run()["confirmed"] == 12
+    assert len(distributor.rpc.sent) == len(set(distributor.rpc.sent))
+    assert {recipient: launch.balance(recipient) for recipient in launch.recipients} == launch.recipients
+
+
+def test_reconcile(emulator, tmp_path):
+    launch = Launch(emulator, tmp_path, 4)
+    distributor = launch.distributor()
+    landed, dropped, waiting, done = [(recipient, amount) for recipient, amount in launch.recipients.items()]
+
+    # One transaction landed, one never did; both are past their last valid block height
+    distributor.rpc = FlakyRPC(distributor.rpc, drop=1)
+    distributor.send([dropped])
+    distributor.send([landed])
+    distributor.record([done], "confirmed", "earlier")
+    height = distributor.rpc.get_block_height()
+    distributor.record([waiting], "sent", "unknown", height + 100)
+    ledger = distributor.load_ledger()
+    ledger[landed[0]]["last_valid_block_height"] = ledger[dropped[0]]["last_valid_block_height"] = height - 1
+
+    done_now, pending, in_flight = distributor.reconcile(ledger, launch.recipients)
+    assert done_now == {done[0], landed[0]}
+    assert pending == [dropped]
+    assert list(in_flight) == ["unknown"]
+    assert launch.ledger(distributor)[-1]["recipient"] == landed[0]
+    assert launch.ledger(distributor)[-1]["status"] == "confirmed"
@@ -0,0 +1,114 @@
+import csv
+import base64
+import struct
+import base58
+import pytest
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from create_token.holder_snapshot import HolderSnapshot, ACCOUNT_SLICE, BASE_ACCOUNT_LENGTH
+from create_token.token_program import TOKEN_2022_PROGRAM_ID
+
+MINT = Keypair().pubkey()
+OTHER_MINT = Keypair().pubkey()
+
+
+def token_account(mint, owner, amount, extended):
+    data = bytes(mint) + bytes(owner) + struct.pack("<Q", amount) + bytes(93)
+    assert len(data) == BASE_ACCOUNT_LENGTH
+    # Extended accounts carry the account type and an ImmutableOwner TLV after the base layout
+    return data + b"\x02" + struct.pack("<HH", 7, 0) if extended else data
+
+
+def mint_account(decimals):
+    return struct.pack("<I", 0) + bytes(32) + struct.pack("<QBB", 0, decimals, 1) + bytes(36)
+
+
+class StubRPC:
+    """
+    getProgramAccounts over hand-built accounts, applying the filters and data slice like a node
+    """
+    def __init__(self, accounts, decimals=6):
+        self.accounts = accounts
+        self.decimals = decimals
+        self.queries = []
+
+    def get_account_info(self, address):
+        return {"owner": str(TOKEN_2022_PROGRAM_ID), "data": mint_account(self.decimals)}
+
+    def get_program_accounts(self, program_id, filters=None, data_slice=None):
+        self.queries.append(filters)
+        results = []
+        for address, data in self.accounts.items():
+            if all(len(data) == f["dataSize"] if "dataSize" in f else
+                   data[f["memcmp"]["offset"]:].startswith(base58.b58decode(f["memcmp"]["bytes"]))
+                   for f in filters):
+                sliced = data[data_slice["offset"]:data_slice["offset"] + data_slice["length"]]
+                results.append({"pubkey": address, "account": {"data": [base64.b64encode(sliced).decode(), "base64"]}})
+        return results
+
+
+def owner_starting_with(byte):
+    return Pubkey(bytes([byte]) + bytes(Keypair().pubkey())[1:])
+
+
+HOLDERS = [
+    (owner_starting_with(0), 1_500_000, False),
+    (owner_starting_with(0), 2, True),
+    (owner_starting_with(7), 0, True),
+    (owner_starting_with(255), 10 ** 19, False),
+    (owner_starting_with(255), 0, False),
+]
+
+
+@pytest.fixture
+def accounts():
+    accounts = {str(Keypair().pubkey()): token_account(MINT, owner, amount, extended)
+                for owner, amount, extended in HOLDERS}
+    # A holder of another mint, which no query may return
+    accounts[str(Keypair().pubkey())] = token_account(OTHER_MINT, owner_starting_with(0), 5, True)
+    return accounts
+
+
+def test_queries_cover_each_account_once():
+    unsharded = list(HolderSnapshot(str(MINT), "out.csv", shard_by_owner=False, rpc=StubRPC({})).queries())
+    assert len(unsharded) == 2
+    assert unsharded[0][1] == {"dataSize": BASE_ACCOUNT_LENGTH}
+
+    sharded = list(HolderSnapshot(str(MINT), "out.csv", rpc=StubRPC({})).queries())
+    assert len(sharded) == 512
+    assert all(query[0] == {"memcmp": {"offset": 0, "bytes": str(MINT)}} for query in sharded)
+    assert sorted(base58.b58decode(query[2]["memcmp"]["bytes"])[0] for query in sharded[:256]) == list(range(256))
+
+
+def test_decode(accounts):
+    snapshot = HolderSnapshot(str(MINT), "out.csv", rpc=StubRPC(accounts))
+    snapshot.decimals = 6
+    results = StubRPC(accounts).get_program_accounts(TOKEN_2022_PROGRAM_ID, filters=[], data_slice=ACCOUNT_SLICE)[:5]
+    columns = snapshot.decode(results)
+    assert columns["amount"] == [1_500_000, 2, 10 ** 19]
+    assert columns["ui_amount"] == ["1.5", "0.000002", "10000000000000"]
+    assert columns["owner"] == [str(HOLDERS[i][0]) for i in (0, 1, 3)]
+    assert columns["token_account"] == [results[i]["pubkey"] for i in (0, 1, 3)]
+
+    snapshot.include_empty = True
+    snapshot.decimals = 0
+    columns = snapshot.decode(results)
+    assert columns["amount"] == [amount for _, amount, _ in HOLDERS]
+    assert columns["ui_amount"][:3] == ["1500000", "2", "0"]
+
+
+@pytest.mark.parametrize("shard_by_owner", [True, False])
+@pytest.mark.parametrize("include_empty", [True, False])
+def test_run_exports_every_holder_once(accounts, tmp_path, shard_by_owner, include_empty):
+    rpc = StubRPC(accounts)
+    output = tmp_path / "holders.csv"
+    stats = HolderSnapshot(str(MINT), str(output), shard_by_owner=shard_by_owner, include_empty=include_empty,
+                           chunk_size=2, rpc=rpc).run()
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    expected = sorted((str(owner), str(amount)) for owner, amount, _ in HOLDERS if amount or include_empty)
+    assert sorted((row["owner"], row["amount"]) for row in rows) == expected
+    assert stats["requests"] == (512 if shard_by_owner else 2)
+    assert stats["accounts"] == len(HOLDERS)
+    assert stats["total_amount"] == sum(amount for _, amount, _ in HOLDERS)
@@ -0,0 +1,53 @@
+import hashlib
+import pytest
+from pinata.ipfs_cid import (
+    CODEC_DAG_PB, CODEC_RAW, encode_varint, decode_varint, cid_v1_bytes, cid_to_string, cid_from_string,
+    parse_cid, raw_cid
+)
+
+# CIDs `ipfs add --cid-version=1 --raw-leaves` reports for these single-block files
+RAW_VECTORS = [
+    (b"", "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"),
+    (b"hello world", "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e"),
+    (b"hello world\n", "bafkreifjjcie6lypi6ny7amxnfftagclbuxndqonfipmb64f2km2devei4"),
+]
+# The empty UnixFS directory, as CIDv0 and CIDv1
+EMPTY_DIRECTORY_V0 = "QmUNLLsPACCz1vLxQVkXqqLX5R1X345qqfHbsf67hvA3Nn"
+EMPTY_DIRECTORY_V1 = "bafybeiczsscdsbs7ffqz55asqdf3smv6klcw3gofszvwlyarci47bgf354"
+EMPTY_DIRECTORY_BLOCK = bytes.fromhex("0a020801")
+
+
+@pytest.mark.parametrize("value,encoded", [
+    (0, b"\x00"), (1, b"\x01"), (127, b"\x7f"), (128, b"\x80\x01"), (300, b"\xac\x02"), (16384, b"\x80\x80\x01"),
+])
+def test_varint_round_trip(value, encoded):
+    assert encode_varint(value) == encoded
+    assert decode_varint(b"\xff" + encoded, 1) == (value, 1 + len(encoded))
+
+
+@pytest.mark.parametrize("data,cid", RAW_VECTORS)
+def test_raw_cid_matches_reference(data, cid):
+    assert raw_cid(data) == cid
+
+
+@pytest.mark.parametrize("data,cid", RAW_VECTORS)
+def test_parse_cid(data, cid):
+    assert parse_cid(cid) == (1, CODEC_RAW, hashlib.sha256(data).digest())
+
+
+def test_cid_string_round_trip():
+    for _, cid in RAW_VECTORS:
+        assert cid_to_string(cid_from_string(cid)) == cid
+    assert cid_to_string(cid_from_string(EMPTY_DIRECTORY_V0)) == EMPTY_DIRECTORY_V0
+
+
+def test_dag_pb_cid_matches_reference():
+    digest = hashlib.sha256(EMPTY_DIRECTORY_BLOCK).digest()
+    assert cid_to_string(cid_v1_bytes(CODEC_DAG_PB, digest)) == EMPTY_DIRECTORY_V1
+    assert parse_cid(EMPTY_DIRECTORY_V0) == (0, CODEC_DAG_PB, digest)
+    assert parse_cid(EMPTY_DIRECTORY_V1) == (1, CODEC_DAG_PB, digest)
+
+
+def test_unsupported_multibase():
+    with pytest.raises(ValueError):
+        cid_from_string("zb2rhe5P4gXftAwvA4eXQ5HJwsER2owDyS9sKaQRRVQPn93bA")
@@ -0,0 +1,185 @@
+import json
+import threading
+import multiprocessing
+import pytest
+import requests
+from http.server import ThreadingHTTPServer
+from service import job_server
+from service.job_queue import JobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED, INTERRUPTED
+from service.job_server import TokenJobService, JobRequestHandler
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_jobs_are_claimed_in_order(queue):
+    first, second = queue.submit({"name": "A"}), queue.submit({"name": "B"})
+    job = queue.claim("worker-0")
+    assert (job["id"], job["status"], job["worker"], job["attempts"], job["payload"]) == (
+        first, RUNNING, "worker-0", 1, {"name": "A"})
+    assert queue.claim("worker-1")["id"] == second
+    assert queue.claim("worker-0") is None
+
+
+def claim_all(db_path, worker):
+    queue = JobQueue(db_path)
+    claimed = []
+    while (job := queue.claim(worker)) is not None:
+        claimed.append(job["id"])
+    return claimed
+
+
+def test_each_job_is_claimed_once_across_processes(queue):
+    ids = [queue.submit({"n": i}) for i in range(60)]
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        claimed = pool.starmap(claim_all, [(queue.db_path, f"worker-{i}") for i in range(4)])
+    assert sorted(job_id for ids_ in claimed for job_id in ids_) == ids
+    assert queue.depth()[RUNNING] == 60
+
+
+def test_results_and_failures(queue):
+    done, failed = queue.submit({}), queue.submit({})
+    queue.claim("w")
+    queue.claim("w")
+    queue.complete(done, {"mint_address": "Mint"})
+    queue.fail(failed, "boom")
+    assert queue.get(done)["result"] == {"mint_address": "Mint"}
+    assert (queue.get(failed)["status"], queue.get(failed)["error"]) == (FAILED, "boom")
+    assert queue.get(999) is None
+
+
+def test_interrupt_and_retry(queue):
+    ids = [queue.submit({}) for _ in range(3)]
+    queue.claim("worker-0")
+    queue.claim("worker-1")
+    assert queue.interrupt_running("worker-1") == 1
+    assert [queue.get(job_id)["status"] for job_id in ids] == [RUNNING, INTERRUPTED, QUEUED]
+    assert queue.interrupt_running() == 1
+
+    assert not queue.retry(ids[2])
+    assert queue.retry(ids[1])
+    job = queue.get(ids[1])
+    assert (job["status"], job["worker"], job["error"]) == (QUEUED, None, None)
+    assert queue.claim("worker-2")["attempts"] == 2
+    assert queue.depth() == {QUEUED: 1, RUNNING: 1, SUCCEEDED: 0, FAILED: 0, INTERRUPTED: 1}
+
+
+class FakeProcess:
+    started = []
+
+    def __init__(self, target, args, name, daemon):
+        self.name = name
+        self.alive = False
+        self.exitcode = None
+
+    def start(self):
+        self.alive = True
+        FakeProcess.started.append(self)
+
+    def is_alive(self):
+        return self.alive
+
+    def die(self, exitcode=1):
+        self.alive = False
+        self.exitcode = exitcode
+
+
+class StubRPC:
+    def get_health(self):
+        return "ok"
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_server.multiprocessing, "Process", FakeProcess)
+    FakeProcess.started = []
+    service = TokenJobService(db_path=str(tmp_path / "jobs.sqlite3"), workspace=str(tmp_path / "daemon"),
+                              restart_delay=1, max_restart_delay=4, max_restarts=3, stable_after=60)
+    service.rpc = StubRPC()
+    return service
+
+
+def test_crashing_worker_backs_off_then_stops(service):
+    service.start_worker("worker-0", now=0)
+    job_id = service.queue.submit({})
+    service.queue.claim("worker-0")
+
+    now = 0
+    delays = []
+    for _ in range(3):
+        service.workers["worker-0"].die()
+        service.supervise(now)
+        state = service.worker_states["worker-0"]
+        assert state["status"] == "backoff"
+        delays.append(state["restart_at"] - now)
+        service.supervise(state["restart_at"] - 0.01)
+        assert state["status"] == "backoff"
+        now = state["restart_at"]
+        service.supervise(now)
+        assert state["status"] == "running"
+    assert delays == [1, 2, 4]
+    assert service.queue.get(job_id)["status"] == INTERRUPTED
+
+    service.workers["worker-0"].die(exitcode=2)
+    service.supervise(now)
+    service.supervise(now + 1000)
+    assert len(FakeProcess.started) == 4
+    assert service.health()["worker_states"] == {
+        "worker-0": {"status": "stopped", "crashes": 4, "restarts": 3, "exitcode": 2}
+    }
+    assert service.health()["workers_alive"] == 0
+
+
+def test_worker_that_stayed_up_starts_the_count_over(service):
+    service.start_worker("worker-0", now=0)
+    service.workers["worker-0"].die()
+    service.supervise(1)
+    service.supervise(2)
+    assert service.worker_states["worker-0"]["crashes"] == 1
+
+    service.workers["worker-0"].die()
+    service.supervise(2 + 60)
+    assert service.worker_states["worker-0"]["crashes"] == 1
+    assert service.worker_states["worker-0"]["restart_at"] == 62 + 1
+
+
+@pytest.fixture
+def api(service, tmp_path):
+    JobRequestHandler.service = service
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JobRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_routes(api, service, tmp_path):
+    image = tmp_path / "token.png"
+    image.write_bytes(b"png")
+    job = {"name": "Sampletoken1", "symbol": "S1", "image_path": str(image), "mint_amount": 1000,
+           "description": "A test token"}
+
+    response = requests.post(f"{api}/jobs", data=json.dumps(job))
+    assert (response.status_code, response.json()) == (202, {"id": 1, "status": "queued"})
+    assert requests.get(f"{api}/jobs/1").json()["payload"]["image_path"] == str(image)
+    assert requests.get(f"{api}/jobs/2").status_code == 404
+    assert requests.get(f"{api}/queue").json()[QUEUED] == 1
+
+    for invalid, error in (({**job, "mint_amount": "1000"}, "'mint_amount' is required"),
+                           ({**job, "storage": "ftp"}, "Unknown storage backend"),
+                           ({**job, "image_path": str(tmp_path / "missing.png")}, "Image not found")):
+        response = requests.post(f"{api}/jobs", data=json.dumps(invalid))
+        assert response.status_code == 400 and error in response.json()["error"]
+    assert requests.post(f"{api}/jobs", data="[1]").status_code == 400
+
+    assert requests.post(f"{api}/jobs/1/retry").status_code == 409
+    service.queue.claim("worker-0")
+    service.queue.fail(1, "boom")
+    assert requests.post(f"{api}/jobs/1/retry").status_code == 202
+    assert requests.get(f"{api}/jobs/1").json()["status"] == QUEUED
+
+    health = requests.get(f"{api}/health").json()
+    assert (health["rpc"], health["workers"], health["queue"][QUEUED]) == ("ok", 1, 1)
+    assert requests.get(f"{api}/nope").status_code == 404
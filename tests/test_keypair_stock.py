@@ -0,0 +1,103 @@
+import os
+import json
+import subprocess
+import multiprocessing
+import pytest
+from solders.keypair import Keypair
+from create_token.keypair_stock import KeypairStock, KeypairStocker
+
+PASSPHRASE = "correct horse battery staple"
+
+
+@pytest.fixture
+def stock(tmp_path):
+    return KeypairStock(str(tmp_path / "stock.sqlite3"), passphrase=PASSPHRASE)
+
+
+def claim_all(db_path):
+    stock = KeypairStock(db_path, passphrase=PASSPHRASE)
+    claimed = []
+    while True:
+        with stock.claim("To") as keypair:
+            if keypair is None:
+                return claimed
+            claimed.append(str(keypair.pubkey()))
+
+
+def test_each_keypair_is_claimed_once_across_processes(stock):
+    keypairs = [Keypair() for _ in range(40)]
+    stock.add("To", keypairs)
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        claimed = [address for addresses in pool.map(claim_all, [stock.db_path] * 4) for address in addresses]
+
+    assert sorted(claimed) == sorted(str(keypair.pubkey()) for keypair in keypairs)
+    assert stock.count("To") == 0
+
+
+def test_claimed_keypair_round_trips(stock):
+    keypair = Keypair()
+    stock.add("To", [keypair])
+    stock.add("Ab", [Keypair()])
+    with stock.claim("To") as claimed:
+        assert bytes(claimed) == bytes(keypair)
+    with stock.claim("To") as claimed:
+        assert claimed is None
+    assert stock.counts() == {"Ab": 1}
+
+
+def test_wrong_passphrase_is_refused_before_claiming(stock):
+    stock.add("To", [Keypair() for _ in range(3)])
+    with pytest.raises(ValueError, match="does not open"):
+        KeypairStock(stock.db_path, passphrase="rotated")
+    assert stock.count("To") == 3
+
+
+def test_key_stays_in_stock_until_the_caller_saved_it(stock):
+    keypair = Keypair()
+    stock.add("To", [keypair])
+    with pytest.raises(OSError):
+        with stock.claim("To"):
+            raise OSError("disk full")
+    assert stock.count("To") == 1
+
+    # An undecryptable row is kept too
+    with stock._connection() as conn:
+        conn.execute("UPDATE keypairs SET ciphertext = ?", (bytes(80),))
+    with pytest.raises(Exception):
+        with stock.claim("To"):
+            pass
+    assert stock.count("To") == 1
+
+
+class FakeKeygen:
+    """
+    subprocess.run stand-in for solana-keygen grind, writing the keypair files to cwd
+    """
+    def __init__(self):
+        self.counts = []
+
+    def __call__(self, argv, cwd, **kwargs):
+        pattern, count = argv[-1].split(":")
+        self.counts.append(int(count))
+        for _ in range(int(count)):
+            keypair = Keypair()
+            with open(os.path.join(cwd, f"{pattern}{keypair.pubkey()}.json"), 'w') as f:
+                json.dump(list(bytes(keypair)), f)
+        return subprocess.CompletedProcess(argv, 0, "", "")
+
+
+def test_refill_only_at_the_low_watermark(stock):
+    keygen = FakeKeygen()
+    stocker = KeypairStocker(stock, {"To": 10}, low_watermark=0.5, batch_size=4, command_runner=keygen)
+    assert stocker.refill("To") == 10
+    assert keygen.counts == [4, 4, 2]
+    assert stock.count("To") == 10
+
+    for _ in range(4):
+        with stock.claim("To"):
+            pass
+    assert stocker.refill("To") == 0
+    with stock.claim("To"):
+        pass
+    assert stocker.refill("To") == 5
+    assert stocker.run(once=True) == {"To": 10}
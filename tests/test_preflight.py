@@ -0,0 +1,145 @@
+import pytest
+from PIL import Image
+from create_token.preflight import (
+    PreflightCheck, PreflightError, MAX_SUPPLY, MINT_DECIMALS, SIGNATURES_PER_TOKEN, LAMPORTS_PER_SIGNATURE,
+    MINT_WITH_METADATA_POINTER_SIZE, TOKEN_ACCOUNT_SIZE, token_metadata_size
+)
+
+WALLET = "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"
+
+
+def rent(size):
+    return (size + 128) * 6960
+
+
+class StubRPC:
+    def __init__(self, balance=10 ** 12):
+        self.balance = balance
+        self.balances = []
+
+    def get_minimum_balance_for_rent_exemption(self, size):
+        return rent(size)
+
+    def get_balance(self, address):
+        self.balances.append(address)
+        return self.balance
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "token.png"
+    Image.new("RGB", (4, 4)).save(path)
+    return str(path)
+
+
+def token(image_path, **fields):
+    return {"name": "Sampletoken1", "symbol": "S1", "description": "A test token", "image_path": image_path,
+            "mint_amount": 1_000_000, **fields}
+
+
+def problems(tokens, rpc=None):
+    with pytest.raises(PreflightError) as info:
+        PreflightCheck(tokens, wallet_address=WALLET, rpc=rpc or StubRPC()).run()
+    return info.value.problems
+
+
+def test_valid_launch_is_costed(image_path):
+    rpc = StubRPC()
+    report = PreflightCheck([token(image_path)], wallet_address=WALLET, rpc=rpc).run()
+    check = PreflightCheck([], rpc=rpc)
+    uri = check.metadata_uri_estimate(token(image_path))
+    expected = (rent(MINT_WITH_METADATA_POINTER_SIZE + token_metadata_size("Sampletoken1", "S1", uri))
+                + rent(TOKEN_ACCOUNT_SIZE))
+    assert report["total"] == {"rent": expected, "fees": SIGNATURES_PER_TOKEN * LAMPORTS_PER_SIGNATURE,
+                               "total": expected + SIGNATURES_PER_TOKEN * LAMPORTS_PER_SIGNATURE}
+    assert rpc.balances == [WALLET]
+
+
+@pytest.mark.parametrize("field", ["name", "symbol", "description", "image_path", "mint_amount"])
+def test_required_fields(image_path, field):
+    entry = token(image_path)
+    del entry[field]
+    assert problems([entry]) == [f"token 1 ({entry.get('name')}): '{field}' is required and must be "
+                                 f"{'an integer' if field == 'mint_amount' else 'a string'}"]
+
+
+def test_mint_amount_must_not_be_a_bool(image_path):
+    assert "must be an integer" in problems([token(image_path, mint_amount=True)])[0]
+
+
+@pytest.mark.parametrize("fields,problem", [
+    ({"name": "A" * 33}, "longer than 32 bytes"),
+    ({"symbol": "S" * 11}, "longer than 10 bytes"),
+    ({"name": "Two words"}, "must be one word"),
+    ({"symbol": "S1;rm"}, "must be one word"),
+    ({"symbol": "$S1"}, "must be one word"),
+])
+def test_name_and_symbol_limits(image_path, fields, problem):
+    assert problem in problems([token(image_path, **fields)])[0]
+
+
+def test_limits_are_inclusive(image_path):
+    PreflightCheck([token(image_path, name="A" * 32, symbol="S" * 10)], wallet_address=WALLET, rpc=StubRPC()).run()
+
+
+def test_metadata_uri_length(image_path):
+    check = PreflightCheck([token(image_path)], wallet_address=WALLET, rpc=StubRPC(),
+                           gateway_base="https://" + "g" * 120)
+    with pytest.raises(PreflightError, match="over the 200 byte limit"):
+        check.run()
+
+
+@pytest.mark.parametrize("amount,ok", [(0, False), (-1, False), (1, True),
+                                       (MAX_SUPPLY // 10 ** MINT_DECIMALS, True),
+                                       (MAX_SUPPLY // 10 ** MINT_DECIMALS + 1, False)])
+def test_supply_fits_a_u64(image_path, amount, ok):
+    tokens = [token(image_path, mint_amount=amount)]
+    if ok:
+        PreflightCheck(tokens, wallet_address=WALLET, rpc=StubRPC()).run()
+    else:
+        assert "mint_amount" in problems(tokens)[0]
+
+
+def test_names_must_differ_case_insensitively(image_path):
+    assert problems([token(image_path), token(image_path, name="SAMPLETOKEN1"), token(image_path)]) == [
+        "token 2 (SAMPLETOKEN1): name clashes with token 1",
+        "token 3 (Sampletoken1): name clashes with token 1",
+    ]
+
+
+def test_image_probe(tmp_path):
+    tiff = tmp_path / "token.tiff"
+    Image.new("RGB", (4, 4)).save(tiff)
+    text = tmp_path / "token.png"
+    text.write_text("not an image")
+    found = problems([token(str(tmp_path / "missing.png"), name="A"), token(str(tiff), name="B"),
+                      token(str(text), name="C")])
+    assert found[0] == f"token 1 (A): image not found at {tmp_path / 'missing.png'}"
+    assert "is TIFF, expected one of" in found[1]
+    assert found[2].startswith(f"token 3 (C): image {text} can't be read")
+
+
+def test_every_problem_is_reported_in_one_pass(image_path):
+    found = problems([token(image_path, symbol="S" * 11), "not an object", token(image_path, name="B", mint_amount=0)])
+    assert len(found) == 3 and found[1] == "token 2: must be a JSON object"
+
+
+def test_balance_shortfall(image_path):
+    rpc = StubRPC(balance=1000)
+    found = problems([token(image_path), token(image_path, name="B")], rpc=rpc)
+    assert len(found) == 1 and found[0].startswith(f"wallet {WALLET} holds 0.000001 SOL but the launch needs")
+
+
+class StubPool:
+    wallets = [object(), object()]
+    treasury = object()
+
+    def total_balance(self):
+        return 0
+
+
+def test_wallet_pool_pays_instead(image_path):
+    rpc = StubRPC()
+    with pytest.raises(PreflightError, match="fee payer pool of 2 and treasury holds 0.000000 SOL"):
+        PreflightCheck([token(image_path)], rpc=rpc, wallet_pool=StubPool()).run()
+    assert rpc.balances == []
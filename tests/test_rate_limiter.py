@@ -0,0 +1,188 @@
+import threading
+from email.utils import formatdate
+import pytest
+import requests
+from pinata import rate_limiter
+from pinata.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeCondition:
+    """
+    Single-threaded stand-in for threading.Condition: waiting just moves the clock on
+    """
+    def __init__(self, clock):
+        self.clock = clock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def wait(self, timeout=None):
+        assert timeout is not None, "would block forever"
+        self.clock.now += timeout
+
+    def notify_all(self):
+        pass
+
+
+class FakeRandom:
+    @staticmethod
+    def uniform(low, high):
+        return high
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(rate_limiter, "random", FakeRandom)
+    return clock
+
+
+def limiter(clock, **kwargs):
+    limiter = AdaptiveRateLimiter(**kwargs)
+    limiter.condition = FakeCondition(clock)
+    return limiter
+
+
+class Response:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+
+class StubSession:
+    """
+    send() answering with queued responses, or raising queued exceptions
+    """
+    def __init__(self, clock, *outcomes):
+        self.clock = clock
+        self.outcomes = list(outcomes)
+        self.sent_at = []
+
+    def send(self):
+        self.sent_at.append(self.clock.now)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_parse_retry_after(clock):
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(formatdate(clock.now + 30, usegmt=True)) == pytest.approx(30, abs=1)
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_successes_raise_rate_and_window_up_to_the_caps(clock):
+    limit = limiter(clock, rate=1.0, concurrency=4, rate_step=0.5, max_rate=2.0, max_concurrency=5)
+    limit.release(limit.acquire())
+    assert (limit.rate, limit.concurrency) == (1.5, 4.25)
+    for _ in range(10):
+        limit.release(limit.acquire())
+    assert (limit.rate, limit.concurrency) == (2.0, 5)
+
+
+def test_throttling_halves_once_per_round(clock):
+    limit = limiter(clock, rate=8.0, burst=4, concurrency=8, min_rate=1.5)
+    first, second = limit.acquire(), limit.acquire()
+    clock.now += 1
+    limit.release(first, throttled=True)
+    limit.release(second, throttled=True)
+    assert (limit.rate, limit.concurrency) == (4.0, 4.0)
+
+    # A request sent after the back-off that is throttled again halves again, down to the floors
+    for _ in range(3):
+        clock.now += 1
+        limit.release(limit.acquire(), throttled=True)
+    assert (limit.rate, limit.concurrency) == (1.5, 1.0)
+    assert limit.stats["throttled"] == 5
+
+
+def test_slow_responses_shrink_the_window(clock):
+    limit = limiter(clock, rate=1.0, concurrency=10, target_latency=10)
+    started = limit.acquire()
+    clock.now += 11
+    limit.release(started)
+    assert (limit.rate, limit.concurrency, limit.stats["slow"]) == (1.0, 8.0, 1)
+
+
+def test_token_bucket_paces_requests(clock):
+    limit = limiter(clock, rate=2.0, burst=2, rate_step=0)
+    start = clock.now
+    started = []
+    for _ in range(5):
+        started.append(limit.acquire() - start)
+        limit.release(started[-1] + start)
+    assert started == [0, 0, 0.5, 1.0, 1.5]
+
+
+def test_retry_after_pauses_every_caller(clock):
+    limit = limiter(clock, rate=10.0, burst=10)
+    limit.release(limit.acquire(), throttled=True, retry_after=5)
+    assert limit.acquire() == pytest.approx(clock.now) and clock.now >= 1_000_005
+
+
+def test_concurrency_window_blocks_until_a_release():
+    limit = AdaptiveRateLimiter(rate=1000, burst=10, concurrency=1)
+    started = limit.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limit.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.2)
+    limit.release(started)
+    assert acquired.wait(5)
+    thread.join()
+
+
+def test_throttled_responses_are_retried(clock):
+    limit = limiter(clock, rate=100.0, burst=10)
+    session = StubSession(clock, Response(429, "2"), Response(503), Response(200))
+    assert limit.request(session.send).status_code == 200
+    # Retry-After is waited out by the pause, other throttles by a backoff sleep
+    assert session.sent_at[1] - session.sent_at[0] >= 2
+    assert clock.sleeps == [1.0]
+    assert limit.stats["retries"] == 2 and limit.stats["throttled"] == 2
+
+
+def test_errors_that_are_not_throttling_are_returned(clock):
+    limit = limiter(clock)
+    session = StubSession(clock, Response(400), Response(200))
+    assert limit.request(session.send).status_code == 400
+    assert limit.stats["retries"] == 0
+
+
+def test_connection_errors_are_retried(clock):
+    limit = limiter(clock, rate=100.0, burst=10, concurrency=4)
+    session = StubSession(clock, requests.exceptions.ConnectionError(), requests.exceptions.Timeout(), Response(200))
+    assert limit.request(session.send).status_code == 200
+    assert clock.sleeps == [0.5, 1.0]
+    assert limit.concurrency < 4 and limit.in_flight == 0
+
+
+def test_retries_run_out(clock):
+    limit = limiter(clock, rate=100.0, burst=10, max_retries=2)
+    assert limit.request(StubSession(clock, *[Response(429)] * 3).send).status_code == 429
+    with pytest.raises(requests.exceptions.ConnectionError):
+        limit.request(StubSession(clock, *[requests.exceptions.ConnectionError()] * 3).send)
+    assert limit.in_flight == 0
@@ -0,0 +1,51 @@
+import pytest
+from PIL import Image
+from pinata.resize_image import ImageResizer
+
+
+def write_animation(path, colors, durations, **options):
+    frames = [Image.new("RGB", (64, 32), color) for color in colors]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=durations, **options)
+    return str(path)
+
+
+def frame_info(path):
+    with Image.open(path) as img:
+        durations = []
+        for i in range(img.n_frames):
+            img.seek(i)
+            img.load()
+            durations.append(img.info["duration"])
+        return img.format, img.size, durations, img.info.get("loop")
+
+
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+
+
+@pytest.mark.parametrize("loop", [0, 3, None])
+def test_gif_keeps_frames_durations_and_loop(tmp_path, loop):
+    options = {} if loop is None else {"loop": loop}
+    source = write_animation(tmp_path / "in.gif", COLORS, [100, 200, 300, 400], **options)
+    ImageResizer(source, str(tmp_path / "out.gif")).process()
+    assert frame_info(tmp_path / "out.gif") == ("GIF", (512, 512), [100, 200, 300, 400], loop)
+
+
+def test_sampled_frames_keep_the_total_duration(tmp_path):
+    source = write_animation(tmp_path / "in.gif", COLORS, [100, 200, 300, 400], loop=0)
+    ImageResizer(source, str(tmp_path / "out.gif"), max_frames=2).process()
+    assert frame_info(tmp_path / "out.gif")[2] == [600, 400]
+
+
+def test_webp_animation(tmp_path):
+    source = write_animation(tmp_path / "in.webp", COLORS, [100, 200, 300, 400], loop=2)
+    resizer = ImageResizer(source, str(tmp_path / "out.png"))
+    resizer.process()
+    assert resizer.output_path == str(tmp_path / "out.webp")
+    assert frame_info(resizer.output_path) == ("WEBP", (512, 512), [100, 200, 300, 400], 2)
+
+
+def test_play_once_gif_saved_as_webp_plays_once(tmp_path):
+    source = write_animation(tmp_path / "in.gif", COLORS, [100, 200, 300, 400])
+    resizer = ImageResizer(source, str(tmp_path / "out.webp"))
+    resizer.process()
+    assert frame_info(resizer.output_path)[3] == 1
@@ -0,0 +1,162 @@
+import threading
+import pytest
+from utils import rpc_cache
+from utils.rpc_cache import CachingSolanaRPCClient
+from utils.solana_rpc import SolanaRPCClient, SolanaRPCError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class StubRPC:
+    """
+    Upstream for SolanaRPCClient.call: records every request and answers with a counter,
+    so a cached result can be told apart from a fresh one
+    """
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def call(self, method, params=None):
+        with self.lock:
+            self.calls.append(method)
+            count = len(self.calls)
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {"value": count}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    stub = StubRPC()
+    monkeypatch.setattr(SolanaRPCClient, "call", lambda client, method, params=None: stub.call(method, params))
+    return stub
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rpc_cache, "time", clock)
+    return clock
+
+
+def test_result_is_cached_until_its_ttl(upstream, clock):
+    client = CachingSolanaRPCClient("http://rpc.test", ttls={"getBalance": 5})
+    assert client.call("getBalance", ["a"]) == {"value": 1}
+    clock.now += 4.9
+    assert client.call("getBalance", ["a"]) == {"value": 1}
+    clock.now += 0.2
+    assert client.call("getBalance", ["a"]) == {"value": 2}
+    assert client.stats["getBalance"] == {"hits": 1, "disk_hits": 0, "misses": 2, "coalesced": 0}
+
+
+def test_uncached_methods_always_go_upstream(upstream, clock):
+    client = CachingSolanaRPCClient("http://rpc.test")
+    client.call("getLatestBlockhash")
+    client.call("getLatestBlockhash")
+    assert upstream.calls == ["getLatestBlockhash", "getLatestBlockhash"]
+
+
+def test_callers_get_their_own_copy(upstream, clock):
+    client = CachingSolanaRPCClient("http://rpc.test")
+    client.call("getBalance", ["a"])["value"] = 99
+    assert client.call("getBalance", ["a"]) == {"value": 1}
+
+
+def test_least_recently_used_entry_is_evicted(upstream, clock):
+    client = CachingSolanaRPCClient("http://rpc.test", max_entries=2)
+    client.call("getBalance", ["a"])
+    client.call("getBalance", ["b"])
+    client.call("getBalance", ["a"])
+    client.call("getBalance", ["c"])
+    assert len(upstream.calls) == 3
+
+    client.call("getBalance", ["a"])
+    assert len(upstream.calls) == 3
+    client.call("getBalance", ["b"])
+    assert len(upstream.calls) == 4
+
+
+def start_callers(client, count, results):
+    def call():
+        try:
+            results.append(client.call("getAccountInfo", ["a"]))
+        except SolanaRPCError as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def wait_for_waiters(client, count):
+    for _ in range(500):
+        with client.lock:
+            if client.stats.get("getAccountInfo", {}).get("coalesced") == count:
+                return
+        threading.Event().wait(0.01)
+    raise AssertionError("callers never coalesced")
+
+
+def test_concurrent_callers_share_one_request(upstream, clock):
+    client = CachingSolanaRPCClient("http://rpc.test")
+    upstream.release.clear()
+    results = []
+    threads = start_callers(client, 8, results)
+    wait_for_waiters(client, 7)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.calls == ["getAccountInfo"]
+    assert results == [{"value": 1}] * 8
+    assert client.stats["getAccountInfo"] == {"hits": 0, "disk_hits": 0, "misses": 1, "coalesced": 7}
+
+
+def test_error_reaches_every_waiter_and_is_not_cached(upstream, clock):
+    client = CachingSolanaRPCClient("http://rpc.test")
+    upstream.release.clear()
+    upstream.error = SolanaRPCError("getAccountInfo", {"code": -32005, "message": "Node is behind"})
+    results = []
+    threads = start_callers(client, 4, results)
+    wait_for_waiters(client, 3)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.calls == ["getAccountInfo"]
+    assert len(results) == 4 and all(result is upstream.error for result in results)
+    assert not client.pending
+
+    upstream.error = None
+    assert client.call("getAccountInfo", ["a"]) == {"value": 2}
+
+
+def test_send_transaction_invalidates_account_reads(upstream, clock):
+    client = CachingSolanaRPCClient("http://rpc.test")
+    client.call("getBalance", ["a"])
+    client.call("getMinimumBalanceForRentExemption", [82])
+    client.call("sendTransaction", ["tx"])
+
+    assert client.call("getBalance", ["a"]) == {"value": 4}
+    assert client.call("getMinimumBalanceForRentExemption", [82]) == {"value": 2}
+    assert upstream.calls == ["getBalance", "getMinimumBalanceForRentExemption", "sendTransaction", "getBalance"]
+
+
+def test_results_persist_across_clients(upstream, clock, tmp_path):
+    db_path = str(tmp_path / "rpc_cache.sqlite3")
+    CachingSolanaRPCClient("http://rpc.test", db_path=db_path).call("getBalance", ["a"])
+    client = CachingSolanaRPCClient("http://rpc.test", db_path=db_path)
+    assert client.call("getBalance", ["a"]) == {"value": 1}
+    assert upstream.calls == ["getBalance"]
+    assert client.stats["getBalance"]["disk_hits"] == 1
@@ -0,0 +1,127 @@
+import json
+import asyncio
+import pytest
+from solders.keypair import Keypair
+from create_token.spl_token_cli import (
+    SplTokenCLI, SplTokenError, classify_error,
+    REASON_ACCOUNT_IN_USE, REASON_ACCOUNT_EXISTS, REASON_EXTENSION_INITIALIZED, REASON_TIMED_OUT
+)
+from emulator.solana_cli import EmulatedSolanaCLI
+from emulator.solana_emulator import SolanaRPCEmulator, LAMPORTS_PER_SOL
+
+MINT = str(Keypair().pubkey())
+UNCONFIRMED = "Error: Client(Error { request: None, kind: Custom(\"unable to confirm transaction\") })"
+
+
+def write_keypair(path, keypair=None):
+    keypair = keypair or Keypair()
+    path.write_text(json.dumps(list(bytes(keypair))))
+    return str(path)
+
+
+class FakeExec:
+    """
+    exec_command returning queued (returncode, stdout, stderr) results, success once they run out
+    """
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    async def __call__(self, argv, cwd=None):
+        self.calls.append(argv)
+        return self.results.pop(0) if self.results else (0, json.dumps({"signature": "sig"}), "")
+
+
+@pytest.fixture
+def keypair_path(tmp_path):
+    return write_keypair(tmp_path / "keypair.json")
+
+
+def make_cli(keypair_path, exec_command, **kwargs):
+    return SplTokenCLI(rpc_url="http://rpc.test", keypair_path=keypair_path, retries=3, retry_delay=0,
+                       exec_command=exec_command, **kwargs)
+
+
+@pytest.mark.parametrize("stderr,reason", [
+    ("Error: Client(...) Allocate: account Address { address: To1, base: None } already in use", REASON_ACCOUNT_IN_USE),
+    ("Error: Account already exists: 9xQe", REASON_ACCOUNT_EXISTS),
+    ("Error: Extension already initialized on this account", REASON_EXTENSION_INITIALIZED),
+    ("Error: timed out after 120.0s", REASON_TIMED_OUT),
+    (UNCONFIRMED, None),
+])
+def test_classify_error(stderr, reason):
+    assert classify_error(stderr) == reason
+
+
+def test_unclassified_failures_are_retried(keypair_path):
+    fake = FakeExec((1, "", UNCONFIRMED), (-9, "", "Error: timed out after 1s"))
+    with make_cli(keypair_path, fake) as cli:
+        assert asyncio.run(cli.update_metadata("Mint", "name", "New")) == "sig"
+    assert len(fake.calls) == 3
+    assert fake.calls[0][:2] == ["spl-token", "update-metadata"]
+
+
+def test_retries_run_out(keypair_path):
+    fake = FakeExec(*[(1, "", UNCONFIRMED)] * 3)
+    with make_cli(keypair_path, fake) as cli:
+        with pytest.raises(SplTokenError) as info:
+            asyncio.run(cli.update_metadata("Mint", "name", "New"))
+    assert info.value.returncode == 1 and info.value.reason is None
+    assert len(fake.calls) == 3
+
+
+def test_expected_failures_are_raised_straight_away(keypair_path, tmp_path):
+    mint_path = write_keypair(tmp_path / "mint.json")
+    fake = FakeExec((1, "", "Error: Extension already initialized on this account"),
+                    (1, "", "Error: x Allocate: account Address { address: M, base: None } already in use"))
+    with make_cli(keypair_path, fake) as cli:
+        assert asyncio.run(cli.initialize_metadata("Mint", "Name", "SYM", "https://uri")) is None
+        token = asyncio.run(cli.create_token(mint_path))
+    assert token.signature is None and token.address == str(Keypair.from_json(open(mint_path).read()).pubkey())
+    assert len(fake.calls) == 2
+
+
+@pytest.mark.parametrize("stderr", [UNCONFIRMED, "Error: timed out after 120.0s"])
+def test_mint_is_never_retried(keypair_path, stderr):
+    fake = FakeExec((1, "", stderr))
+    with make_cli(keypair_path, fake) as cli:
+        with pytest.raises(SplTokenError):
+            asyncio.run(cli.mint(MINT, 1000))
+    assert len(fake.calls) == 1
+
+
+def test_fee_payer_only_pays(keypair_path, tmp_path):
+    fee_payer_path = write_keypair(tmp_path / "fee_payer.json")
+    fake = FakeExec()
+    with make_cli(keypair_path, fake, fee_payer_path=fee_payer_path) as cli:
+        asyncio.run(cli.mint(MINT, 5))
+    argv = fake.calls[0]
+    assert argv[argv.index("--fee-payer") + 1] == fee_payer_path
+    assert argv[argv.index("--mint-authority") + 1] == keypair_path
+
+
+@pytest.fixture
+def emulator():
+    emulator = SolanaRPCEmulator()
+    emulator.start()
+    yield emulator
+    emulator.stop()
+
+
+def test_launch_against_emulator(emulator, keypair_path, tmp_path):
+    owner = str(Keypair.from_json(open(keypair_path).read()).pubkey())
+    emulator.handle("requestAirdrop", [owner, 10 * LAMPORTS_PER_SOL])
+    mint_path = write_keypair(tmp_path / "mint.json")
+    runner = EmulatedSolanaCLI(emulator.url, keypair_path)
+    with SplTokenCLI(rpc_url=emulator.url, keypair_path=keypair_path, exec_command=runner.exec_async) as cli:
+        launched = asyncio.run(cli.launch(mint_path, "Token", "TKN", "https://uri/1.json", 1000, decimals=6))
+        assert len(launched.signatures) == 4
+        assert emulator.token_accounts[launched.account]["amount"] == 1000 * 10 ** 6
+
+        # A second launch of the same mint finds everything in place and updates the metadata
+        relaunched = asyncio.run(cli.launch(mint_path, "Token 2", "TKN", "https://uri/2.json", 1000, decimals=6))
+    assert (relaunched.mint, relaunched.account) == (launched.mint, launched.account)
+    assert len(relaunched.signatures) == 4
+    metadata = emulator.mints[launched.mint]["metadata"]
+    assert (metadata["name"], metadata["uri"], metadata["update_authority"]) == ("Token 2", "https://uri/2.json", owner)
+    assert emulator.mints[launched.mint]["supply"] == 2000 * 10 ** 6
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import threading
+import pytest
+from utils.stage_graph import StageGraph, DONE, FAILED, SKIPPED
+
+
+class Recorder:
+    """
+    Stage functions that log their start and end, optionally waiting on an event or failing
+    """
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def stage(self, name, duration=0.0, wait_for=None, error=None):
+        def run():
+            with self.lock:
+                self.events.append(("start", name))
+            if wait_for is not None:
+                assert wait_for.wait(5)
+            time.sleep(duration)
+            with self.lock:
+                self.events.append(("end", name))
+            if error:
+                raise error
+        return run
+
+    def index(self, kind, name):
+        return self.events.index((kind, name))
+
+
+def test_add_rejects_duplicates_and_unknown_dependencies():
+    graph = StageGraph()
+    graph.add("a", lambda: None)
+    with pytest.raises(ValueError, match="already in the graph"):
+        graph.add("a", lambda: None)
+    with pytest.raises(ValueError, match="unknown stages: b"):
+        graph.add("c", lambda: None, deps=["b"])
+
+
+def test_stages_start_after_their_dependencies_and_overlap_otherwise():
+    recorder = Recorder()
+    upload_started = threading.Event()
+    graph = StageGraph()
+    graph.add("wallet", recorder.stage("wallet"))
+    graph.add("upload", lambda: (upload_started.set(), recorder.stage("upload", 0.05)()))
+    # grind only finishes once the upload is running, so the two must overlap
+    graph.add("grind", recorder.stage("grind", wait_for=upload_started), deps=["wallet"])
+    graph.add("mint", recorder.stage("mint"), deps=["grind"])
+    graph.add("metadata", recorder.stage("metadata"), deps=["mint", "upload"])
+
+    report = asyncio.run(graph.run())
+    assert all(timing["status"] == DONE for timing in report.values())
+    for stage, deps in (("grind", ["wallet"]), ("mint", ["grind"]), ("metadata", ["mint", "upload"])):
+        assert all(recorder.index("end", dep) < recorder.index("start", stage) for dep in deps)
+    assert report["metadata"]["start"] >= report["upload"]["start"] + report["upload"]["duration"]
+
+
+def test_failure_skips_everything_not_yet_started_and_is_raised():
+    recorder = Recorder()
+    release = threading.Event()
+    graph = StageGraph()
+    graph.add("upload", recorder.stage("upload", error=RuntimeError("pin failed")))
+    graph.add("grind", recorder.stage("grind", wait_for=release))
+    graph.add("wallet", lambda: release.set())
+    graph.add("mint", recorder.stage("mint"), deps=["grind"])
+    graph.add("metadata", recorder.stage("metadata"), deps=["mint", "upload"])
+
+    with pytest.raises(RuntimeError, match="pin failed"):
+        asyncio.run(graph.run())
+    # grind was already running when the upload failed, so it finishes; nothing after it starts
+    assert graph.status == {"upload": FAILED, "grind": DONE, "wallet": DONE, "mint": SKIPPED, "metadata": SKIPPED}
+    assert ("start", "mint") not in recorder.events
+    report = graph.report()
+    assert report["mint"] == {"start": None, "duration": None, "status": SKIPPED}
+    assert report["upload"]["status"] == FAILED and report["upload"]["duration"] is not None
+
+
+def test_first_failure_is_raised():
+    graph = StageGraph()
+    graph.add("a", Recorder().stage("a", error=ValueError("first")))
+    graph.add("b", Recorder().stage("b", 0.05, error=KeyError("second")))
+    with pytest.raises(ValueError, match="first"):
+        asyncio.run(graph.run())
+    assert [name for name, _ in graph.errors] == ["a", "b"]
+
+
+def test_critical_path_follows_the_latest_dependency():
+    graph = StageGraph()
+    for name in ("wallet", "upload", "grind", "mint", "metadata"):
+        graph.add(name, lambda: None, deps={"grind": ["wallet"], "mint": ["grind", "upload"],
+                                            "metadata": ["mint", "upload"]}.get(name, []))
+    graph.timings = {"wallet": (0.0, 0.1), "upload": (0.0, 1.5), "grind": (0.1, 3.0),
+                     "mint": (3.0, 3.2), "metadata": (3.2, 3.6)}
+    assert graph.critical_path() == ["wallet", "grind", "mint", "metadata"]
+
+    graph.timings["upload"] = (0.0, 3.1)
+    graph.timings["mint"] = (3.1, 3.3)
+    assert graph.critical_path() == ["upload", "mint", "metadata"]
+
+    assert StageGraph().critical_path() == []
+
+
+def test_report_and_print_report(capsys):
+    graph = StageGraph()
+    graph.add("a", lambda: time.sleep(0.02))
+    graph.add("b", lambda: None, deps=["a"])
+    report = asyncio.run(graph.run())
+    assert report["a"]["duration"] >= 0.02
+    assert report["b"]["start"] >= report["a"]["start"] + report["a"]["duration"]
+    graph.print_report()
+    assert "Critical path: a -> b" in capsys.readouterr().out
@@ -0,0 +1,162 @@
+import json
+import struct
+import pytest
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from create_token.token_program import (
+    BASE_ACCOUNT_LENGTH, UPDATE_FIELD_DISCRIMINATOR, TOKEN_2022_PROGRAM_ID, update_metadata_field, parse_token_metadata
+)
+from create_token.update_metadata import BulkMetadataUpdater, metadata_field_size
+from emulator.solana_emulator import SolanaRPCEmulator
+from utils.solana_rpc import SolanaRPCClient
+
+MINT = Pubkey(bytes(range(1, 33)))
+AUTHORITY = Pubkey(bytes(range(33, 65)))
+# sha256("spl_token_metadata_interface:updating_field")[:8], from the token metadata interface
+INTERFACE_UPDATE_FIELD = bytes([221, 233, 49, 45, 181, 202, 220, 200])
+
+
+def borsh(value):
+    return struct.pack("<I", len(value.encode("utf-8"))) + value.encode("utf-8")
+
+
+def mint_account(name, symbol, uri, additional=(), update_authority=AUTHORITY):
+    """
+    Token-2022 mint as the program lays it out: the 82-byte mint padded to the account
+    length, the account type, then a MetadataPointer (18) and a TokenMetadata (19) TLV
+    """
+    base = struct.pack("<I", 1) + bytes(AUTHORITY) + struct.pack("<QBB", 1_000_000, 9, 1) + bytes(36)
+    pointer = bytes(AUTHORITY) + bytes(MINT)
+    metadata = (bytes(update_authority) if update_authority else bytes(32)) + bytes(MINT)
+    metadata += borsh(name) + borsh(symbol) + borsh(uri) + struct.pack("<I", len(additional))
+    for key, value in additional:
+        metadata += borsh(key) + borsh(value)
+    return (base.ljust(BASE_ACCOUNT_LENGTH, b"\0") + b"\x01"
+            + struct.pack("<HH", 18, len(pointer)) + pointer
+            + struct.pack("<HH", 19, len(metadata)) + metadata)
+
+
+FIXED_MINT = mint_account("Sampletoken1", "S1", "https://gateway.pinata.cloud/ipfs/bafy",
+                          [("website", "https://example.com"), ("twitter", "@s1")])
+
+
+def rent(size):
+    return (size + 128) * 6960
+
+
+class StubRPC:
+    def get_minimum_balance_for_rent_exemption(self, size):
+        return rent(size)
+
+
+def test_update_field_discriminator_matches_interface():
+    assert UPDATE_FIELD_DISCRIMINATOR == INTERFACE_UPDATE_FIELD
+
+
+@pytest.mark.parametrize("field,code", [("name", 0), ("symbol", 1), ("uri", 2)])
+def test_update_field_instruction(field, code):
+    instruction = update_metadata_field(MINT, AUTHORITY, field, "Ünïcode value")
+    assert instruction.program_id == TOKEN_2022_PROGRAM_ID
+    assert bytes(instruction.data) == INTERFACE_UPDATE_FIELD + bytes([code]) + borsh("Ünïcode value")
+    assert [(meta.pubkey, meta.is_signer, meta.is_writable) for meta in instruction.accounts] == [
+        (MINT, False, True), (AUTHORITY, True, False)
+    ]
+
+
+def test_update_field_instruction_for_additional_key():
+    instruction = update_metadata_field(MINT, AUTHORITY, "website", "https://example.org")
+    assert bytes(instruction.data) == INTERFACE_UPDATE_FIELD + b"\x03" + borsh("website") + borsh("https://example.org")
+
+
+def test_parse_fixed_mint():
+    assert parse_token_metadata(FIXED_MINT) == {
+        "update_authority": AUTHORITY,
+        "mint": MINT,
+        "name": "Sampletoken1",
+        "symbol": "S1",
+        "uri": "https://gateway.pinata.cloud/ipfs/bafy",
+        "additional_metadata": [("website", "https://example.com"), ("twitter", "@s1")],
+        "length": len(FIXED_MINT) - (BASE_ACCOUNT_LENGTH + 1 + 4 + 64 + 4)
+    }
+
+
+def test_parse_without_metadata_or_authority():
+    assert parse_token_metadata(FIXED_MINT[:BASE_ACCOUNT_LENGTH + 1 + 4 + 64]) is None
+    assert parse_token_metadata(mint_account("A", "B", "C", update_authority=None))["update_authority"] is None
+
+
+@pytest.fixture
+def updater(tmp_path):
+    keypair_path = tmp_path / "keypair.json"
+    keypair_path.write_text(json.dumps(list(bytes(Keypair()))))
+    updater = BulkMetadataUpdater(str(tmp_path / "mapping.json"), keypair_path=str(keypair_path))
+    updater.rpc = StubRPC()
+    return updater
+
+
+@pytest.mark.parametrize("fields", [
+    {"name": "Sampletoken1 Reloaded"},
+    {"uri": "https://ipfs.io/ipfs/bafy"},
+    {"website": "https://a-much-longer-example.com"},
+    {"discord": "https://discord.gg/s1"},
+    {"name": "S", "symbol": "SONE", "twitter": "@sampletoken_one", "telegram": "t.me/s1"},
+])
+def test_rent_top_up_covers_the_new_size(updater, fields):
+    current = parse_token_metadata(FIXED_MINT)
+    account = {"data": FIXED_MINT, "lamports": rent(len(FIXED_MINT))}
+    additional = dict(current["additional_metadata"])
+    changes = [(field, current[field] if field in ("name", "symbol", "uri") else additional.get(field), value)
+               for field, value in fields.items()]
+
+    # The program replaces a key in place and appends a new one
+    updated = {**{field: current[field] for field in ("name", "symbol", "uri")}, **{
+        field: value for field, value in fields.items() if field in ("name", "symbol", "uri")
+    }}
+    additional.update({field: value for field, value in fields.items() if field not in ("name", "symbol", "uri")})
+    new_size = len(mint_account(updated["name"], updated["symbol"], updated["uri"], list(additional.items())))
+
+    assert updater.rent_top_up(account, changes) == max(0, rent(new_size) - rent(len(FIXED_MINT)))
+
+
+def test_metadata_field_size():
+    assert metadata_field_size("website", "https://example.com") == 4 + 7 + 4 + 19
+    assert metadata_field_size("ключ", "") == 4 + 8 + 4
+
+
+@pytest.fixture
+def emulator():
+    emulator = SolanaRPCEmulator()
+    emulator.start()
+    yield emulator
+    emulator.stop()
+
+
+def test_update_round_trip(emulator, tmp_path):
+    authority = Keypair()
+    keypair_path = tmp_path / "keypair.json"
+    keypair_path.write_text(json.dumps(list(bytes(authority))))
+    mint = str(Keypair().pubkey())
+    payer = str(authority.pubkey())
+    emulator.handle("requestAirdrop", [payer, 10 ** 9])
+    emulator.handle("emulator_createMint", [payer, mint, 6])
+    emulator.handle("emulator_initializeMetadata", [payer, mint, "Token", "TKN", "https://old.example/1.json"])
+
+    mapping_path = tmp_path / "mapping.json"
+    fields = {"name": "Token Renamed", "uri": "https://new-gateway.example/ipfs/bafy/1.json",
+              "website": "https://token.example"}
+    mapping_path.write_text(json.dumps({mint: fields}))
+    counts = BulkMetadataUpdater(str(mapping_path), keypair_path=str(keypair_path), rpc_url=emulator.url,
+                                 poll_interval=0.01).run()
+    assert counts == {"confirmed": 1}
+
+    account = SolanaRPCClient(emulator.url).get_account_info(mint)
+    metadata = parse_token_metadata(account["data"])
+    assert (metadata["name"], metadata["symbol"], metadata["uri"]) == ("Token Renamed", "TKN", fields["uri"])
+    assert metadata["additional_metadata"] == [("website", "https://token.example")]
+    assert metadata["update_authority"] == authority.pubkey()
+    assert account["lamports"] >= rent(len(account["data"]))
+
+    # With a fresh ledger the same mapping is diffed again and finds nothing left to change
+    counts = BulkMetadataUpdater(str(mapping_path), keypair_path=str(keypair_path), rpc_url=emulator.url,
+                                 ledger_path=str(tmp_path / "second.jsonl"), poll_interval=0.01).run()
+    assert counts == {"unchanged": 1}
@@ -0,0 +1,157 @@
+import os
+import stat
+import time
+import threading
+import base58
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from create_token.wallet_pool import WalletPool, WalletPoolError, LAMPORTS_PER_SOL
+
+JOB_COST = LAMPORTS_PER_SOL // 100
+
+
+class StubRPC:
+    """
+    Balances by address; transfers are confirmed as soon as they're sent
+    """
+    def __init__(self, balances=None):
+        self.balances = dict(balances or {})
+        self.sent = []
+
+    def get_balance(self, address):
+        return self.balances.get(address, 0)
+
+    def get_latest_blockhash(self):
+        return {"blockhash": str(Hash.default()), "lastValidBlockHeight": 100}
+
+    def send_transaction(self, transaction):
+        message = transaction.message
+        source, destination = (str(key) for key in message.account_keys[:2])
+        lamports = int.from_bytes(bytes(message.instructions[0].data)[4:12], "little")
+        self.balances[source] = self.balances.get(source, 0) - lamports
+        self.balances[destination] = self.balances.get(destination, 0) + lamports
+        self.sent.append((source, destination, lamports))
+        return transaction.signatures[0]
+
+    def get_signature_statuses(self, signatures):
+        return [{"confirmationStatus": "confirmed", "err": None} for _ in signatures]
+
+    def get_block_height(self):
+        return 0
+
+
+def make_pool(tmp_path, balances, **kwargs):
+    """
+    Pool of one fee payer per balance, in lamports
+    """
+    keypairs = [Keypair() for _ in balances]
+    rpc = kwargs.pop("rpc", None) or StubRPC()
+    rpc.balances.update({str(keypair.pubkey()): balance for keypair, balance in zip(keypairs, balances)})
+    pool = WalletPool(keypairs, key_directory=str(tmp_path / "keys"), job_cost=JOB_COST,
+                      poll_interval=0.01, rpc=rpc, **kwargs)
+    return pool, rpc
+
+
+def test_least_in_flight_spreads_jobs_over_the_wallets_that_can_pay(tmp_path):
+    pool, rpc = make_pool(tmp_path, [JOB_COST * 10, JOB_COST * 10, JOB_COST // 2])
+    first, second = pool.acquire(), pool.acquire()
+    assert {first.address, second.address} == {pool.wallets[0].address, pool.wallets[1].address}
+    # The broke wallet is never picked, even when it runs nothing
+    assert pool.acquire() in (first, second)
+    assert pool.wallets[2].jobs == 0
+
+
+def test_balance_strategy_picks_the_most_sol_left(tmp_path):
+    pool, rpc = make_pool(tmp_path, [JOB_COST * 3, JOB_COST * 2], strategy="balance")
+    # Ties go to the first wallet
+    assert [pool.acquire().address for _ in range(5)] == [pool.wallets[i].address for i in (0, 0, 1, 0, 1)]
+    assert pool.select() is None
+
+
+def test_release_refreshes_the_balance_and_counts_failures(tmp_path):
+    pool, rpc = make_pool(tmp_path, [JOB_COST * 10])
+    wallet = pool.acquire()
+    rpc.balances[wallet.address] -= JOB_COST
+    pool.release(wallet, 1.5, success=False)
+    assert (wallet.in_flight, wallet.jobs, wallet.failures, wallet.busy_seconds) == (0, 1, 1, 1.5)
+    assert wallet.balance == JOB_COST * 9
+
+    with pytest.raises(RuntimeError):
+        with pool.wallet():
+            raise RuntimeError("launch failed")
+    assert (wallet.in_flight, wallet.jobs, wallet.failures) == (0, 2, 2)
+
+
+def test_acquire_waits_for_a_running_job(tmp_path):
+    pool, rpc = make_pool(tmp_path, [JOB_COST])
+    wallet = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.1)
+    assert acquired == []
+    pool.release(wallet, 0.1)
+    waiter.join(timeout=5)
+    assert acquired == [wallet]
+
+
+def test_low_wallets_are_topped_up_from_the_treasury(tmp_path):
+    treasury = Keypair()
+    rpc = StubRPC({str(treasury.pubkey()): 10 * LAMPORTS_PER_SOL})
+    pool, rpc = make_pool(tmp_path, [0, LAMPORTS_PER_SOL], rpc=rpc, treasury=treasury,
+                          top_up_below=LAMPORTS_PER_SOL // 10, top_up_amount=LAMPORTS_PER_SOL // 4)
+    low, funded = pool.wallets
+    # The empty wallet is topped up in the background as soon as the balances are loaded
+    jobs = [pool.acquire(), pool.acquire()]
+    pool.close()
+    assert rpc.sent == [(str(treasury.pubkey()), low.address, LAMPORTS_PER_SOL // 4)]
+    assert (low.balance, low.topped_up, low.topping_up) == (LAMPORTS_PER_SOL // 4, LAMPORTS_PER_SOL // 4, False)
+    assert funded.topped_up == 0
+    assert all(job in (low, funded) for job in jobs)
+
+    # Read-only: the treasury counts towards what the pool can spend, and nothing is sent
+    assert pool.total_balance() == sum(rpc.balances.values())
+    assert len(rpc.sent) == 1
+
+
+def test_no_top_up_without_a_treasury(tmp_path):
+    pool, rpc = make_pool(tmp_path, [0])
+    with pytest.raises(WalletPoolError, match="no treasury"):
+        pool.acquire()
+    assert rpc.sent == [] and not pool.wallets[0].topping_up
+
+
+def test_print_stats(tmp_path, capsys):
+    pool, rpc = make_pool(tmp_path, [LAMPORTS_PER_SOL])
+    with pool.wallet() as wallet:
+        rpc.balances[wallet.address] -= JOB_COST
+    pool.print_stats()
+    output = capsys.readouterr().out
+    assert "Fee payer pool (least-in-flight, 1 wallets" in output
+    assert f"{wallet.address}: 1 jobs (0 failed)" in output
+    assert "spent 0.010000 SOL" in output and "balance 0.990000 SOL" in output
+
+
+def test_key_files_are_kept_in_the_key_directory(tmp_path, monkeypatch):
+    keypair = Keypair()
+    monkeypatch.setenv("FEE_PAYER_PRIVATE_KEYS", base58.b58encode(bytes(keypair)).decode())
+    monkeypatch.setenv("FEE_PAYER_KEY_DIR", str(tmp_path / "keys"))
+    monkeypatch.delenv("TREASURY_PRIVATE_KEY", raising=False)
+
+    with WalletPool.from_env(rpc=StubRPC()) as pool:
+        path = pool.wallets[0].keypair_path
+    assert path == str(tmp_path / "keys" / f"{keypair.pubkey()}.json")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    # A later run reuses the file instead of writing it again
+    os.utime(path, ns=(0, 0))
+    with WalletPool.from_env(rpc=StubRPC()) as pool:
+        assert pool.wallets[0].keypair_path == path
+    assert os.stat(path).st_mtime_ns == 0
+
+    # Without a key directory the files only live as long as the pool
+    monkeypatch.delenv("FEE_PAYER_KEY_DIR")
+    with WalletPool.from_env(rpc=StubRPC()) as pool:
+        temporary = pool.wallets[0].keypair_path
+        assert os.path.exists(temporary) and temporary != path
+    assert not os.path.exists(os.path.dirname(temporary))
@@ -0,0 +1,81 @@
+import socket
+import hashlib
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pinata.ipfs_cid import raw_cid
+from pinata.warm_gateway import GatewayWarmer, PINATA_GATEWAY
+
+IMAGE = bytes(range(256)) * 1000
+METADATA = b'{"name": "Sampletoken1"}'
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in gateway serving the bytes of CONTENT by path, 404 for anything else
+    """
+    content = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = self.content.get(self.path)
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+
+@pytest.fixture
+def gateway():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GatewayHandler)
+    GatewayHandler.content = {"/ipfs/image": IMAGE, "/ipfs/metadata": METADATA}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_sha256_and_raw_cid_are_verified(gateway):
+    targets = [
+        {"url": f"{PINATA_GATEWAY}/ipfs/image", "sha256": hashlib.sha256(IMAGE).hexdigest()},
+        {"url": f"{PINATA_GATEWAY}/ipfs/metadata", "cid": raw_cid(METADATA)},
+    ]
+    results = GatewayWarmer(targets, gateway_base=gateway, retries=1).process()
+    assert [(result["url"], result["bytes"], result["verified"]) for result in results] == [
+        (f"{gateway}/ipfs/image", len(IMAGE), True),
+        (f"{gateway}/ipfs/metadata", len(METADATA), True),
+    ]
+
+
+def test_nothing_to_verify_against(gateway):
+    results = GatewayWarmer([{"url": f"{gateway}/ipfs/metadata", "cid": "bafy/1.json"}], retries=1).process()
+    assert results[0]["verified"] is None
+    assert results[0]["sha256"] == hashlib.sha256(METADATA).hexdigest()
+
+
+def test_mismatch_raises(gateway):
+    targets = [
+        {"url": f"{PINATA_GATEWAY}/ipfs/image", "sha256": hashlib.sha256(IMAGE).hexdigest()},
+        {"url": f"{PINATA_GATEWAY}/ipfs/metadata", "cid": raw_cid(b"other bytes")},
+    ]
+    with pytest.raises(ValueError, match="/ipfs/metadata"):
+        GatewayWarmer(targets, gateway_base=gateway, retries=1).process()
+
+
+def test_unreachable_url_only_warns(gateway, capsys):
+    targets = [
+        {"url": f"http://127.0.0.1:{closed_port()}/ipfs/image", "sha256": hashlib.sha256(IMAGE).hexdigest()},
+        {"url": f"{gateway}/ipfs/missing", "sha256": hashlib.sha256(METADATA).hexdigest()},
+    ]
+    results = GatewayWarmer(targets, retries=1, timeout=5).process()
+    assert [(result["sha256"], result["verified"]) for result in results] == [(None, False), (None, False)]
+    assert results[1]["status"] == 404
+    assert "Warning: Gateway did not serve" in capsys.readouterr().out
@@ -0,0 +1,402 @@
+import io
+import os
+import gzip
+import json
+import time
+import base64
+import hashlib
+import threading
+import subprocess
+import requests
+from collections import deque
+from urllib.parse import urlsplit
+from requests.structures import CaseInsensitiveDict
+from utils.solana_rpc import SolanaRPCClient, SolanaRPCError
+from utils.convert_base58 import SolanaKeyConverter
+from create_token.preflight import PreflightCheck
+from create_token.create_token import SolanaMainnetScriptRunner
+from pinata.upload_image_to_pinata_ifps import PinataIPFSUploader
+from pinata.upload_metadata_uri_to_pinata_ifps import PinataJSONUploader
+
+RECORD = "record"
+REPLAY = "replay"
+CASSETTE_VERSION = 2
+# Stands in for the Pinata JWT on replay, where no request leaves the process
+REPLAY_JWT = "replay"
+
+
+class CassetteError(Exception):
+    pass
+
+
+def _encode_body(body):
+    """
+    Text stays readable in the cassette, anything else is base64
+    """
+    if body is None:
+        return None, None
+    if isinstance(body, str):
+        return body, "text"
+    try:
+        return body.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return base64.b64encode(body).decode(), "base64"
+
+
+def _decode_body(body, encoding):
+    if encoding is None:
+        return None
+    if encoding == "text":
+        return body
+    if encoding == "utf-8":
+        return body.encode("utf-8")
+    return base64.b64decode(body)
+
+
+def _request_digest(data, json_body):
+    """
+    Size and hash of a request body, which is matched on but not stored (uploads can be large)
+    """
+    if json_body is not None:
+        data = json.dumps(json_body, sort_keys=True)
+    if data is None or hasattr(data, "read"):
+        return None
+    if isinstance(data, dict):
+        data = json.dumps(data, sort_keys=True, default=str)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def _exception(entry):
+    """
+    Rebuild a recorded failure
+    """
+    if entry["exception"] == "SolanaRPCError":
+        return SolanaRPCError(entry["loose_key"], entry["error"])
+    exception_class = getattr(requests.exceptions, entry["exception"], None)
+    if isinstance(exception_class, type) and issubclass(exception_class, Exception):
+        return exception_class(entry["message"])
+    return CassetteError(f"{entry['exception']}: {entry['message']}")
+
+
+class Cassette:
+    def __init__(self, path, mode=RECORD, realtime=False):
+        """
+        Record every external interaction of a run to a cassette, or serve them back offline.
+
+        Five kinds of interaction are captured, each with its duration:
+        - subprocess: commands issued through `command_runner` (argv, stdout, stderr, exit
+          code, and the names of *.json files the command wrote, eg. ground keypairs)
+        - http: requests.Session requests (request body hashed, full response)
+        - rpc: SolanaRPCClient calls (method, params, result or error). Their HTTP round
+          trips are not recorded separately, and cache hits never reach the network.
+        - wallet: the preflight's fee payer address
+        - keypair_stock: the file name of a keypair claimed from the keypair stock, if any
+
+        A replay reads no secrets and no local state: the fee payer address and the stock
+        claim are served from the cassette (the stock is never opened, so no inventory is
+        used up), the Pinata JWT is a placeholder, and the .env wallet key is neither loaded
+        nor written to solana_keypair.json.
+
+        The cassette is gzip-compressed JSON lines. On replay each interaction is matched to
+        the next recording with the same key (command, method + URL, RPC method + params),
+        falling back to the same program + subcommand, URL path or RPC method when the
+        inputs differ (eg. a new blockhash, or another endpoint). With `realtime` every reply is delayed by its
+        recorded duration, so stage timings and overlaps match the original run.
+
+        Use as a context manager around the run:
+
+            with Cassette("launch.cassette.gz", mode=REPLAY) as cassette:
+                MainScript(..., command_runner=cassette.command_runner()).run()
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode}")
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.entries = []
+        self.queues = {}
+        self.loose_queues = {}
+        self.played = set()
+        self.origin = None
+        self.originals = None
+
+        if mode == REPLAY:
+            with gzip.open(path, "rt") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != CASSETTE_VERSION:
+                    raise CassetteError(f"{path} is a version {header.get('version')} cassette, "
+                                        f"expected version {CASSETTE_VERSION}")
+                self.entries = [json.loads(line) for line in f if line.strip()]
+            for index, entry in enumerate(self.entries):
+                self.queues.setdefault((entry["kind"], entry["key"]), deque()).append(index)
+                self.loose_queues.setdefault((entry["kind"], entry["loose_key"]), deque()).append(index)
+
+    # --- patching ---
+
+    def __enter__(self):
+        if self.originals is not None:
+            raise CassetteError("Cassette is already in use")
+        self.origin = time.perf_counter()
+        cassette = self
+        original_request, original_call = requests.Session.request, SolanaRPCClient.call
+        original_fee_payer = PreflightCheck.fee_payer
+        original_claim = SolanaMainnetScriptRunner.claim_stocked_keypair
+
+        def request(session, method, url, **kwargs):
+            # The HTTP round trip of an RPC call is part of that call's recording
+            if getattr(cassette.local, "nested", False):
+                return original_request(session, method, url, **kwargs)
+            return cassette.http(original_request, session, method, url, **kwargs)
+
+        def call(client, method, params=None):
+            # As are the calls an in-process command runner (eg. EmulatedSolanaCLI) makes
+            if getattr(cassette.local, "nested", False):
+                return original_call(client, method, params)
+            return cassette.rpc(original_call, client, method, params)
+
+        def fee_payer(check):
+            return cassette.fee_payer(original_fee_payer, check)
+
+        def claim_stocked_keypair(runner, pattern="To"):
+            return cassette.stock_claim(original_claim, runner, pattern)
+
+        patches = {
+            (requests.Session, "request"): request,
+            (SolanaRPCClient, "call"): call,
+            (PreflightCheck, "fee_payer"): fee_payer,
+            (SolanaMainnetScriptRunner, "claim_stocked_keypair"): claim_stocked_keypair
+        }
+        if self.mode == REPLAY:
+            def load_jwt(uploader):
+                uploader.JWT = REPLAY_JWT
+
+            def load_wallet_key(converter, env_path):
+                converter.base58_private_key = None
+
+            def save_wallet_key(converter, output_path="solana_keypair.json"):
+                return {"private_key_array": "(not loaded on replay)", "saved_path": "(nothing written on replay)"}
+
+            patches.update({
+                (PinataIPFSUploader, "load_environment"): load_jwt,
+                (PinataJSONUploader, "load_environment"): load_jwt,
+                (SolanaKeyConverter, "load_environment"): load_wallet_key,
+                (SolanaKeyConverter, "process_and_save"): save_wallet_key
+            })
+        self.originals = {target: getattr(*target) for target in patches}
+        for (owner, name), replacement in patches.items():
+            setattr(owner, name, replacement)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        for (owner, name), original in self.originals.items():
+            setattr(owner, name, original)
+        self.originals = None
+        if self.mode == RECORD:
+            self.save()
+        self.print_report()
+        return False
+
+    def command_runner(self, runner=None):
+        """
+        Callable like subprocess.run that records or replays the commands given to it.
+        When recording, commands are run by `runner` (subprocess.run by default).
+        """
+        def run(command, **kwargs):
+            return self.subprocess(runner or subprocess.run, command, **kwargs)
+        return run
+
+    # --- recording and replay ---
+
+    def _add(self, entry, start):
+        entry["start"] = round(start - self.origin, 6)
+        entry["duration"] = round(time.perf_counter() - start, 6)
+        with self.lock:
+            self.entries.append(entry)
+
+    def _next(self, queue):
+        while queue:
+            index = queue.popleft()
+            if index not in self.played:
+                self.played.add(index)
+                return self.entries[index]
+        return None
+
+    def _take(self, kind, key, loose_key):
+        """
+        Next unplayed recording for the key, or for the loose key when the inputs changed
+        """
+        with self.lock:
+            entry = self._next(self.queues.get((kind, key))) or self._next(self.loose_queues.get((kind, loose_key)))
+        if entry is None:
+            raise CassetteError(f"No recorded {kind} interaction left for {key}")
+        if self.realtime:
+            time.sleep(entry["duration"])
+        return entry
+
+    def subprocess(self, runner, command, **kwargs):
+        key = command if isinstance(command, str) else " ".join(command)
+        loose_key = " ".join(key.split()[:2])
+        cwd = kwargs.get("cwd") or os.getcwd()
+
+        if self.mode == REPLAY:
+            entry = self._take("subprocess", key, loose_key)
+            for name in entry["created_files"]:
+                # Placeholders only: the command's real output (eg. a secret key) is never recorded
+                open(os.path.join(cwd, name), 'a').close()
+            stdout = _decode_body(entry["stdout"], entry["stdout_encoding"])
+            stderr = _decode_body(entry["stderr"], entry["stderr_encoding"])
+            if entry["returncode"] and kwargs.get("check"):
+                raise subprocess.CalledProcessError(entry["returncode"], command, stdout, stderr)
+            return subprocess.CompletedProcess(command, entry["returncode"], stdout, stderr)
+
+        before = set(os.listdir(cwd))
+        start = time.perf_counter()
+        self.local.nested = True
+        try:
+            result = runner(command, **kwargs)
+            returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+        except subprocess.CalledProcessError as e:
+            result = e
+            returncode, stdout, stderr = e.returncode, e.stdout, e.stderr
+        finally:
+            self.local.nested = False
+        created = sorted(name for name in set(os.listdir(cwd)) - before if name.endswith(".json"))
+        stdout, stdout_encoding = _encode_body(stdout)
+        stderr, stderr_encoding = _encode_body(stderr)
+        self._add({
+            "kind": "subprocess", "key": key, "loose_key": loose_key, "returncode": returncode,
+            "stdout": stdout, "stdout_encoding": stdout_encoding,
+            "stderr": stderr, "stderr_encoding": stderr_encoding, "created_files": created
+        }, start)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def http(self, original_request, session, method, url, **kwargs):
+        digest = _request_digest(kwargs.get("data"), kwargs.get("json"))
+        key = json.dumps([method.upper(), url, digest], sort_keys=True)
+        loose_key = f"{method.upper()} {urlsplit(url).path}"
+
+        if self.mode == REPLAY:
+            entry = self._take("http", key, loose_key)
+            if "exception" in entry:
+                raise _exception(entry)
+            response = requests.Response()
+            response.status_code = entry["status"]
+            response.reason = entry["reason"]
+            response.headers = CaseInsensitiveDict(entry["headers"])
+            response._content = _decode_body(entry["body"], entry["body_encoding"]) or b""
+            # Already read, so streaming (iter_content) is served from the content too
+            response._content_consumed = True
+            response.raw = io.BytesIO(response._content)
+            response.encoding = entry["encoding"]
+            response.url = entry["url"]
+            return response
+
+        start = time.perf_counter()
+        entry = {"kind": "http", "key": key, "loose_key": loose_key}
+        try:
+            response = original_request(session, method, url, **kwargs)
+        except requests.RequestException as e:
+            self._add({**entry, "exception": type(e).__name__, "message": str(e)}, start)
+            raise
+        body, body_encoding = _encode_body(response.content)
+        self._add({
+            **entry, "status": response.status_code, "reason": response.reason, "headers": dict(response.headers),
+            "encoding": response.encoding, "url": response.url, "body": body, "body_encoding": body_encoding
+        }, start)
+        return response
+
+    def rpc(self, original_call, client, method, params):
+        key = json.dumps([method, params or []], sort_keys=True)
+
+        if self.mode == REPLAY:
+            entry = self._take("rpc", key, method)
+            if "exception" in entry:
+                raise _exception(entry)
+            return entry["result"]
+
+        start = time.perf_counter()
+        entry = {"kind": "rpc", "key": key, "loose_key": method, "url": client.url}
+        self.local.nested = True
+        try:
+            result = original_call(client, method, params)
+        except SolanaRPCError as e:
+            self._add({**entry, "exception": "SolanaRPCError", "error": {
+                "code": e.code, "data": e.data, "message": str(e).split(": ", 1)[-1]
+            }}, start)
+            raise
+        except requests.RequestException as e:
+            self._add({**entry, "exception": type(e).__name__, "message": str(e)}, start)
+            raise
+        finally:
+            self.local.nested = False
+        self._add({**entry, "result": result}, start)
+        return result
+
+    def fee_payer(self, original_fee_payer, check):
+        """
+        The fee payer address, recorded so a replay needs neither solana_keypair.json nor the .env key
+        """
+        if self.mode == REPLAY:
+            check.wallet_address = self._take("wallet", "fee_payer", "fee_payer")["address"]
+            return check.wallet_address
+
+        start = time.perf_counter()
+        address = original_fee_payer(check)
+        self._add({"kind": "wallet", "key": "fee_payer", "loose_key": "fee_payer", "address": address}, start)
+        return address
+
+    def stock_claim(self, original_claim, runner, pattern):
+        """
+        A keypair claimed from the keypair stock, recorded by file name only like the ground ones
+        """
+        if self.mode == REPLAY:
+            entry = self._take("keypair_stock", pattern, pattern)
+            if entry["file"] is None:
+                return False
+            open(os.path.join(runner.root_directory, entry["file"]), 'a').close()
+            runner.to_file = entry["file"]
+            print(f"Claimed pre-ground keypair: {runner.to_file} (replayed)")
+            return True
+
+        start = time.perf_counter()
+        claimed = original_claim(runner, pattern)
+        self._add({"kind": "keypair_stock", "key": pattern, "loose_key": pattern,
+                   "file": runner.to_file if claimed else None}, start)
+        return claimed
+
+    # --- output ---
+
+    def save(self):
+        with self.lock:
+            entries = sorted(self.entries, key=lambda entry: entry["start"])
+        with gzip.open(self.path, "wt") as f:
+            f.write(json.dumps({"version": CASSETTE_VERSION, "recorded_at": time.time()}) + "\n")
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        print(f"Recorded {len(entries)} interactions to {self.path}")
+
+    def print_report(self, slowest=5):
+        """
+        Count and time per kind of interaction, and the slowest ones
+        """
+        entries = self.entries if self.mode == RECORD else [self.entries[index] for index in sorted(self.played)]
+        if not entries:
+            return
+        totals = {}
+        for entry in entries:
+            count, seconds = totals.get(entry["kind"], (0, 0.0))
+            totals[entry["kind"]] = (count + 1, seconds + entry["duration"])
+        action = "Recorded" if self.mode == RECORD else "Replayed"
+        print(f"\n{action} interactions: " + ", ".join(
+            f"{kind} {count} ({seconds:.2f}s)" for kind, (count, seconds) in sorted(totals.items())
+        ))
+        for entry in sorted(entries, key=lambda entry: entry["duration"], reverse=True)[:slowest]:
+            print(f"  {entry['duration']:8.3f}s  {entry['kind']:<10} {entry['loose_key']}")
+        if self.mode == REPLAY and len(self.played) < len(self.entries):
+            print(f"  {len(self.entries) - len(self.played)} recorded interactions were not replayed")
@@ -34,6 +34,14 @@ class SolanaKeyConverter:
         self.private_key_array = list(decoded_bytes)
         return self.private_key_array
 
+    def public_key(self):
+        """
+        Base58 wallet address, taken from the public half of the 64-byte keypair
+        """
+        if self.private_key_array is None:
+            self.convert_key()
+        return base58.b58encode(bytes(self.private_key_array[32:])).decode()
+
     def save_to_json(self, output_path="solana_keypair.json"):
         """
         Save the converted key array to a JSON file
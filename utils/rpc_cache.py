@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from utils.solana_rpc import SolanaRPCClient, MAINNET_RPC_URL
+
+# Seconds a result stays fresh, per read method. Methods not listed (sends, blockhashes,
+# signature statuses, slot and block height polling, getProgramAccounts) are never cached.
+DEFAULT_TTLS = {
+    "getGenesisHash": 365 * 24 * 3600,
+    "getMinimumBalanceForRentExemption": 24 * 3600,
+    "getVersion": 3600,
+    "getAccountInfo": 10,
+    "getBalance": 5,
+    "getTokenAccountBalance": 5,
+}
+# Account state our own writes change, dropped whenever a transaction goes through this client
+WRITE_METHODS = {"sendTransaction", "requestAirdrop"}
+ACCOUNT_READ_METHODS = {"getAccountInfo", "getBalance", "getTokenAccountBalance"}
+
+
+class _Pending:
+    """
+    One in-flight request, shared by every caller asking for the same key meanwhile
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CachingSolanaRPCClient(SolanaRPCClient):
+    def __init__(self, url=MAINNET_RPC_URL, session=None, timeout=30, pool_size=10, ttls=None, max_entries=4096,
+                 db_path=None):
+        """
+        SolanaRPCClient with a read-through cache in front of `call`.
+
+        Results are kept in an in-memory LRU of `max_entries` for the method's TTL and,
+        when db_path is set, in a SQLite database shared by later runs and other processes.
+        Concurrent identical calls are coalesced into one request. Results are stored as
+        JSON text, so every caller gets its own copy to modify.
+        """
+        super().__init__(url, session=session, timeout=timeout, pool_size=pool_size)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.stats = {}
+
+        if self.db_path:
+            with self._connection() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS rpc_cache (key TEXT PRIMARY KEY, method TEXT NOT NULL, "
+                             "value TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _count(self, method, outcome):
+        """
+        Called with the lock held
+        """
+        method_stats = self.stats.setdefault(method, {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0})
+        method_stats[outcome] += 1
+
+    def _key(self, method, params):
+        return json.dumps([self.url, method, params or []], sort_keys=True, separators=(",", ":"))
+
+    def _lookup(self, key, now):
+        """
+        Fresh cached JSON text for the key, or None. Called with the lock held.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self.entries.move_to_end(key)
+                return entry[1]
+            del self.entries[key]
+        return None
+
+    def _store(self, key, expires_at, text):
+        self.entries[key] = (expires_at, text)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _load_from_disk(self, key, now):
+        with self._connection() as conn:
+            row = conn.execute("SELECT value, expires_at FROM rpc_cache WHERE key = ? AND expires_at > ?",
+                               (key, now)).fetchone()
+        return row
+
+    def _save_to_disk(self, key, method, text, expires_at):
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO rpc_cache VALUES (?, ?, ?, ?)", (key, method, text, expires_at))
+
+    def invalidate(self, methods=None):
+        """
+        Drop cached results of the given methods (all methods when None)
+        """
+        with self.lock:
+            for key in list(self.entries):
+                if methods is None or json.loads(key)[1] in methods:
+                    del self.entries[key]
+        if self.db_path:
+            with self._connection() as conn:
+                if methods is None:
+                    conn.execute("DELETE FROM rpc_cache")
+                else:
+                    conn.executemany("DELETE FROM rpc_cache WHERE method = ?", [(method,) for method in methods])
+
+    def call(self, method, params=None):
+        ttl = self.ttls.get(method)
+        if not ttl:
+            result = super().call(method, params)
+            if method in WRITE_METHODS:
+                self.invalidate(ACCOUNT_READ_METHODS)
+            return result
+
+        key = self._key(method, params)
+        with self.lock:
+            text = self._lookup(key, time.time())
+            if text is not None:
+                self._count(method, "hits")
+                return json.loads(text)
+            pending = self.pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self.pending[key] = _Pending()
+            else:
+                self._count(method, "coalesced")
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return json.loads(pending.result)
+
+        outcome = "misses"
+        try:
+            row = self._load_from_disk(key, time.time()) if self.db_path else None
+            if row is not None:
+                text, expires_at = row
+                outcome = "disk_hits"
+            else:
+                text = json.dumps(super().call(method, params))
+                expires_at = time.time() + ttl
+                if self.db_path:
+                    self._save_to_disk(key, method, text, expires_at)
+            pending.result = text
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self.lock:
+                self._count(method, outcome)
+                if pending.error is None:
+                    self._store(key, expires_at, pending.result)
+                del self.pending[key]
+            pending.done.set()
+        return json.loads(text)
+
+    def print_stats(self):
+        if not self.stats:
+            return
+        print("RPC cache: " + ", ".join(
+            f"{method} {counts['hits'] + counts['disk_hits'] + counts['coalesced']}/"
+            f"{sum(counts.values())} hits" for method, counts in sorted(self.stats.items())
+        ))
+
+
+def rpc_cache_db():
+    """
+    Path of the persistent cache from RPC_CACHE_DB in the .env file, or None for memory only
+    """
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
+    return os.getenv("RPC_CACHE_DB") or None
+
+
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+
+def shared_rpc_client(url=MAINNET_RPC_URL):
+    """
+    Process-wide caching client for an RPC endpoint, so every step of a run (and every job
+    of a worker) shares one cache
+    """
+    with _shared_lock:
+        if url not in _shared_clients:
+            _shared_clients[url] = CachingSolanaRPCClient(url, db_path=rpc_cache_db())
+        return _shared_clients[url]
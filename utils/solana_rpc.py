@@ -0,0 +1,110 @@
+import base64
+import itertools
+import requests
+from requests.adapters import HTTPAdapter
+
+MAINNET_RPC_URL = "https://api.mainnet-beta.solana.com"
+
+
+class SolanaRPCError(Exception):
+    def __init__(self, method, error):
+        self.method = method
+        self.code = error.get("code")
+        self.data = error.get("data")
+        super().__init__(f"RPC {method} failed ({self.code}): {error.get('message')}")
+
+
+class SolanaRPCClient:
+    def __init__(self, url=MAINNET_RPC_URL, session=None, timeout=30, pool_size=10):
+        """
+        Minimal JSON-RPC client over a pooled HTTP session, so repeated calls reuse
+        the same keep-alive connections instead of opening a new one per request
+        """
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._ids = itertools.count(1)
+
+    def call(self, method, params=None):
+        """
+        Send one JSON-RPC request and return its result
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params or []
+        }
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        if "error" in body:
+            raise SolanaRPCError(method, body["error"])
+        return body["result"]
+
+    def get_health(self):
+        return self.call("getHealth")
+
+    def get_balance(self, address, commitment="confirmed"):
+        return self.call("getBalance", [address, {"commitment": commitment}])["value"]
+
+    def get_account_info(self, address, commitment="confirmed"):
+        """
+        Raw account (owner, lamports, base64 data decoded to bytes), or None if it doesn't exist
+        """
+        value = self.call("getAccountInfo", [address, {"encoding": "base64", "commitment": commitment}])["value"]
+        if value is None:
+            return None
+        value["data"] = base64.b64decode(value["data"][0])
+        return value
+
+    def get_latest_blockhash(self, commitment="confirmed"):
+        return self.call("getLatestBlockhash", [{"commitment": commitment}])["value"]
+
+    def get_block_height(self, commitment="confirmed"):
+        return self.call("getBlockHeight", [{"commitment": commitment}])
+
+    def get_slot(self, commitment="confirmed"):
+        return self.call("getSlot", [{"commitment": commitment}])
+
+    def get_minimum_balance_for_rent_exemption(self, size, commitment="confirmed"):
+        return self.call("getMinimumBalanceForRentExemption", [size, {"commitment": commitment}])
+
+    def get_program_accounts(self, program_id, filters=None, data_slice=None, commitment="confirmed"):
+        """
+        Accounts owned by a program as {"pubkey", "account"} dicts, data still base64 encoded.
+        The node returns every match in one response, so narrow large queries with filters.
+        """
+        config = {"encoding": "base64", "commitment": commitment, "filters": filters or []}
+        if data_slice:
+            config["dataSlice"] = data_slice
+        return self.call("getProgramAccounts", [str(program_id), config])
+
+    def get_token_account_balance(self, address, commitment="confirmed"):
+        return self.call("getTokenAccountBalance", [address, {"commitment": commitment}])["value"]
+
+    def send_transaction(self, transaction, skip_preflight=False):
+        """
+        Send a signed (versioned) transaction and return its signature
+        """
+        encoded = base64.b64encode(bytes(transaction)).decode()
+        return self.call("sendTransaction", [encoded, {
+            "encoding": "base64",
+            "skipPreflight": skip_preflight,
+            "preflightCommitment": "confirmed"
+        }])
+
+    def get_signature_statuses(self, signatures, search_history=False):
+        """
+        Statuses of up to 256 signatures per request, in the same order (None when unknown).
+        Without search_history only the node's recent status cache is checked, so None does
+        not prove an older transaction never landed.
+        """
+        config = [{"searchTransactionHistory": True}] if search_history else []
+        statuses = []
+        for i in range(0, len(signatures), 256):
+            statuses += self.call("getSignatureStatuses", [signatures[i:i + 256]] + config)["value"]
+        return statuses
@@ -0,0 +1,106 @@
+import time
+import asyncio
+
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class StageGraph:
+    def __init__(self):
+        """
+        Dependency graph of blocking pipeline stages, executed on asyncio.
+
+        Each stage runs in a worker thread as soon as all of its dependencies are done,
+        so independent stages overlap. Once any stage fails no new stage is started
+        (stages already running finish), and the first failure is re-raised.
+        """
+        self.stages = {}
+        self.status = {}
+        self.timings = {}
+        self.errors = []
+        self.origin = None
+
+    def add(self, name, func, deps=()):
+        """
+        Add a stage. Dependencies must already be in the graph, which keeps it acyclic.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage {name} is already in the graph")
+        unknown = [dep for dep in deps if dep not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(unknown)}")
+        self.stages[name] = (func, tuple(deps))
+
+    async def _run_stage(self, name, func, dep_tasks):
+        await asyncio.gather(*dep_tasks)
+        _, deps = self.stages[name]
+        if self.errors or any(self.status.get(dep) != DONE for dep in deps):
+            self.status[name] = SKIPPED
+            return
+
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(func)
+            self.status[name] = DONE
+        except Exception as e:
+            self.status[name] = FAILED
+            self.errors.append((name, e))
+        finally:
+            self.timings[name] = (start - self.origin, time.perf_counter() - self.origin)
+
+    async def run(self):
+        """
+        Run every stage and return {stage: {"start", "duration", "status"}}
+        """
+        self.origin = time.perf_counter()
+        tasks = {}
+        for name, (func, deps) in self.stages.items():
+            tasks[name] = asyncio.create_task(self._run_stage(name, func, [tasks[dep] for dep in deps]))
+        await asyncio.gather(*tasks.values())
+
+        if self.errors:
+            name, error = self.errors[0]
+            raise error
+        return self.report()
+
+    def report(self):
+        return {
+            name: {
+                "start": self.timings[name][0] if name in self.timings else None,
+                "duration": self.timings[name][1] - self.timings[name][0] if name in self.timings else None,
+                "status": self.status.get(name, SKIPPED)
+            }
+            for name in self.stages
+        }
+
+    def critical_path(self):
+        """
+        Chain of stages that determined the total run time: starting from the stage that
+        finished last, repeatedly follow the dependency that finished last
+        """
+        finished = [name for name in self.stages if name in self.timings]
+        if not finished:
+            return []
+        stage = max(finished, key=lambda name: self.timings[name][1])
+        path = [stage]
+        while True:
+            deps = [dep for dep in self.stages[stage][1] if dep in self.timings]
+            if not deps:
+                return path
+            stage = max(deps, key=lambda name: self.timings[name][1])
+            path.insert(0, stage)
+
+    def print_report(self):
+        print("\nStage timings:")
+        for name, timing in self.report().items():
+            if timing["start"] is None:
+                print(f"  {name:<12} {timing['status']}")
+            else:
+                print(f"  {name:<12} {timing['start']:7.2f}s -> {timing['start'] + timing['duration']:7.2f}s "
+                      f"({timing['duration']:.2f}s) {timing['status']}")
+        path = self.critical_path()
+        if path:
+            total = self.timings[path[-1]][1]
+            on_path = sum(self.timings[name][1] - self.timings[name][0] for name in path)
+            print(f"Critical path: {' -> '.join(path)} ({on_path:.2f}s of {total:.2f}s total)")